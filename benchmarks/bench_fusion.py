@@ -0,0 +1,94 @@
+"""
+Micro-benchmark of result fusion: previous dict-and-sort merge vs `fuse` with top-k heap selection.
+
+Usage:
+    python -m benchmarks.bench_fusion --top-k 10 --overfetch 2 --rounds 20000
+"""
+import argparse
+import random
+import timeit
+
+from src.api.fusion import fuse, keyword_entries, semantic_entries
+from src.utils.config import QUESTION_URL
+
+
+def legacy_combine(semantic_results, keyword_results, weight_semantic=0.7, weight_keyword=0.3):
+    """`combine_results` before the fusion module, without its debug logging."""
+
+    combined = {}
+    for row in semantic_results:
+        combined[row["_id"]] = {
+            "semantic_score": row["_score"],
+            "keyword_score": 0.0,
+            "title": row["fields"]["title"],
+            "url": row["fields"]["url"],
+        }
+    for row in keyword_results:
+        if row["id"] in combined:
+            combined[row["id"]]["keyword_score"] = row["score"]
+        else:
+            combined[row["id"]] = {
+                "semantic_score": 0.0,
+                "keyword_score": row["score"],
+                "title": row["title"],
+                "url": QUESTION_URL.format(row["id"]),
+            }
+    final_results = [
+        {
+            "question_id": question_id,
+            "score": weight_semantic * data["semantic_score"] + weight_keyword * data["keyword_score"],
+            "title": data["title"],
+            "url": data["url"],
+        }
+        for question_id, data in combined.items()
+    ]
+    final_results.sort(key=lambda x: x["score"], reverse=True)
+    return final_results
+
+
+def make_legs(size: int, corpus: int, seed: int = 42):
+    rng = random.Random(seed)
+    semantic_ids = rng.sample(range(corpus), size)
+    keyword_ids = rng.sample(range(corpus), size)
+    semantic = sorted(
+        ({"_id": str(i), "_score": rng.random(), "fields": {"title": f"q{i}", "url": QUESTION_URL.format(i)}}
+         for i in semantic_ids),
+        key=lambda row: row["_score"], reverse=True,
+    )
+    keyword = sorted(
+        ({"id": str(i), "score": rng.random() / 10, "title": f"q{i}"} for i in keyword_ids),
+        key=lambda row: row["score"], reverse=True,
+    )
+    return semantic, keyword
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--overfetch', type=int, default=2)
+    parser.add_argument('--corpus', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=20_000)
+    args = parser.parse_args()
+
+    semantic, keyword = make_legs(args.top_k * args.overfetch, args.corpus)
+    cases = {
+        'legacy merge + sort': lambda: legacy_combine(semantic, keyword),
+        'fuse weighted/none': lambda: fuse(
+            semantic_entries(semantic), keyword_entries(keyword), method='weighted', normalise='none', top_k=args.top_k,
+        ),
+        'fuse weighted/minmax': lambda: fuse(
+            semantic_entries(semantic), keyword_entries(keyword), method='weighted', normalise='minmax', top_k=args.top_k,
+        ),
+        'fuse rrf': lambda: fuse(
+            semantic_entries(semantic), keyword_entries(keyword), method='rrf', top_k=args.top_k,
+        ),
+    }
+
+    print(f"legs of {len(semantic)} hits, top_k={args.top_k}")
+    for name, case in cases.items():
+        elapsed = timeit.timeit(case, number=args.rounds)
+        print(f"{name:<25} {elapsed / args.rounds * 1e6:>8.2f} us per call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark of JSON corpus parsing: serial `json` reader vs process pool + fast decoder.
+
+Usage:
+    python -m benchmarks.bench_json_parse --questions 100000 --page-size 50 --workers 4
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from src.utils import work_json
+from src.utils.work_json import (
+    append_corpus,
+    iter_question_records,
+    iter_question_records_parallel,
+)
+
+
+def make_corpus(directory: str, questions: int, page_size: int) -> None:
+    """Writes a synthetic corpus of `page_N.json` files shaped like the API responses."""
+
+    for page_num, start in enumerate(range(0, questions, page_size), start=1):
+        items = [
+            {
+                'id': i,
+                'title': f"Вопрос номер {i} про Python, Git и PostgreSQL?",
+                'keywords': ['python', 'git', 'postgresql'],
+                'shortAnswer': "<p>Короткий ответ на вопрос.</p>" * 10,
+                'longAnswer': "<p>Длинный ответ на вопрос.</p>" * 40,
+                'createdAt': "2024-05-01T10:00:00.000Z",
+                'rate': 4,
+                'complexity': 5,
+            }
+            for i in range(start, min(start + page_size, questions))
+        ]
+        data = {'page': page_num, 'limit': page_size, 'total': questions, 'data': items}
+        with open(os.path.join(directory, f"page_{page_num}.json"), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        append_corpus(items, os.path.join(directory, 'corpus', 'corpus.jsonl.gz'), f"page_{page_num}")
+
+
+def measure(name: str, records) -> float:
+    start = time.perf_counter()
+    count = sum(1 for _ in records)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {count:>8} records {elapsed:>8.2f} s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--questions', type=int, default=100_000)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    decoder = 'msgspec' if work_json.msgspec else 'orjson' if work_json.orjson else 'json'
+    print(f"questions={args.questions} page_size={args.page_size} workers={args.workers} decoder={decoder}")
+
+    with tempfile.TemporaryDirectory(dir='.') as tmp:
+        directory = os.path.relpath(tmp)
+        make_corpus(directory, args.questions, args.page_size)
+        corpus = os.path.join(directory, 'corpus', 'corpus.jsonl.gz')
+        files = sorted(str(p) for p in Path(directory).glob('*.json'))
+
+        baseline = measure("serial json (files)", iter_question_records(directory, files))
+        measure("serial (corpus)", iter_question_records(corpus))
+        parallel = measure(
+            "parallel fast decoder (files)",
+            iter_question_records_parallel(directory, workers=args.workers),
+        )
+        measure("parallel fast decoder (corpus)", iter_question_records_parallel(corpus, workers=args.workers))
+        print(f"speedup (files): {baseline / parallel:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
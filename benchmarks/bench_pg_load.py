@@ -0,0 +1,69 @@
+"""
+Benchmark of PostgreSQL bulk loading: `insert_many_rows` vs `copy_many_rows`.
+
+Needs a running PostgreSQL configured in `.env` (see `get_postgres_params`).
+A scratch table `bench_questions` is created and dropped by the script.
+
+Usage:
+    python -m benchmarks.bench_pg_load --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+
+from src.utils.helper import get_db_connection, get_postgres_params
+from src.utils.work_pg import copy_many_rows, insert_many_rows
+
+TABLE = "bench_questions"
+COLUMNS = ['id', 'title', 'created_at']
+
+
+def execute(query: str) -> None:
+    conn = get_db_connection(get_postgres_params())
+    try:
+        with conn.cursor() as cur:
+            cur.execute(query)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def make_rows(size: int):
+    created_at = datetime(2024, 5, 1, 10, 0, 0)
+    return ((i, f"Вопрос номер {i} про Python, Git и PostgreSQL?", created_at) for i in range(size))
+
+
+def measure(name: str, load) -> None:
+    execute(f"TRUNCATE {TABLE}")
+    tracemalloc.start()
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<30} {elapsed:>8.2f} s   peak {peak / 2 ** 20:>8.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--chunk-size', type=int, default=50_000)
+    args = parser.parse_args()
+
+    execute(f"CREATE UNLOGGED TABLE IF NOT EXISTS {TABLE} (id integer, title varchar(300), created_at timestamp)")
+    try:
+        for size in args.sizes:
+            print(f"--- {size} rows")
+            # the INSERT path needs the whole list, as it does in production
+            measure("insert_many_rows", lambda: insert_many_rows(TABLE, COLUMNS, list(make_rows(size))))
+            measure(
+                "copy_many_rows",
+                lambda: copy_many_rows(TABLE, COLUMNS, make_rows(size), chunk_size=args.chunk_size),
+            )
+    finally:
+        execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark of the local vector index: top-k latency of a memory-mapped matrix search.
+
+Usage:
+    python -m benchmarks.bench_vector_search --questions 50000 --dim 512 --dtype float32
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from src.utils.vector_index import LocalVectorIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--questions', type=int, default=50_000)
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--dtype', default='float32', choices=['float32', 'float16'])
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    embed = lambda texts: rng.standard_normal((len(texts), args.dim), dtype=np.float32)
+    records = (
+        {'_id': str(i), 'title': f"Вопрос {i}", 'url': f"https://yeahub.ru/questions/{i}"}
+        for i in range(args.questions)
+    )
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LocalVectorIndex.build(records, path=tmp, embed=embed, dtype=args.dtype, batch_size=4096)
+        index.search(queries[0], args.top_k)
+
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query, args.top_k)
+        elapsed = time.perf_counter() - start
+
+    backend = 'hnsw' if index.hnsw is not None else 'matrix'
+    print(f"{args.questions} x {args.dim} {args.dtype} ({backend}): "
+          f"{elapsed / args.queries * 1000:.3f} ms per query")
+
+
+if __name__ == '__main__':
+    main()
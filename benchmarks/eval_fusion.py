@@ -0,0 +1,106 @@
+"""
+Offline relevance evaluation of fusion settings on a labelled query set.
+
+The query set is a JSON file:
+
+    {"queries": [{"query": "что такое GIL", "relevant": ["123", "456"]}, ...]}
+
+With `--capture`, the semantic and keyword legs of every query are fetched once
+from Pinecone and PostgreSQL and stored back into the file (keys `semantic`
+and `keyword`), so settings can then be compared offline without services.
+
+Usage:
+    python -m benchmarks.eval_fusion queries.json --capture --leg-k 20
+    python -m benchmarks.eval_fusion queries.json --top-k 10
+"""
+import argparse
+import itertools
+import json
+import math
+from typing import Dict, List, Sequence
+
+from src.api.fusion import fuse, keyword_entries, semantic_entries
+
+METHODS = [('rrf', 'none'), ('weighted', 'none'), ('weighted', 'minmax'), ('weighted', 'zscore')]
+SEMANTIC_WEIGHTS = [0.3, 0.5, 0.7, 0.9]
+
+
+def reciprocal_rank(ranked: Sequence[str], relevant: set) -> float:
+    for rank, question_id in enumerate(ranked, start=1):
+        if question_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def recall_at_k(ranked: Sequence[str], relevant: set, k: int) -> float:
+    return len(relevant.intersection(ranked[:k])) / len(relevant) if relevant else 0.0
+
+
+def ndcg_at_k(ranked: Sequence[str], relevant: set, k: int) -> float:
+    dcg = sum(1.0 / math.log2(rank + 1) for rank, qid in enumerate(ranked[:k], start=1) if qid in relevant)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def evaluate(queries: List[Dict], top_k: int, **fusion) -> Dict[str, float]:
+    """Averages MRR, recall@k and nDCG@k of one fusion setting over the query set."""
+
+    totals = {'mrr': 0.0, 'recall': 0.0, 'ndcg': 0.0}
+    for item in queries:
+        results = fuse(
+            semantic_entries(item.get('semantic', [])),
+            keyword_entries(item.get('keyword', [])),
+            top_k=top_k,
+            **fusion,
+        )
+        ranked = [str(row['question_id']) for row in results]
+        relevant = {str(question_id) for question_id in item['relevant']}
+        totals['mrr'] += reciprocal_rank(ranked, relevant)
+        totals['recall'] += recall_at_k(ranked, relevant, top_k)
+        totals['ndcg'] += ndcg_at_k(ranked, relevant, top_k)
+    return {name: value / max(len(queries), 1) for name, value in totals.items()}
+
+
+def capture(queries: List[Dict], leg_k: int) -> None:
+    """Fetches both legs of every query from the live services."""
+
+    from src.api.query import keyword_search, semantic_search
+
+    for item in queries:
+        item['semantic'] = [
+            {'_id': hit['_id'], '_score': hit['_score'], 'fields': dict(hit['fields'])}
+            for hit in semantic_search(item['query'], leg_k)
+        ]
+        item['keyword'] = keyword_search(item['query'], leg_k)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--capture', action='store_true')
+    parser.add_argument('--leg-k', type=int, default=20)
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if args.capture:
+        capture(data['queries'], args.leg_k)
+        with open(args.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    print(f"{len(data['queries'])} queries, top_k={args.top_k}")
+    print(f"{'method':<10} {'normalise':<10} {'w_sem':>6} {'MRR':>7} {'R@k':>7} {'nDCG@k':>7}")
+    for (method, normalise), weight in itertools.product(METHODS, SEMANTIC_WEIGHTS):
+        scores = evaluate(
+            data['queries'], args.top_k,
+            method=method, normalise=normalise,
+            weight_semantic=weight, weight_keyword=round(1 - weight, 2),
+        )
+        print(f"{method:<10} {normalise:<10} {weight:>6.1f} "
+              f"{scores['mrr']:>7.3f} {scores['recall']:>7.3f} {scores['ndcg']:>7.3f}")
+
+
+if __name__ == '__main__':
+    main()
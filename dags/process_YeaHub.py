@@ -3,20 +3,91 @@ from textwrap import dedent
 
 from airflow import DAG
 from airflow.models.baseoperator import chain
+from airflow.models.param import Param
 from airflow.operators.python import PythonOperator
 
-from src.utils.config import JSON_DIR
-from src.extract_data import parse_yeahub
-from src.utils.work_json import (
-    parse_json_postgres_question,
-    parse_json_postgres_answer,
-)
-from src.utils.work_pg import init_db, insert_many_rows
-from src.utils.work_pinecone import run_pinecone_upsert
+from src.utils.config import CORPUS_PATH, DELTA_DIR, JSON_DIR
 
 
 DAG_NAME = "process_YeaHub"
-DESCRIPTION = "Parse site `YeaHub`, save data into *.html, *.json, then into PostgreSQL & Pinecone"
+DESCRIPTION = "Fetch site `YeaHub` API, save data into *.json, then into PostgreSQL & Pinecone"
+
+FETCH_TASK_ID = "fetch_api_and_save_json"
+
+
+# The scheduler re-parses this file every `min_file_process_interval` seconds,
+# so project modules (and their heavy dependencies) are imported inside the
+# callables, and only paths are passed between tasks via XCom.
+
+def create_db() -> None:
+    from src.utils.work_pg import init_db
+
+    init_db()
+
+
+def fetch_api(corpus_path: str) -> dict:
+    from src.extract_api import run_fetch_yeahub_api
+
+    files = run_fetch_yeahub_api(incremental=True, corpus_path=corpus_path)
+    # full readers use the corpus: one file, read faster than the page files
+    return {"delta_dir": DELTA_DIR, "json_dir": JSON_DIR, "corpus_path": corpus_path, "files": len(files)}
+
+
+def load_postgres_delta(ti, params) -> int:
+    from src.extract_api import clear_delta, load_removed_ids
+    from src.load_data import delete_questions, load_postgres
+
+    dataset = ti.xcom_pull(task_ids=FETCH_TASK_ID)
+    # `full_load` upserts every saved question, e.g. to fill columns added to `questions`
+    file_dir = dataset["corpus_path"] if params.get("full_load") else dataset["delta_dir"]
+    count = load_postgres(file_dir=file_dir, upsert=True)
+    delete_questions(load_removed_ids(dataset["delta_dir"]))
+    # pending changes accumulate until the upsert is committed
+    clear_delta(dataset["delta_dir"])
+    return count
+
+
+def vector_backend() -> str:
+    from src.utils.config import VECTOR_BACKEND
+    from src.utils.helper import get_param_from_env
+
+    return (get_param_from_env("VECTOR_BACKEND") or VECTOR_BACKEND).lower()
+
+
+# the vector store tasks gate themselves on `VECTOR_BACKEND`, so a run without
+# credentials of the other stores still reaches `invalidate_search_cache`
+
+def backfill_pgvector() -> int:
+    from src.load_data import backfill_question_embeddings
+
+    if vector_backend() != "pgvector":
+        return 0
+    return backfill_question_embeddings()
+
+
+def build_vector_index(ti) -> int:
+    from src.utils.vector_index import build_local_index
+
+    if vector_backend() != "local":
+        return 0
+    dataset = ti.xcom_pull(task_ids=FETCH_TASK_ID)
+    return build_local_index(file_dir=dataset["corpus_path"])
+
+
+def sync_pinecone(ti) -> dict:
+    if vector_backend() != "pinecone":
+        return {}
+    from src.utils.work_pinecone import run_pinecone_sync
+
+    dataset = ti.xcom_pull(task_ids=FETCH_TASK_ID)
+    return run_pinecone_sync(file_dir=dataset["corpus_path"])
+
+
+def invalidate_cache() -> None:
+    from src.utils.work_redis import bump_dataset_version
+
+    bump_dataset_version()
+
 
 ARGS = {
     "owner": "pavel.olifer",
@@ -25,17 +96,6 @@ ARGS = {
     "retry_delay": timedelta(minutes=15),
 }
 
-table_list = {
-    'questions': [
-        ['id', 'title', 'created_at'],
-        parse_json_postgres_question
-    ],
-    'answers': [
-        ['question_id', 'body_md'],
-        parse_json_postgres_answer
-    ],
-}
-
 with DAG(
     dag_id=DAG_NAME,
     description=DESCRIPTION,
@@ -44,45 +104,57 @@ with DAG(
     catchup=False,
     max_active_runs=1,
     tags=['YeaHub', 'Pinecone', 'PostgreSQL'],
+    params={
+        "full_load": Param(False, type="boolean", description="Upsert all questions, not only changes"),
+    },
 ) as dag:
     
-    create_db = PythonOperator(
+    create_db_task = PythonOperator(
         task_id='create_db',
-        python_callable=init_db,
+        python_callable=create_db,
     )
 
-    parse_html_and_save_data = PythonOperator(
-        task_id='parse_html_and_save_data',
-        python_callable=parse_yeahub,
+    fetch_api_and_save_json = PythonOperator(
+        task_id=FETCH_TASK_ID,
+        python_callable=fetch_api,
+        op_kwargs={
+            'corpus_path': CORPUS_PATH,
+        },
+    )
+
+    parse_json_and_save_Postgres = PythonOperator(
+        task_id='parse_json_and_save_Postgres',
+        python_callable=load_postgres_delta,
+    )
+
+    embed_Postgres = PythonOperator(
+        task_id='embed_Postgres',
+        python_callable=backfill_pgvector,
+    )
+
+    build_local_vector_index = PythonOperator(
+        task_id='build_local_vector_index',
+        python_callable=build_vector_index,
     )
 
-    parse_json_and_save_Postgres = []
-    for table_name, (columns, row_func) in table_list.items():
-        rows = row_func(file_dir=JSON_DIR)
-        task = PythonOperator(
-            task_id=f'parse_json_and_save_PG_{table_name}',
-            python_callable=insert_many_rows,
-            op_kwargs={
-                'table_name': table_name,
-                'columns': columns,
-                'rows': rows,
-            },
-        )
-        parse_json_and_save_Postgres.append(task)
-    
     parse_json_and_save_Pinecone = PythonOperator(
         task_id='parse_json_and_save_Pinecone',
-        python_callable=run_pinecone_upsert,
-        op_kwargs={
-            'file_dir': JSON_DIR,
-        },
+        python_callable=sync_pinecone,
+    )
+
+    invalidate_search_cache = PythonOperator(
+        task_id='invalidate_search_cache',
+        python_callable=invalidate_cache,
     )
 
     chain(
-        create_db,
-        parse_html_and_save_data,
-        *parse_json_and_save_Postgres,
+        create_db_task,
+        fetch_api_and_save_json,
+        parse_json_and_save_Postgres,
+        embed_Postgres,
+        build_local_vector_index,
         parse_json_and_save_Pinecone,
+        invalidate_search_cache,
     )
 
     dag.doc_md = dedent(f"""
@@ -96,10 +168,28 @@ with DAG(
         ---
         ### Parse website `YeaHub`\n
 
-        1. Create DB in Postgres
-        2. Parse HTML-pages
-        3. Store (questions + answers) in HTML
-        3. Parse JSON
-           - Store in Postgres
-           - Store in Pinecone
+        1. Create DB in Postgres (non-destructive, existing data is kept)
+           - the `embedding` column and its HNSW index only if `VECTOR_BACKEND=pgvector`
+        2. Fetch API pages (questions + answers) and store them in JSON
+           - incremental: stops at the first already known page
+           - full crawl once a week or when questions were deleted, so removed
+             questions disappear from `JSON_DIR`, the corpus, Postgres and Pinecone
+           - new and changed questions are stored separately in `DELTA_DIR`
+             (kept and merged with the next runs until the Postgres load succeeds)
+           - all questions are consolidated in `CORPUS_PATH` (append-only `.jsonl.gz`),
+             the full loaders (Pinecone sync, local index, `full_load`) read it
+           - HTML snapshots are made by Playwright only on demand (`src/extract_data.py`)
+        3. Parse JSON (inside the tasks, paths come from the XCom of the fetch task)
+           - Upsert in Postgres (new and changed questions and answers in one pass),
+             delete questions removed from the site (found by the full crawl)
+             - trigger with `{{"full_load": true}}` to upsert all questions of `CORPUS_PATH`,
+               e.g. once after `keywords` / `short_answer` were added to `questions`
+           - Embed new and edited titles into `questions.embedding`
+             (only if `VECTOR_BACKEND=pgvector`, otherwise the task does nothing)
+           - Rebuild the local vector index in `LOCAL_INDEX_DIR`
+             (only if `VECTOR_BACKEND=local`, the API picks it up on restart)
+           - Sync Pinecone with all questions: upsert new and changed, delete removed
+             (only if `VECTOR_BACKEND=pinecone`, the default)
+             (counts of upserted / deleted / unchanged records are pushed to XCom)
+        4. Bump the dataset version in Redis, cached `/search` results are invalidated
     """)
\ No newline at end of file
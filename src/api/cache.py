@@ -0,0 +1,229 @@
+import base64
+import binascii
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Sequence, Tuple
+
+from prometheus_client import Counter
+
+from src.utils.config import (
+    DATASET_VERSION_KEY,
+    SEARCH_CACHE_SIZE,
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_VERSION_TTL,
+)
+from src.utils.helper import get_param_from_env
+from src.utils.logger import setup_logger
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = setup_logger(level=10)
+
+CACHE_HITS = Counter("search_cache_hits_total", "Search results served from the cache", ["tier"])
+CACHE_MISSES = Counter("search_cache_misses_total", "Search results computed from scratch")
+CACHE_ERRORS = Counter("search_cache_errors_total", "Failed calls to the shared cache tier")
+
+
+def normalise_query(query: str) -> str:
+    """Lower-cases the query and collapses whitespace, so trivial variants share a key."""
+
+    return ' '.join(query.lower().split())
+
+
+def make_cache_key(query: str, top_k: int, fusion: Sequence[Any], version: str) -> str:
+    """
+    Builds the cache key of a search request.
+
+    Args:
+        query (str): Raw query text.
+        top_k (int): Number of results.
+        fusion (Sequence[Any]): Fusion settings, e.g. weights `(0.7, 0.3)` and method.
+        version (str): Dataset version, a bump invalidates all older keys.
+
+    Returns:
+        str: Key like `search:<version>:<sha1>`.
+    """
+
+    payload = json.dumps([normalise_query(query), top_k, list(fusion)], ensure_ascii=False)
+    digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    return f"search:{version}:{digest}"
+
+
+def encode_cursor(version: str, offset: int) -> str:
+    """
+    Builds the opaque cursor of the next result page.
+
+    The cursor holds the dataset version of the cached ranking and the offset
+    of the page. It doesn't hold the query, the client sends it again, so a
+    cursor can't be used to read the ranking of another query.
+    """
+
+    payload = json.dumps({"v": version, "o": offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Returns `(version, offset)` of a cursor built by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        version, offset = str(payload["v"]), int(payload["o"])
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return version, offset
+
+
+class TTLCache:
+    """In-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = SEARCH_CACHE_SIZE, ttl: float = SEARCH_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SearchCache:
+    """
+    Two-tier cache of search results.
+
+    The in-process LRU tier answers popular queries without any network call.
+    The optional Redis tier is shared by all API workers and holds the dataset
+    version, which the DAG bumps after loading new data. The version is part of
+    every key, so a bump invalidates all cached results at once.
+    """
+
+    def __init__(
+        self,
+        local: Optional[TTLCache] = None,
+        client: Optional[Any] = None,
+        ttl: float = SEARCH_CACHE_TTL,
+        version_ttl: float = SEARCH_CACHE_VERSION_TTL,
+    ):
+        """
+        Args:
+            local (Optional[TTLCache]): In-process tier. Defaults to a new `TTLCache`.
+            client (Optional[redis.asyncio.Redis]): Shared tier, disabled if None.
+            ttl (float): Seconds a result is kept in the shared tier.
+            version_ttl (float): Seconds the dataset version is reused before
+                it is read from Redis again.
+        """
+        self.local = local or TTLCache(ttl=ttl)
+        self.client = client
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+        self._version = "0"
+        self._version_checked = float("-inf")
+
+    @classmethod
+    def from_env(cls) -> "SearchCache":
+        """Creates the cache, with the Redis tier if `REDIS_URL` is set and redis is installed."""
+
+        redis_url = get_param_from_env("REDIS_URL")
+        client = None
+        if redis_url and redis is not None:
+            client = redis.from_url(redis_url)
+            logger.debug(f"Search cache uses Redis at {redis_url}")
+        elif redis_url:
+            logger.warning("REDIS_URL is set, but redis is not installed, using local cache only.")
+        return cls(client=client)
+
+    async def version(self) -> str:
+        """Returns the current dataset version, re-read from Redis every `version_ttl` seconds."""
+
+        if self.client is None or time.monotonic() - self._version_checked < self.version_ttl:
+            return self._version
+        try:
+            value = await self.client.get(DATASET_VERSION_KEY)
+            self._version = value.decode('utf-8') if value else "0"
+        except Exception as e:
+            CACHE_ERRORS.inc()
+            logger.warning(f"Failed to read dataset version: {e}")
+        self._version_checked = time.monotonic()
+        return self._version
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            CACHE_HITS.labels(tier="local").inc()
+            return value
+
+        if self.client is not None:
+            try:
+                raw = await self.client.get(key)
+            except Exception as e:
+                CACHE_ERRORS.inc()
+                logger.warning(f"Failed to read search cache: {e}")
+                raw = None
+            if raw is not None:
+                entry = json.loads(raw)
+                if isinstance(entry, dict) and "expires_at" in entry:
+                    # the local copy expires together with the shared one
+                    value = entry["value"]
+                    self.local.set(key, value, max(entry["expires_at"] - time.time(), 0))
+                else:
+                    value = entry
+                    self.local.set(key, value)
+                CACHE_HITS.labels(tier="redis").inc()
+                return value
+
+        CACHE_MISSES.inc()
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Stores a value for `ttl` seconds, by default for the `ttl` of the cache."""
+
+        ttl = self.ttl if ttl is None else ttl
+        self.local.set(key, value, ttl)
+        if self.client is None:
+            return
+        try:
+            entry = {"expires_at": time.time() + ttl, "value": value}
+            await self.client.set(key, json.dumps(entry, ensure_ascii=False), ex=max(int(ttl), 1))
+        except Exception as e:
+            CACHE_ERRORS.inc()
+            logger.warning(f"Failed to write search cache: {e}")
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
@@ -0,0 +1,139 @@
+import threading
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Set
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(level=10)
+
+_prepared: "weakref.WeakKeyDictionary[Any, Set[str]]" = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def keyword_sql(approximate: bool = False, headline: bool = False) -> str:
+    """
+    Builds the full-text search statement over `questions.search_tsv`.
+
+    The tsquery is computed once and joined to the rows. Parameters are `$1`
+    (query text), `$2` (`top_k`) and, in approximate mode, `$3` (candidates).
+
+    Args:
+        approximate (bool): Rank only the first `$3` rows matched by the GIN
+            index instead of all of them. Much faster for broad queries, but
+            the best match may be missed if there are more candidates.
+        headline (bool): Add a `headline` snippet of the short answer, built
+            only for the returned `top_k` rows.
+
+    Returns:
+        str: SQL with `id`, `title`, `rank` (and `headline`) columns.
+    """
+
+    if approximate:
+        matches = """
+            SELECT q.id, q.title, q.short_answer, q.search_tsv, t.query
+            FROM plainto_tsquery('russian', $1) AS t (query)
+            JOIN questions AS q ON q.search_tsv @@ t.query
+            LIMIT $3
+        """
+    else:
+        matches = """
+            SELECT q.id, q.title, q.short_answer, q.search_tsv, t.query
+            FROM plainto_tsquery('russian', $1) AS t (query)
+            JOIN questions AS q ON q.search_tsv @@ t.query
+        """
+
+    top = f"""
+        SELECT id, title, short_answer, query, ts_rank_cd(search_tsv, query) AS rank
+        FROM ({matches}) AS matches
+        ORDER BY rank DESC
+        LIMIT $2
+    """
+
+    if not headline:
+        return f"SELECT id, title, rank FROM ({top}) AS top ORDER BY rank DESC"
+
+    return f"""
+        SELECT
+            id, title, rank,
+            ts_headline('russian', coalesce(short_answer, title), query) AS headline
+        FROM ({top}) AS top
+        ORDER BY rank DESC
+    """
+
+
+# keyword search of many queries in one statement: `$1` query texts, `$2` top_k,
+# `ord` is the 1-based position of the query in `$1`
+BATCH_KEYWORD_SQL = """
+    SELECT input.ord, matches.id, matches.title, matches.rank
+    FROM unnest($1::text[]) WITH ORDINALITY AS input (query, ord)
+    CROSS JOIN LATERAL (
+        SELECT q.id, q.title, ts_rank_cd(q.search_tsv, t.query) AS rank
+        FROM plainto_tsquery('russian', input.query) AS t (query)
+        JOIN questions AS q ON q.search_tsv @@ t.query
+        ORDER BY rank DESC
+        LIMIT $2
+    ) AS matches
+    ORDER BY input.ord, matches.rank DESC
+"""
+
+
+def group_by_ord(rows: Sequence[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+    """Splits the rows of a batch statement into one list per query, `ord` is 1-based."""
+
+    groups: List[List[Dict[str, Any]]] = [[] for _ in range(size)]
+    for row in rows:
+        groups[row["ord"] - 1].append(row)
+    return groups
+
+
+def keyword_args(query: str, top_k: int, approximate: bool, candidates: int) -> List[Any]:
+    """Returns the parameters of `keyword_sql` in placeholder order."""
+
+    return [query, top_k, candidates] if approximate else [query, top_k]
+
+
+def statement_name(approximate: bool, headline: bool) -> str:
+    return f"keyword_search_{'approx' if approximate else 'exact'}{'_headline' if headline else ''}"
+
+
+def execute_prepared(cur, name: str, sql_query: str, types: Sequence[str], args: Sequence[Any]) -> None:
+    """
+    Executes a statement prepared once per psycopg2 connection.
+
+    The first call on a connection sends `PREPARE`, later calls only send
+    `EXECUTE` with the parameters, so the server skips parsing and planning.
+    Prepared statements belong to the session, so a replaced connection of the
+    pool is prepared again on its first use.
+
+    Args:
+        cur (cursor): Cursor of the pooled connection.
+        name (str): Statement name, unique per SQL text.
+        sql_query (str): SQL with `$n` placeholders.
+        types (Sequence[str]): Postgres types of the parameters.
+        args (Sequence[Any]): Parameters.
+    """
+
+    with _prepared_lock:
+        names = _prepared.setdefault(cur.connection, set())
+        is_new = name not in names
+
+    if is_new:
+        cur.execute(f"PREPARE {name} ({', '.join(types)}) AS {sql_query}")
+        with _prepared_lock:
+            names.add(name)
+        logger.debug(f"Statement `{name}` prepared.")
+
+    cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(args))})", tuple(args))
+
+
+def to_results(rows: Sequence[Dict[str, Any]], headline: bool) -> List[Dict[str, Any]]:
+    """Converts result rows into keyword search results (`id`, `score`, `title`, `headline`)."""
+
+    if headline:
+        return [
+            {"id": row["id"], "score": row["rank"], "title": row["title"], "headline": row["headline"]}
+            for row in rows
+        ]
+    return [{"id": row["id"], "score": row["rank"], "title": row["title"]} for row in rows]
@@ -0,0 +1,151 @@
+import heapq
+import math
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.config import (
+    FUSION_METHOD,
+    FUSION_NORMALISE,
+    FUSION_RRF_K,
+    QUESTION_URL,
+)
+
+# (id, score, title, url) of one hit, in the order returned by its leg;
+# ids are str in both legs (Pinecone ids are str, Postgres ids int), so a
+# question found by both legs is merged; url is None for keyword hits and
+# is built only for returned results
+Entry = Tuple[Any, float, str, Optional[str]]
+
+
+def semantic_entries(results: Sequence[Dict[str, Any]]) -> List[Entry]:
+    """Converts Pinecone hits (`_id`, `_score`, `fields`) into fusion entries."""
+
+    return [
+        (str(row["_id"]), row["_score"], row["fields"]["title"], row["fields"]["url"])
+        for row in results
+    ]
+
+
+def keyword_entries(results: Sequence[Dict[str, Any]]) -> List[Entry]:
+    """Converts keyword search rows (`id`, `score`, `title`) into fusion entries."""
+
+    return [(str(row["id"]), row["score"], row["title"], None) for row in results]
+
+
+def identity(scores: List[float]) -> List[float]:
+    return scores
+
+
+def minmax(scores: List[float]) -> List[float]:
+    """Scales scores to [0, 1]. All-equal scores become 1."""
+
+    if not scores:
+        return scores
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [1.0] * len(scores)
+    span = high - low
+    return [(score - low) / span for score in scores]
+
+
+def zscore(scores: List[float]) -> List[float]:
+    """Standardises scores to zero mean and unit variance. All-equal scores become 0."""
+
+    if not scores:
+        return scores
+    mean = sum(scores) / len(scores)
+    std = math.sqrt(sum((score - mean) ** 2 for score in scores) / len(scores))
+    if std == 0:
+        return [0.0] * len(scores)
+    return [(score - mean) / std for score in scores]
+
+
+NORMALISERS: Dict[str, Callable[[List[float]], List[float]]] = {
+    "none": identity,
+    "minmax": minmax,
+    "zscore": zscore,
+}
+
+
+def _weighted(entries: List[Entry], weight: float, normalise: str) -> List[float]:
+    scores = NORMALISERS[normalise]([entry[1] for entry in entries])
+    return [weight * score for score in scores]
+
+
+def _rrf(entries: List[Entry], weight: float, k: int) -> List[float]:
+    return [weight / (k + rank) for rank in range(1, len(entries) + 1)]
+
+
+def fuse(
+    semantic: List[Entry],
+    keyword: List[Entry],
+    weight_semantic: float = 0.7,
+    weight_keyword: float = 0.3,
+    method: str = FUSION_METHOD,
+    normalise: str = FUSION_NORMALISE,
+    rrf_k: int = FUSION_RRF_K,
+    top_k: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fuses the ranked lists of both search legs into one ranking.
+
+    Methods:
+        - `rrf`: reciprocal rank fusion, `sum(weight / (rrf_k + rank))`. Uses
+          ranks only, so the score scales of the legs don't matter.
+        - `weighted`: weighted sum of scores, normalised per leg with
+          `normalise` (`none`, `minmax` or `zscore`).
+
+    Args:
+        semantic (List[Entry]): Entries of the semantic leg, best first.
+        keyword (List[Entry]): Entries of the keyword leg, best first.
+        weight_semantic (float): Weight of the semantic leg.
+        weight_keyword (float): Weight of the keyword leg.
+        method (str): `rrf` or `weighted`.
+        normalise (str): Score normalisation of the `weighted` method.
+        rrf_k (int): Rank offset of the `rrf` method.
+        top_k (Optional[int]): Number of results. If None, all fused results.
+
+    Returns:
+        List[Dict[str, Any]]: Results with `question_id`, `score`, `title`, `url`,
+            best first.
+
+    Raises:
+        ValueError: If `method` or `normalise` is unknown.
+    """
+
+    if method == "rrf":
+        contribution = lambda entries, weight: _rrf(entries, weight, rrf_k)
+    elif method == "weighted":
+        if normalise not in NORMALISERS:
+            raise ValueError(f"Unknown normalisation `{normalise}`")
+        contribution = lambda entries, weight: _weighted(entries, weight, normalise)
+    else:
+        raise ValueError(f"Unknown fusion method `{method}`")
+
+    # one pass per leg; title and url of the semantic leg win, as before
+    fused: Dict[Any, float] = {}
+    details: Dict[Any, Entry] = {}
+    for entries, weight in ((semantic, weight_semantic), (keyword, weight_keyword)):
+        for entry, score in zip(entries, contribution(entries, weight)):
+            question_id = entry[0]
+            if question_id in fused:
+                fused[question_id] += score
+            else:
+                fused[question_id] = score
+                details[question_id] = entry
+
+    if top_k is None:
+        best = sorted(fused.items(), key=itemgetter(1), reverse=True)
+    else:
+        best = heapq.nlargest(top_k, fused.items(), key=itemgetter(1))
+
+    results = []
+    for question_id, score in best:
+        _, _, title, url = details[question_id]
+        results.append({
+            "question_id": question_id,
+            "score": score,
+            "title": title,
+            "url": url if url is not None else QUESTION_URL.format(question_id),
+        })
+    return results
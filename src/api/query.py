@@ -1,15 +1,48 @@
+import asyncio
 import os
-from typing import Dict, List
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
 
 from psycopg2.extras import RealDictCursor
 
-from src.utils.config import QUESTION_URL
-from src.utils.helper import get_db_connection
+from src.utils.config import (
+    FUSION_METHOD,
+    FUSION_NORMALISE,
+    FUSION_OVERFETCH,
+    FUSION_RRF_K,
+    KEYWORD_SEARCH_APPROXIMATE,
+    KEYWORD_SEARCH_CANDIDATES,
+    QUESTION_URL,
+    SEARCH_BATCH_CONCURRENCY,
+    SEARCH_KEYWORD_TIMEOUT,
+    SEARCH_MAX_DEPTH,
+    SEARCH_PAGES_AHEAD,
+    SEARCH_RANKING_TTL,
+    SEARCH_SEMANTIC_TIMEOUT,
+    VECTOR_BACKEND,
+)
+from src.api.cache import SearchCache, decode_cursor, encode_cursor, make_cache_key
+from src.api.fulltext import (
+    BATCH_KEYWORD_SQL,
+    execute_prepared,
+    group_by_ord,
+    keyword_args,
+    keyword_sql,
+    statement_name,
+    to_results,
+)
+from src.api.fusion import fuse, keyword_entries, semantic_entries
+from src.utils.db_pool import pooled_connection
+from src.utils.helper import get_param_from_env
 from src.utils.logger import setup_logger
-from src.utils.work_pinecone import PineconeClient
+from src.utils.vector_index import get_local_index
+from src.utils.work_pg import to_vector_literal
+from src.utils.work_pinecone import get_pinecone_client
 
 logger = setup_logger(level=10)
 
+# results of one page and the cursor of the next page (None on the last page)
+SearchPage = Tuple[List[Dict[str, Any]], Optional[str]]
+
 # db_params = {
 #     "dbname": os.getenv("POSTGRES_DB"),
 #     "user": os.getenv("POSTGRES_USER"),
@@ -19,73 +52,142 @@ logger = setup_logger(level=10)
 # }
 
 
-def keyword_search(query: str, top_k: int = 10) -> List[Dict[str, float]]:
+def keyword_search(
+        query: str,
+        top_k: int = 10,
+        approximate: bool = KEYWORD_SEARCH_APPROXIMATE,
+        headline: bool = False,
+        candidates: int = KEYWORD_SEARCH_CANDIDATES,
+) -> List[Dict[str, float]]:
     """
     Perform a keyword-based full-text search on the 'questions' table in PostgreSQL.
 
+    Questions are ranked over their search document `search_tsv`: title,
+    keywords and short answer, weighted A, B and C, so a title match counts
+    the most. The statement is prepared once per pooled connection, see
+    `src/api/fulltext.py`.
+
     Args:
         query (str): The search query string.
         top_k (int, optional): The maximum number of results to return. Defaults to 10.
+        approximate (bool): Rank only the first `candidates` matches of the GIN index.
+        headline (bool): Add a `headline` snippet to every returned result.
+        candidates (int): Number of ranked matches in approximate mode.
 
     Returns:
         List[Dict[str, float]]: A list of dictionaries, each containing:
             - 'id' (int or str): The unique identifier of the question.
             - 'score' (float): The relevance rank score computed by ts_rank_cd.
             - 'title' (str): The title of the question.
+            - 'headline' (str): Snippet with the matched words, if `headline` is set.
     
     Raises:
         ConnectionError: If the database connection could not be established.
         Exception: For any other errors during query execution.
     """
-    
-    sql_query = """
-        SELECT 
-            id, title,
-            ts_rank_cd(tsv, plainto_tsquery('russian', %s)) AS rank
-        FROM questions
-        WHERE tsv @@ plainto_tsquery('russian', %s)
-        ORDER BY rank DESC
-        LIMIT %s
-    """
 
-    conn = None
+    types = ['text', 'int', 'int'] if approximate else ['text', 'int']
     try:
-        conn = get_db_connection()
-        if conn is None:
-            raise ConnectionError("Failed to establish database connection")
+        with pooled_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                execute_prepared(
+                    cur,
+                    statement_name(approximate, headline),
+                    keyword_sql(approximate, headline),
+                    types,
+                    keyword_args(query, top_k, approximate, candidates),
+                )
+                results = cur.fetchall()
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise
+    logger.debug(f"Keyword search done.")
+
+    return to_results(results, headline)
+
+
+async def async_keyword_search(
+        pool,
+        query: str,
+        top_k: int = 10,
+        approximate: bool = KEYWORD_SEARCH_APPROXIMATE,
+        headline: bool = False,
+        candidates: int = KEYWORD_SEARCH_CANDIDATES,
+) -> List[Dict[str, float]]:
+    """
+    Async version of `keyword_search`, runs the query on an asyncpg pool.
+
+    asyncpg prepares statements itself and caches them per connection, so the
+    SQL is planned once per connection here as well.
+
+    Args:
+        pool (asyncpg.Pool): Pool created by `create_async_pool()`.
+        query (str): The search query string.
+        top_k (int, optional): The maximum number of results to return. Defaults to 10.
+        approximate (bool): Rank only the first `candidates` matches of the GIN index.
+        headline (bool): Add a `headline` snippet to every returned result.
+        candidates (int): Number of ranked matches in approximate mode.
+
+    Returns:
+        List[Dict[str, float]]: Same rows as `keyword_search`.
+    """
 
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(sql_query, (query, query, top_k))
-            results = cur.fetchall()
+    try:
+        rows = await pool.fetch(
+            keyword_sql(approximate, headline),
+            *keyword_args(query, top_k, approximate, candidates),
+        )
     except Exception as e:
         logger.error(f"Error: {e}")
         raise
-    finally:
-        conn.close()
     logger.debug(f"Keyword search done.")
 
-    return [{"id": row["id"], "score": row["rank"], "title": row["title"]} for row in results]
+    return to_results(rows, headline)
+
+
+def get_vector_backend() -> str:
+    """Returns the semantic search backend: `pinecone`, `local` or `pgvector`."""
+
+    return (get_param_from_env("VECTOR_BACKEND") or VECTOR_BACKEND).lower()
 
 
 def semantic_search(
         text_query: str,
         top_k: int = 10, 
-        rerank: bool = False
+        rerank: bool = False,
+        raise_errors: bool = False,
 ) -> List[Dict[str, float]]:
     """
     Perform a semantic search query using Pinecone dense index.
 
+    If `VECTOR_BACKEND` (env or config) is `local`, the offline index from
+    `src/utils/vector_index.py` is queried instead. It returns hits of the
+    same shape, reranking isn't supported there.
+
     Args:
         text_query (str): The input text query for semantic search.
         top_k (int, optional): Number of top results to return. Defaults to 10.
         rerank (bool, optional): Whether to apply reranking using a specified model. Defaults to False.
+        raise_errors (bool, optional): Re-raise a failed search instead of returning an empty list,
+            so callers can tell "no hits" from "no answer". Defaults to False.
 
     Returns:
-        List[Dict[str, float]]: The search results returned by Pinecone, or None if the search fails.
+        List[Dict[str, float]]: The search results returned by Pinecone, or [] if the search fails.
             The structure depends on Pinecone client's `search_records` method.
     """
 
-    pc = PineconeClient()
+    if get_vector_backend() == "local":
+        try:
+            hits = get_local_index().search_text(text_query, top_k)
+            logger.debug(f"Semantic search done.")
+            return hits
+        except Exception as e:
+            logger.error(f"Semantic search failed: {e}")
+            if raise_errors:
+                raise
+            return []
+
+    pc = get_pinecone_client()
 
     try:
         response = pc.dense_index.search_records(
@@ -106,21 +208,588 @@ def semantic_search(
         return response.result.hits
     except Exception as e:
         logger.error(f"Semantic search failed: {e}")
+        if raise_errors:
+            raise
+
+        return []
+
+
+async def async_semantic_search(
+        text_query: str,
+        top_k: int = 10,
+        rerank: bool = False,
+        raise_errors: bool = False,
+) -> List[Dict[str, float]]:
+    """
+    Runs the blocking `semantic_search` in a worker thread, so the event loop
+    keeps serving other requests while Pinecone answers.
+    """
+
+    return await asyncio.to_thread(semantic_search, text_query, top_k, rerank, raise_errors)
+
+
+def embed_query(text_query: str) -> List[float]:
+    """Embeds the query with the model of `questions.embedding` (pgvector backend)."""
+
+    from src.utils.work_embedding import get_sentence_embeddings
+
+    return get_sentence_embeddings([text_query])[0].tolist()
+
+
+async def pgvector_search(
+        pool,
+        query: str,
+        top_k: int = 10,
+        weight_semantic: float = 0.7,
+        weight_keyword: float = 0.3,
+        rrf_k: int = FUSION_RRF_K,
+        query_vector: Optional[List[float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Hybrid search answered by PostgreSQL alone, in one statement.
+
+    Full-text rank and cosine distance of `questions.embedding` (HNSW index)
+    are computed in two CTEs and fused server-side with weighted reciprocal
+    rank fusion, like `fuse(..., method="rrf")`.
+
+    Args:
+        pool (asyncpg.Pool): Pool created by `create_async_pool()`.
+        query (str): The search query string.
+        top_k (int, optional): Number of results to return. Defaults to 10. Each
+            leg fetches `top_k * FUSION_OVERFETCH` candidates.
+        weight_semantic (float): Weight of the vector leg.
+        weight_keyword (float): Weight of the full-text leg.
+        rrf_k (int): Rank offset of the fusion.
+        query_vector (Optional[List[float]]): Query embedding. If None, the query
+            is embedded by `embed_query` in a worker thread.
+
+    Returns:
+        List[Dict[str, Any]]: Results like `combine_results`.
+    """
+
+    if query_vector is None:
+        query_vector = await asyncio.to_thread(embed_query, query)
+
+    sql_query = """
+        WITH keyword AS (
+            SELECT id, row_number() OVER (ORDER BY ts_rank_cd(search_tsv, ts_query) DESC) AS rank
+            FROM questions, plainto_tsquery('russian', $1) AS ts_query
+            WHERE search_tsv @@ ts_query
+            ORDER BY rank
+            LIMIT $3
+        ),
+        semantic AS (
+            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+            FROM (
+                SELECT id, embedding <=> $2::text::vector AS distance
+                FROM questions
+                WHERE embedding IS NOT NULL
+                ORDER BY distance
+                LIMIT $3
+            ) AS nearest
+        )
+        SELECT
+            q.id, q.title,
+            coalesce($4::float8 / ($6::int + semantic.rank), 0)
+                + coalesce($5::float8 / ($6::int + keyword.rank), 0) AS score
+        FROM semantic
+        FULL JOIN keyword ON keyword.id = semantic.id
+        JOIN questions AS q ON q.id = coalesce(semantic.id, keyword.id)
+        ORDER BY score DESC, coalesce(semantic.rank, $3), q.id
+        LIMIT $7
+    """
+
+    try:
+        rows = await pool.fetch(
+            sql_query,
+            query,
+            to_vector_literal(query_vector),
+            top_k * FUSION_OVERFETCH,
+            weight_semantic,
+            weight_keyword,
+            rrf_k,
+            top_k,
+        )
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise
+    logger.debug(f"Hybrid search in PostgreSQL done.")
+
+    return [
+        {
+            "question_id": str(row["id"]),
+            "score": row["score"],
+            "title": row["title"],
+            "url": QUESTION_URL.format(row["id"]),
+        }
+        for row in rows
+    ]
+
+
+async def _with_timeout(
+        leg: Awaitable[List],
+        timeout: float,
+        name: str,
+        degrade_on_error: bool = False,
+) -> Tuple[List, bool]:
+    """
+    Awaits a search leg and reports whether it answered.
+
+    Returns `(results, True)`, or `([], False)` if the leg timed out (or failed,
+    with `degrade_on_error`). Incomplete rankings must not be cached.
+    """
+
+    try:
+        return await asyncio.wait_for(leg, timeout), True
+    except asyncio.TimeoutError:
+        logger.warning(f"{name} search timed out after {timeout}s, its results are skipped.")
+        return [], False
+    except Exception as e:
+        if not degrade_on_error:
+            raise
+        logger.warning(f"{name} search failed, its results are skipped: {e}")
+        return [], False
+
+
+def _semantic_leg(query: str, leg_k: int, timeout: float) -> Awaitable[Tuple[List, bool]]:
+    return _with_timeout(
+        async_semantic_search(query, leg_k, raise_errors=True), timeout, "Semantic", degrade_on_error=True,
+    )
+
+
+def _keyword_leg(pool, query: str, leg_k: int, timeout: float) -> Awaitable[Tuple[List, bool]]:
+    return _with_timeout(async_keyword_search(pool, query, leg_k), timeout, "Keyword")
+
+
+async def hybrid_search(
+        pool,
+        query: str,
+        top_k: int = 10,
+        weight_semantic: float = 0.7,
+        weight_keyword: float = 0.3,
+        keyword_timeout: float = SEARCH_KEYWORD_TIMEOUT,
+        semantic_timeout: float = SEARCH_SEMANTIC_TIMEOUT,
+) -> List[Dict[str, float]]:
+    """
+    Runs keyword and semantic search concurrently and combines the results.
+
+    The latency is that of the slower leg instead of the sum of both. A leg
+    which exceeds its timeout contributes no results, so a slow Pinecone call
+    degrades the ranking instead of failing the request. With the `pgvector`
+    backend both legs run in one statement instead, see `pgvector_search`.
+
+    Args:
+        pool (asyncpg.Pool): Pool created by `create_async_pool()`.
+        query (str): The search query string.
+        top_k (int, optional): Number of results to return. Defaults to 10. Each
+            leg fetches `top_k * FUSION_OVERFETCH` candidates for better recall.
+        weight_semantic (float): Weight of semantic scores, see `combine_results`.
+        weight_keyword (float): Weight of keyword scores, see `combine_results`.
+        keyword_timeout (float): Seconds to wait for the keyword leg.
+        semantic_timeout (float): Seconds to wait for the semantic leg.
+
+    Returns:
+        List[Dict[str, Any]]: Results of `combine_results`.
 
+    Raises:
+        Exception: If the keyword query fails for another reason than a timeout.
+    """
+
+    results, _ = await _hybrid_search(
+        pool, query, top_k, weight_semantic, weight_keyword, keyword_timeout, semantic_timeout,
+    )
+    return results
+
+
+async def _hybrid_search(
+        pool,
+        query: str,
+        top_k: int,
+        weight_semantic: float,
+        weight_keyword: float,
+        keyword_timeout: float = SEARCH_KEYWORD_TIMEOUT,
+        semantic_timeout: float = SEARCH_SEMANTIC_TIMEOUT,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """`hybrid_search` which also reports whether both legs answered."""
+
+    if get_vector_backend() == "pgvector":
+        return await pgvector_search(pool, query, top_k, weight_semantic, weight_keyword), True
+
+    leg_k = top_k * FUSION_OVERFETCH
+    (semantic_results, semantic_ok), (keyword_results, keyword_ok) = await asyncio.gather(
+        _semantic_leg(query, leg_k, semantic_timeout),
+        _keyword_leg(pool, query, leg_k, keyword_timeout),
+    )
+    results = combine_results(
+        semantic_results, keyword_results, weight_semantic, weight_keyword, top_k=top_k,
+    )
+    return results, semantic_ok and keyword_ok
+
+
+async def cached_search(
+        pool,
+        cache: Optional[SearchCache],
+        query: str,
+        top_k: int = 10,
+        weight_semantic: float = 0.7,
+        weight_keyword: float = 0.3,
+) -> List[Dict[str, Any]]:
+    """
+    Returns cached results of `hybrid_search`, computing them on a miss.
+
+    The key is built from the normalised query, `top_k`, the fusion settings, the
+    vector backend and the dataset version, so results are recomputed after every data load.
+
+    Args:
+        pool (asyncpg.Pool): Pool created by `create_async_pool()`.
+        cache (Optional[SearchCache]): Result cache. If None, nothing is cached.
+        query (str): The search query string.
+        top_k (int, optional): Number of results of each leg. Defaults to 10.
+        weight_semantic (float): Weight of semantic scores.
+        weight_keyword (float): Weight of keyword scores.
+
+    Returns:
+        List[Dict[str, Any]]: Results of `combine_results`.
+    """
+
+    if cache is None:
+        return await hybrid_search(pool, query, top_k, weight_semantic, weight_keyword)
+
+    fusion = _fusion_settings(weight_semantic, weight_keyword)
+    key = make_cache_key(query, top_k, fusion, await cache.version())
+    results = await cache.get(key)
+    if results is None:
+        results, complete = await _hybrid_search(pool, query, top_k, weight_semantic, weight_keyword)
+        # a ranking without a timed out or failed leg is served, but not cached
+        if complete:
+            await cache.set(key, results)
+    return results
+
+
+def _fusion_settings(weight_semantic: float, weight_keyword: float) -> Tuple:
+    return (
+        weight_semantic, weight_keyword, FUSION_METHOD, FUSION_NORMALISE, FUSION_OVERFETCH,
+        get_vector_backend(),
+    )
+
+
+def _ranking_depth(offset: int, page_size: int) -> int:
+    """
+    Depth of the ranking a later page is sliced from.
+
+    Rankings are computed `SEARCH_PAGES_AHEAD` pages at a time, so consecutive
+    pages share one cached ranking, and only paging past it computes a deeper one.
+    """
+
+    window = page_size * SEARCH_PAGES_AHEAD
+    return min((offset // window + 1) * window, SEARCH_MAX_DEPTH)
+
+
+def _next_cursor(version: str, next_offset: int, available: int, depth: int) -> Optional[str]:
+    # a ranking cut at its depth may continue in a deeper one
+    if next_offset < available or (available >= depth and depth < SEARCH_MAX_DEPTH):
+        return encode_cursor(version, next_offset)
+    return None
+
+
+async def paginated_search(
+        pool,
+        cache: Optional[SearchCache],
+        query: str,
+        page_size: int = 10,
+        cursor: Optional[str] = None,
+        weight_semantic: float = 0.7,
+        weight_keyword: float = 0.3,
+) -> SearchPage:
+    """
+    Returns one page of the hybrid search ranking and the cursor of the next page.
+
+    The first page is `cached_search` with `top_k=page_size`, so a request
+    without a cursor costs what it did before pagination. Later pages are
+    sliced from a deeper ranking (see `_ranking_depth`), cached for
+    `SEARCH_RANKING_TTL` seconds. The cursor holds the dataset version, so all
+    later pages come from the same ranking while it is cached. As deeper legs
+    may reorder results slightly, a hit at the border of the first page can
+    move to the second one.
+
+    Args:
+        pool (asyncpg.Pool): Pool created by `create_async_pool()`.
+        cache (Optional[SearchCache]): Result cache. If None, every page computes the ranking.
+        query (str): The search query string, the same for all pages.
+        page_size (int): Number of results per page.
+        cursor (Optional[str]): Cursor returned with the previous page, None for the first one.
+        weight_semantic (float): Weight of semantic scores.
+        weight_keyword (float): Weight of keyword scores.
+
+    Returns:
+        SearchPage: Results of the page and the cursor of the next one (None on the last page).
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+
+    if cursor is None:
+        version = await cache.version() if cache is not None else "0"
+        results = await cached_search(pool, cache, query, page_size, weight_semantic, weight_keyword)
+        return results, _next_cursor(version, page_size, len(results), page_size)
+
+    version, offset = decode_cursor(cursor)
+    depth = _ranking_depth(offset, page_size)
+
+    ranking, key = None, None
+    if cache is not None:
+        key = make_cache_key(query, depth, _fusion_settings(weight_semantic, weight_keyword), version)
+        ranking = await cache.get(key)
+    if ranking is None:
+        ranking, complete = await _hybrid_search(pool, query, depth, weight_semantic, weight_keyword)
+        if cache is not None and complete:
+            await cache.set(key, ranking, ttl=SEARCH_RANKING_TTL)
+
+    next_offset = offset + page_size
+    return ranking[offset:next_offset], _next_cursor(version, next_offset, len(ranking), depth)
+
+
+async def stream_search(
+        pool,
+        cache: Optional[SearchCache],
+        query: str,
+        page_size: int = 10,
+        cursor: Optional[str] = None,
+        weight_semantic: float = 0.7,
+        weight_keyword: float = 0.3,
+        keyword_timeout: float = SEARCH_KEYWORD_TIMEOUT,
+        semantic_timeout: float = SEARCH_SEMANTIC_TIMEOUT,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming version of `paginated_search` for NDJSON responses.
+
+    The first page of an uncached query yields an event as soon as the faster
+    leg answers (`{"event": "keyword" | "semantic", "results": [...]}`), so the
+    client can render hits while the slower leg is still running. The last event
+    is always `{"event": "final", "results": [...], "next_cursor": ...}` with
+    the fused page. Cached results, later pages and the `pgvector` backend
+    yield the final event only.
+
+    Args:
+        Same as `paginated_search`, plus the leg timeouts of `hybrid_search`.
+
+    Yields:
+        Dict[str, Any]: Events, one per NDJSON line.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+
+    if cursor is not None or get_vector_backend() == "pgvector":
+        results, next_cursor = await paginated_search(
+            pool, cache, query, page_size, cursor, weight_semantic, weight_keyword,
+        )
+        yield {"event": "final", "results": results, "next_cursor": next_cursor}
+        return
+
+    # the first page shares its cache entry with `cached_search`
+    version = await cache.version() if cache is not None else "0"
+    key, results = None, None
+    if cache is not None:
+        key = make_cache_key(query, page_size, _fusion_settings(weight_semantic, weight_keyword), version)
+        results = await cache.get(key)
+
+    if results is None:
+        leg_k = page_size * FUSION_OVERFETCH
+        legs = {
+            asyncio.ensure_future(_semantic_leg(query, leg_k, semantic_timeout)): "semantic",
+            asyncio.ensure_future(_keyword_leg(pool, query, leg_k, keyword_timeout)): "keyword",
+        }
+        found: Dict[str, List] = {"semantic": [], "keyword": []}
+        complete = True
+        pending = set(legs)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    found[legs[task]], answered = task.result()
+                    complete = complete and answered
+                if pending and done:
+                    leg = legs[next(iter(done))]
+                    yield {
+                        "event": leg,
+                        "results": combine_results(
+                            found["semantic"], found["keyword"],
+                            weight_semantic, weight_keyword, top_k=page_size,
+                        ),
+                    }
+        finally:
+            for task in pending:
+                task.cancel()
+
+        results = combine_results(
+            found["semantic"], found["keyword"], weight_semantic, weight_keyword, top_k=page_size,
+        )
+        if cache is not None and complete:
+            await cache.set(key, results)
+
+    yield {
+        "event": "final",
+        "results": results,
+        "next_cursor": _next_cursor(version, page_size, len(results), page_size),
+    }
+
+
+async def batch_keyword_search(pool, queries: List[str], top_k: int = 10) -> List[List[Dict[str, float]]]:
+    """
+    Keyword search of many queries in one statement (`unnest` + `LATERAL`).
+
+    Args:
+        pool (asyncpg.Pool): Pool created by `create_async_pool()`.
+        queries (List[str]): Query strings.
+        top_k (int, optional): Number of results per query. Defaults to 10.
+
+    Returns:
+        List[List[Dict[str, float]]]: Rows like `keyword_search`, one list per query, in input order.
+    """
+
+    try:
+        rows = await pool.fetch(BATCH_KEYWORD_SQL, queries, top_k)
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise
+    logger.debug(f"Batch keyword search of {len(queries)} queries done.")
+
+    return [to_results(group, headline=False) for group in group_by_ord(rows, len(queries))]
+
+
+async def batch_semantic_search(pool, queries: List[str], top_k: int = 10) -> List[List[Dict[str, Any]]]:
+    """
+    Semantic search of many queries, hits like `semantic_search`, one list per query.
+
+    - `local`: all queries are embedded in one model call and scored by one
+      matrix product per chunk, see `LocalVectorIndex.search_many`.
+    - `pgvector`: all queries are embedded in one model call, the nearest
+      questions of every query are found in one statement (`unnest` + `LATERAL`).
+    - `pinecone`: the integrated index embeds one text per request, so the
+      requests share one client and run `SEARCH_BATCH_CONCURRENCY` at a time.
+
+    Args:
+        pool (asyncpg.Pool): Pool created by `create_async_pool()`.
+        queries (List[str]): Query strings.
+        top_k (int, optional): Number of hits per query. Defaults to 10.
+
+    Returns:
+        List[List[Dict[str, Any]]]: Hits of every query, in input order.
+    """
+
+    backend = get_vector_backend()
+
+    if backend == "local":
+        try:
+            return await asyncio.to_thread(get_local_index().search_text_many, queries, top_k)
+        except Exception as e:
+            logger.error(f"Semantic search failed: {e}")
+            return [[] for _ in queries]
+
+    if backend == "pgvector":
+        from src.utils.work_embedding import get_sentence_embeddings
+
+        vectors = await asyncio.to_thread(get_sentence_embeddings, queries)
+        sql_query = """
+            SELECT input.ord, nearest.id, nearest.title, 1 - nearest.distance AS score
+            FROM unnest($1::text[]) WITH ORDINALITY AS input (embedding, ord)
+            CROSS JOIN LATERAL (
+                SELECT q.id, q.title, q.embedding <=> input.embedding::vector AS distance
+                FROM questions AS q
+                WHERE q.embedding IS NOT NULL
+                ORDER BY distance
+                LIMIT $2
+            ) AS nearest
+            ORDER BY input.ord, nearest.distance
+        """
+        try:
+            rows = await pool.fetch(sql_query, [to_vector_literal(vector) for vector in vectors], top_k)
+        except Exception as e:
+            logger.error(f"Error: {e}")
+            raise
+        return [
+            [
+                {
+                    "_id": str(row["id"]),
+                    "_score": row["score"],
+                    "fields": {"title": row["title"], "url": QUESTION_URL.format(row["id"])},
+                }
+                for row in group
+            ]
+            for group in group_by_ord(rows, len(queries))
+        ]
+
+    semaphore = asyncio.Semaphore(SEARCH_BATCH_CONCURRENCY)
+
+    async def search_one(text_query: str) -> List[Dict[str, Any]]:
+        async with semaphore:
+            return await async_semantic_search(text_query, top_k)
+
+    return list(await asyncio.gather(*(search_one(text_query) for text_query in queries)))
+
+
+async def batch_search(
+        pool,
+        queries: List[str],
+        top_k: int = 10,
+        weight_semantic: float = 0.7,
+        weight_keyword: float = 0.3,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Hybrid search of many queries for bulk jobs.
+
+    Repeated queries are searched once. Both legs run concurrently, each as a
+    batch (`batch_keyword_search`, `batch_semantic_search`), and the results of
+    every query are fused by `combine_results`.
+
+    With the `pgvector` backend `/search` fuses in SQL (`pgvector_search`)
+    with weighted RRF over the same candidates. The rankings match while
+    `FUSION_METHOD` is `rrf`. With `weighted` the batch endpoint follows
+    `FUSION_METHOD`, while `/search` stays on RRF.
+
+    Args:
+        pool (asyncpg.Pool): Pool created by `create_async_pool()`.
+        queries (List[str]): Query strings.
+        top_k (int, optional): Number of results per query. Defaults to 10. Each
+            leg fetches `top_k * FUSION_OVERFETCH` candidates.
+        weight_semantic (float): Weight of semantic scores.
+        weight_keyword (float): Weight of keyword scores.
+
+    Returns:
+        List[List[Dict[str, Any]]]: Results of `combine_results`, one list per query, in input order.
+    """
+
+    unique = list(dict.fromkeys(queries))
+    if not unique:
         return []
 
+    leg_k = top_k * FUSION_OVERFETCH
+    semantic_results, keyword_results = await asyncio.gather(
+        batch_semantic_search(pool, unique, leg_k),
+        batch_keyword_search(pool, unique, leg_k),
+    )
+    fused = {
+        text_query: combine_results(semantic, keyword, weight_semantic, weight_keyword, top_k=top_k)
+        for text_query, semantic, keyword in zip(unique, semantic_results, keyword_results)
+    }
+    return [fused[text_query] for text_query in queries]
+
 
 def combine_results(
         semantic_results: List[Dict[str, float]], 
         keyword_results: List[Dict[str, float]], 
         weight_semantic: float = 0.7, 
-        weight_keyword: float = 0.3
+        weight_keyword: float = 0.3,
+        method: str = FUSION_METHOD,
+        normalise: str = FUSION_NORMALISE,
+        top_k: Optional[int] = None,
     ) -> List[Dict[str, float]]:
     """
     Combine semantic and keyword search results into a single ranked list.
 
     This function merges two lists of search results - one from semantic search and one from keyword search -
-    by matching document IDs and computing a weighted combined score.
+    by matching document IDs and fusing their ranks or scores (see `src/api/fusion.py`).
     It returns the results sorted by the combined score in descending order.
 
     Args:
@@ -134,55 +803,30 @@ def combine_results(
             - "title": document title (str)
         weight_semantic (float): Weight for semantic scores in the combined score. Defaults to 0.7.
         weight_keyword (float): Weight for keyword scores in the combined score. Defaults to 0.3.
+        method (str): `rrf` (reciprocal rank fusion) or `weighted` (weighted sum of scores).
+        normalise (str): Score normalisation of the `weighted` method: `none`, `minmax` or `zscore`.
+        top_k (Optional[int]): Number of results to return. If None, all combined results.
 
     Returns:
         List[Dict[str, Any]]: Sorted list of combined results, each containing:
             - "question_id": document ID
-            - "score": combined weighted score
+            - "score": combined score
             - "title": document title
             - "url": document URL
     """
 
-    combined = {}
-
-    for row in semantic_results:
-        logger.debug(f"semantic_results={row}")
-        combined[row["_id"]] = {
-            "semantic_score": row["_score"],
-            "keyword_score": 0.0,
-            "title": row["fields"]["title"],
-            "url": row["fields"]["url"],
-        }
-
-    for row in keyword_results:
-        logger.debug(f"keyword_results={row}")
-        if row["id"] in combined:
-            combined[row["id"]]["keyword_score"] = row["score"]
-        else:
-            combined[row["id"]] = {
-                "semantic_score": 0.0,
-                "keyword_score": row["score"],
-                "title": row["title"],
-                "url": QUESTION_URL.format(row["id"]),
-            }
-    final_results = []
-
-    for question_id, data in combined.items():
-        logger.debug(f"question_id={question_id}")
-        logger.debug(f"data={data}")
-        logger.debug(f"semantic_score={data["semantic_score"]}  keyword_score{data["keyword_score"]}")
-
-        final_score = weight_semantic * data["semantic_score"] + weight_keyword * data["keyword_score"]
-        final_results.append({
-            "question_id": question_id,
-            "score": final_score,
-            "title": data['title'],
-            "url": data['url'],
-        })
-    final_results.sort(key=lambda x: x["score"], reverse=True)
+    results = fuse(
+        semantic_entries(semantic_results),
+        keyword_entries(keyword_results),
+        weight_semantic=weight_semantic,
+        weight_keyword=weight_keyword,
+        method=method,
+        normalise=normalise,
+        top_k=top_k,
+    )
     logger.debug(f"Combined done.")
-    
-    return final_results
+
+    return results
 
 
 if __name__ == '__main__':
@@ -1,13 +1,45 @@
-from fastapi import FastAPI, Query, HTTPException
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator, List, Optional
+
+from fastapi import FastAPI, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from prometheus_fastapi_instrumentator import Instrumentator
+from pydantic import BaseModel, Field
+
+from src.api.cache import SearchCache, decode_cursor
+from src.api.query import batch_search, embed_query, get_vector_backend, paginated_search, stream_search
+from src.utils.config import SEARCH_BATCH_MAX_QUERIES
+from src.utils.logger import setup_logger
+from src.utils.db_pool import create_async_pool
+from src.utils.vector_index import get_local_index
+from src.utils.work_pinecone import get_pinecone_client
+
+logger = setup_logger(level=10)
 
-from src.api.query import (
-    semantic_search,
-    keyword_search,
-    combine_results,
-)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.pg_pool = await create_async_pool()
+    backend = get_vector_backend()
+    if backend == "local":
+        await asyncio.to_thread(get_local_index)
+    elif backend == "pgvector":
+        # loads the query embedding model before the first request
+        await asyncio.to_thread(embed_query, "warm up")
+    else:
+        app.state.pinecone = get_pinecone_client()
+        await asyncio.to_thread(app.state.pinecone.warm_up)
+    app.state.search_cache = SearchCache.from_env()
+    try:
+        yield
+    finally:
+        await app.state.search_cache.close()
+        await app.state.pg_pool.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 Instrumentator().instrument(app).expose(app)
 
@@ -17,8 +49,21 @@ async def root():
     return {"message": "Hello World"}
 
 
+async def ndjson_events(events: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """Serialises search events as NDJSON, a failure after the first line becomes an `error` event."""
+
+    try:
+        async for event in events:
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+    except Exception as e:
+        logger.error(f"Search stream failed: {e}")
+        yield json.dumps({"event": "error", "detail": f"Search failed: {str(e)}"}) + "\n"
+
+
 @app.get("/search")
 async def search(
+    request: Request,
+    response: Response,
     query: str = Query(
         ...,
         min_length=3,
@@ -32,26 +77,83 @@ async def search(
         le=100,
         description="Maximum number of results to return",
         example=10
-    )
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor of the next page, from the `X-Next-Cursor` header or the `final` event",
+    ),
+    stream: bool = Query(
+        False,
+        description="Stream NDJSON events, the first hits are sent before the slower search leg finishes",
+    ),
 ):
     """
     Perform combined semantic and keyword search with pagination
 
     - **query**: Search query (3-100 characters)
     - **top_k**: Results per page (1-100)
+    - **cursor**: Next page of the same query, pages are served from a cached ranking
+    - **stream**: Respond with `application/x-ndjson` events instead of one JSON list
     """
 
     if not query:
         return []
 
+    if cursor is not None:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    pool, search_cache = request.app.state.pg_pool, request.app.state.search_cache
+
+    if stream:
+        return StreamingResponse(
+            ndjson_events(stream_search(pool, search_cache, query, top_k, cursor)),
+            media_type="application/x-ndjson",
+        )
+
     try:
-        semantic_results = semantic_search(query, top_k)
-        keyword_results = keyword_search(query, top_k)
-        results = combine_results(semantic_results, keyword_results)
+        results, next_cursor = await paginated_search(pool, search_cache, query, top_k, cursor)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Search failed: {str(e)}"
+        )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return results
+
 
-        return results
+class BatchSearchRequest(BaseModel):
+    queries: List[Annotated[str, Field(min_length=3)]] = Field(
+        ...,
+        min_length=1,
+        max_length=SEARCH_BATCH_MAX_QUERIES,
+        description="Text queries, results are returned in the same order",
+    )
+    top_k: int = Field(10, ge=1, le=100, description="Maximum number of results per query")
+
+
+@app.post("/search/batch")
+async def search_batch(request: Request, body: BatchSearchRequest):
+    """
+    Perform combined semantic and keyword search of many queries at once
+
+    - **queries**: Search queries (1-500), e.g. incoming questions to deduplicate
+    - **top_k**: Results per query (1-100)
+
+    Both search legs run once for the whole batch, results are not cached.
+    """
+
+    try:
+        results = await batch_search(request.app.state.pg_pool, body.queries, body.top_k)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Search failed: {str(e)}"
         )
+    return [
+        {"query": query, "results": query_results}
+        for query, query_results in zip(body.queries, results)
+    ]
@@ -0,0 +1,499 @@
+import asyncio
+import json
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from src.utils.helper import (
+    content_hash,
+    load_json_manifest,
+    save_json_manifest,
+)
+from src.utils.logger import setup_logger
+from src.utils.work_json import append_corpus, corpus_exists, replace_corpus, reset_corpus
+from src.utils.config import (
+    API_CONCURRENCY,
+    API_ENDPOINT,
+    API_PAGE_SIZE,
+    API_PARAMS,
+    API_TIMEOUT,
+    CRAWL_MANIFEST_PATH,
+    DELTA_DIR,
+    FULL_CRAWL_INTERVAL,
+    JSON_DIR,
+)
+
+logger = setup_logger(level=10)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def get_total_pages(json_data: dict) -> Optional[int]:
+    """
+    Calculates the number of list pages from the API pagination metadata.
+
+    Args:
+        json_data (dict): Parsed response of the `public-questions` endpoint.
+
+    Returns:
+        Optional[int]: Number of pages, or None if `total`/`limit` are missing.
+    """
+
+    total = json_data.get("total")
+    limit = json_data.get("limit") or len(json_data.get("data") or [])
+
+    if total is None or not limit:
+        return None
+    return max(1, math.ceil(int(total) / int(limit)))
+
+
+def save_json_file(filename: str, json_data: dict) -> str:
+    """Saves JSON data in the same format as the crawled pages."""
+
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump(json_data, file, ensure_ascii=False, indent=2)
+    return filename
+
+
+def save_json_page(page_num: int, json_data: dict, json_dir: str = JSON_DIR) -> str:
+    """
+    Saves the API response of one list page as `page_N.json`.
+
+    Args:
+        page_num (int): Number of the list page.
+        json_data (dict): API response of the page.
+        json_dir (str): Folder to save the file into.
+
+    Returns:
+        str: Path to the saved file.
+    """
+
+    return save_json_file(os.path.join(json_dir, f"page_{page_num}.json"), json_data)
+
+
+def diff_page_items(
+    items: List[Dict[str, Any]],
+    known: Dict[str, Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Splits API items into new and changed ones against the crawl manifest.
+
+    Args:
+        items (List[Dict[str, Any]]): Items of the `data` list of one page.
+        known (Dict[str, Dict[str, Any]]): Manifest entries keyed by question id.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: New items and changed items.
+    """
+
+    new_items, changed_items = [], []
+    for item in items:
+        entry = known.get(str(item.get('id')))
+        if entry is None:
+            new_items.append(item)
+        elif entry['hash'] != content_hash(item):
+            changed_items.append(item)
+    return new_items, changed_items
+
+
+def manifest_entry(item: Dict[str, Any], filename: str) -> Dict[str, Any]:
+    """Builds the crawl manifest entry of one question."""
+
+    return {
+        'createdAt': item.get('createdAt'),
+        'hash': content_hash(item),
+        'file': filename,
+    }
+
+
+def save_delta(
+    items: List[Dict[str, Any]],
+    delta_dir: str = DELTA_DIR,
+    removed: Optional[List[str]] = None,
+) -> str:
+    """
+    Adds new, changed and removed questions of the run to the pending changes in `delta_dir`.
+
+    The crawl manifest is advanced right after the fetch, so the changes are
+    only fetched once. Pending changes are therefore kept until the loader
+    removes them with `clear_delta` after a successful load; a failed load is
+    retried with the changes of every run since the last successful one (the
+    latest version of a question wins).
+
+    Args:
+        items (List[Dict[str, Any]]): New and changed API items.
+        delta_dir (str): Folder read by the downstream loaders.
+        removed (Optional[List[str]]): Ids of questions which disappeared from the API.
+
+    Returns:
+        str: Path to the saved file.
+    """
+
+    os.makedirs(delta_dir, exist_ok=True)
+    path = os.path.join(delta_dir, "changes.json")
+    pending, pending_removed = {}, set()
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            delta = json.load(f)
+        pending = {str(item.get('id')): item for item in delta.get('data', [])}
+        pending_removed = set(delta.get('removed', []))
+        if pending or pending_removed:
+            logger.warning(
+                f"{len(pending)} changes and {len(pending_removed)} removals of previous runs "
+                f"are not loaded yet, kept in `{path}`."
+            )
+
+    for question_id in removed or []:
+        pending.pop(question_id, None)
+        pending_removed.add(question_id)
+    for item in items:
+        pending[str(item.get('id'))] = item
+        pending_removed.discard(str(item.get('id')))
+
+    save_json_manifest({'data': list(pending.values()), 'removed': sorted(pending_removed)}, path)
+    return path
+
+
+def load_removed_ids(delta_dir: str = DELTA_DIR) -> List[str]:
+    """Returns ids of removed questions pending in `delta_dir`."""
+
+    path = os.path.join(delta_dir, "changes.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('removed', [])
+
+
+def clear_delta(delta_dir: str = DELTA_DIR) -> None:
+    """Removes pending changes from `delta_dir`, call it only after they are loaded."""
+
+    for path in Path(delta_dir).glob('*.json'):
+        path.unlink()
+
+
+def needs_full_crawl(
+    manifest: Dict[str, Any],
+    first_page: Dict[str, Any],
+    interval: int = FULL_CRAWL_INTERVAL,
+) -> bool:
+    """
+    Decides whether an incremental run has to crawl every page instead.
+
+    Incremental runs only see new and changed questions, so deleted questions
+    stay in `json_dir` (and Pinecone) until a full crawl rewrites it. A full
+    crawl is done when the API reports fewer questions than the manifest knows
+    or when the last full crawl is older than `interval` seconds.
+
+    Args:
+        manifest (Dict[str, Any]): Crawl manifest of the previous run.
+        first_page (Dict[str, Any]): First page of the current run.
+        interval (int): Maximum age of the last full crawl, in seconds.
+
+    Returns:
+        bool: True if the run has to be a full crawl.
+    """
+
+    known = len(manifest.get('questions', {}))
+    total = first_page.get('total')
+    if total is not None and int(total) < known:
+        logger.info(f"API reports {total} questions, {known} known: some were deleted.")
+        return True
+
+    full_crawl_at = manifest.get('full_crawl_at')
+    if full_crawl_at is None or datetime.now().timestamp() - full_crawl_at > interval:
+        logger.info("Last full crawl is too old.")
+        return True
+    return False
+
+
+async def fetch_page(
+    client: httpx.AsyncClient,
+    page_num: int,
+    page_size: int = API_PAGE_SIZE,
+    endpoint: str = API_ENDPOINT,
+) -> Dict[str, Any]:
+    """
+    Requests one page of the `public-questions` endpoint.
+
+    Args:
+        client (httpx.AsyncClient): Shared client holding the connection pool.
+        page_num (int): Number of the page to request.
+        page_size (int): Number of questions per page.
+        endpoint (str): URL of the `public-questions` endpoint.
+
+    Returns:
+        Dict[str, Any]: Parsed JSON response.
+
+    Raises:
+        httpx.HTTPError: If the request fails or returns a non-2xx status.
+    """
+
+    params = {**API_PARAMS, "page": page_num, "limit": page_size}
+    response = await client.get(endpoint, params=params)
+    response.raise_for_status()
+    logger.debug(f"Fetched page {page_num} ({response.http_version}).")
+    return response.json()
+
+
+async def _fetch_full(
+    client: httpx.AsyncClient,
+    first_page: Dict[str, Any],
+    total_pages: int,
+    concurrency: int,
+    page_size: int,
+    endpoint: str,
+    json_dir: str,
+    manifest: Dict[str, Any],
+    corpus_path: Optional[str] = None,
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Fetches every page concurrently and rebuilds the crawl manifest (and corpus).
+
+    The corpus is written into `<corpus_path>.tmp` and replaces the old one only
+    after every page was fetched, so a failed crawl keeps the previous corpus.
+    """
+
+    known = manifest.get('questions', {})
+    questions, pages, changes = {}, {}, {}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    build_path = f"{corpus_path}.tmp" if corpus_path else None
+    if build_path:
+        reset_corpus(build_path)
+
+    def save_and_diff(page_num: int, page_data: Dict[str, Any]) -> str:
+        filename = save_json_page(page_num, page_data, json_dir)
+        items = page_data.get('data') or []
+        if build_path:
+            append_corpus(items, build_path, label=f"page_{page_num}")
+        new_items, changed_items = diff_page_items(items, known)
+        changes[page_num] = new_items + changed_items
+        pages[str(page_num)] = content_hash(items)
+        for item in items:
+            questions[str(item.get('id'))] = manifest_entry(item, filename)
+        return filename
+
+    async def fetch_and_save(page_num: int) -> str:
+        async with semaphore:
+            page_data = await fetch_page(client, page_num, page_size, endpoint)
+        return save_and_diff(page_num, page_data)
+
+    files = [save_and_diff(1, first_page)]
+    files += await asyncio.gather(
+        *(fetch_and_save(page_num) for page_num in range(2, total_pages + 1))
+    )
+    if build_path:
+        replace_corpus(build_path, corpus_path)
+
+    written = {Path(f).resolve() for f in files}
+    for path in Path(json_dir).glob('*.json'):
+        if path.resolve() not in written:
+            logger.debug(f"Remove stale file {path}")
+            path.unlink()
+
+    manifest.update({
+        'page_size': page_size,
+        'pages': pages,
+        'questions': questions,
+        'full_crawl_at': datetime.now().timestamp(),
+    })
+    return files, [item for page_num in sorted(changes) for item in changes[page_num]]
+
+
+async def _fetch_incremental(
+    client: httpx.AsyncClient,
+    first_page: Dict[str, Any],
+    total_pages: int,
+    page_size: int,
+    endpoint: str,
+    json_dir: str,
+    manifest: Dict[str, Any],
+    corpus_path: Optional[str] = None,
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Fetches pages one by one until a page without new or changed questions.
+
+    New questions are saved into a new `incremental_<timestamp>.json` file,
+    changed questions are updated in the files they were saved into before.
+    Both are appended to the consolidated corpus as one member.
+    """
+
+    known = manifest['questions']
+    pages = manifest.setdefault('pages', {})
+    same_page_size = manifest.get('page_size') == page_size
+    new_items, changed_items = [], []
+
+    page_num, page_data = 1, first_page
+    while True:
+        items = page_data.get('data') or []
+        digest = content_hash(items)
+
+        if same_page_size and pages.get(str(page_num)) == digest:
+            logger.debug(f"Page {page_num} is unchanged, stop paginating.")
+            break
+
+        page_new, page_changed = diff_page_items(items, known)
+        pages[str(page_num)] = digest
+        if not page_new and not page_changed:
+            logger.debug(f"Page {page_num} is already known, stop paginating.")
+            break
+
+        new_items += page_new
+        changed_items += page_changed
+
+        page_num += 1
+        if page_num > total_pages:
+            break
+        page_data = await fetch_page(client, page_num, page_size, endpoint)
+
+    # a question may be seen twice if the list shifted between requests
+    new_items = list({str(item.get('id')): item for item in new_items}.values())
+    manifest['page_size'] = page_size
+    files = []
+
+    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    if corpus_path and (new_items or changed_items):
+        append_corpus(new_items + changed_items, corpus_path, label=f"incremental_{timestamp}")
+
+    if new_items:
+        filename = save_json_file(
+            os.path.join(json_dir, f"incremental_{timestamp}.json"),
+            {'data': new_items},
+        )
+        for item in new_items:
+            known[str(item.get('id'))] = manifest_entry(item, filename)
+        files.append(filename)
+
+    by_file = {}
+    for item in changed_items:
+        by_file.setdefault(known[str(item.get('id'))]['file'], {})[item.get('id')] = item
+
+    for filename, updates in by_file.items():
+        with open(filename, 'r', encoding='utf-8') as f:
+            file_data = json.load(f)
+        file_data['data'] = [updates.get(item.get('id'), item) for item in file_data['data']]
+        save_json_file(filename, file_data)
+        for item in updates.values():
+            known[str(item.get('id'))] = manifest_entry(item, filename)
+        files.append(filename)
+
+    logger.info(
+        f"Incremental fetch stopped at page {page_num}: "
+        f"{len(new_items)} new, {len(changed_items)} changed questions."
+    )
+    return files, new_items + changed_items
+
+
+async def fetch_yeahub_api(
+    concurrency: int = API_CONCURRENCY,
+    page_size: int = API_PAGE_SIZE,
+    endpoint: str = API_ENDPOINT,
+    json_dir: str = JSON_DIR,
+    incremental: bool = False,
+    manifest_path: str = CRAWL_MANIFEST_PATH,
+    delta_dir: str = DELTA_DIR,
+    corpus_path: Optional[str] = None,
+) -> List[str]:
+    """
+    Downloads pages of the `public-questions` endpoint without a browser.
+
+    The first page gives the pagination metadata. In full mode the remaining
+    pages are requested concurrently over one keep-alive connection pool
+    (HTTP/2 when the `h2` package is installed) and stale files are removed
+    from `json_dir`. In incremental mode pages are requested one by one and
+    pagination stops at the first page which is already fully known from the
+    crawl manifest. An incremental run falls back to a full crawl when deleted
+    questions have to be picked up (see `needs_full_crawl`).
+
+    In both modes new and changed questions of the run (and, after a full
+    crawl, ids of removed ones) are saved into `delta_dir` for the downstream
+    loaders. With `corpus_path` all questions are also written into one
+    consolidated, append-only `.jsonl.gz` corpus (see `work_json.iter_corpus_items`).
+
+    Args:
+        concurrency (int): Maximum number of requests in flight.
+        page_size (int): Number of questions per page.
+        endpoint (str): URL of the `public-questions` endpoint.
+        json_dir (str): Folder to save `page_N.json` files into.
+        incremental (bool): Stop at known pages instead of a full crawl.
+        manifest_path (str): Path to the crawl manifest (ids, `createdAt`, hashes).
+        delta_dir (str): Folder to save new and changed questions into.
+        corpus_path (Optional[str]): Path to the consolidated corpus to emit.
+
+    Returns:
+        List[str]: Paths to the saved or updated files in `json_dir`.
+
+    Raises:
+        ValueError: If the pagination metadata is missing in the API response.
+        httpx.HTTPError: If any page could not be fetched.
+    """
+
+    os.makedirs(json_dir, exist_ok=True)
+    manifest = load_json_manifest(manifest_path)
+    known_ids = set(manifest.get('questions', {}))
+    limits = httpx.Limits(
+        max_connections=concurrency,
+        max_keepalive_connections=concurrency,
+    )
+
+    async with httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=limits,
+        timeout=API_TIMEOUT,
+    ) as client:
+        json_data = await fetch_page(client, 1, page_size, endpoint)
+        total_pages = get_total_pages(json_data)
+
+        if total_pages is None:
+            raise ValueError("Pagination metadata (`total`, `limit`) not found in API response.")
+        logger.debug(f"Total pages: {total_pages}")
+
+        has_corpus = corpus_path is None or corpus_exists(corpus_path)
+        if (
+            incremental and manifest.get('questions') and has_corpus
+            and not needs_full_crawl(manifest, json_data)
+        ):
+            files, changes = await _fetch_incremental(
+                client, json_data, total_pages, page_size, endpoint, json_dir, manifest,
+                corpus_path,
+            )
+        else:
+            files, changes = await _fetch_full(
+                client, json_data, total_pages, concurrency, page_size, endpoint, json_dir, manifest,
+                corpus_path,
+            )
+
+    # only a full crawl rebuilds the manifest, so only it can drop questions
+    removed = sorted(known_ids - set(manifest.get('questions', {})))
+    save_delta(changes, delta_dir, removed=removed)
+    save_json_manifest(manifest, manifest_path)
+
+    logger.info(f"Fetching finished, {len(files)} files saved into `{json_dir}`.")
+    return files
+
+
+def run_fetch_yeahub_api(
+    concurrency: int = API_CONCURRENCY,
+    page_size: int = API_PAGE_SIZE,
+    incremental: bool = False,
+    corpus_path: Optional[str] = None,
+) -> List[str]:
+    """Runs `fetch_yeahub_api` from synchronous code (e.g. Airflow task)."""
+
+    return asyncio.run(fetch_yeahub_api(
+        concurrency=concurrency,
+        page_size=page_size,
+        incremental=incremental,
+        corpus_path=corpus_path,
+    ))
+
+
+if __name__ == "__main__":
+    run_fetch_yeahub_api()
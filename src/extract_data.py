@@ -1,131 +1,299 @@
 import asyncio
-import json
 import os
+from typing import Dict, List, Optional
 
-from playwright.async_api import async_playwright
-from playwright.sync_api import sync_playwright
+from playwright.async_api import (
+    Browser,
+    Page,
+    Playwright as AsyncPlaywright,
+    Route as AsyncRoute,
+    async_playwright,
+)
+from playwright.sync_api import (
+    Browser as SyncBrowser,
+    Playwright,
+    Route,
+    sync_playwright,
+)
 
+from src.extract_api import get_total_pages, save_json_page
+from src.utils.helper import get_param_from_env
 from src.utils.logger import setup_logger
 from src.utils.config import (
     API_URL,
+    BLOCKED_RESOURCE_TYPES,
+    BLOCKED_URL_PATTERNS,
+    CARD_SELECTOR,
+    CRAWL_CONCURRENCY,
     START_URL_TEMPLATE,
     RAW_DIR,
     JSON_DIR,
 )
 
 logger = setup_logger(level=10)
-os.makedirs(RAW_DIR, exist_ok=True)
-os.makedirs(JSON_DIR, exist_ok=True)
 
 
-async def async_parse_yeahub():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        page_num = 1
+# Splits every question card into fields inside the browser, so the whole
+# page is read in one round trip instead of one `text_content()` per card.
+PARSE_CARDS_JS = """
+cards => cards.map(card => {
+    const text = card.textContent || '';
+    const ratingPos = text.indexOf('Рейтинг');
+    const complexity = /Сложность\\s*:?\\s*(\\d+)/.exec(text);
+    const complexityPos = complexity ? complexity.index : -1;
+    const clean = value => value.replace(/^[\\s:]+|\\s+$/g, '');
 
-        async def handle_response(response):
-            if API_URL in response.url and response.status == 200:
-                filename = os.path.join(JSON_DIR, f"page_{page_num}.json")
-                json_data = await response.json()
-                with open(filename, 'w', encoding='utf-8') as file:
-                    json.dump(json_data, file, ensure_ascii=False, indent=2)
+    return {
+        question: clean(ratingPos >= 0 ? text.slice(0, ratingPos) : text),
+        rating: ratingPos >= 0
+            ? clean(text.slice(ratingPos + 'Рейтинг'.length, complexityPos >= 0 ? complexityPos : undefined))
+            : '',
+        complexity: complexity ? complexity[1] : '',
+        answer: complexity
+            ? clean(text.slice(complexity.index + complexity[0].length).replaceAll('Подробнее', ''))
+            : '',
+    };
+})
+"""
 
-        page.on("response", handle_response)
 
-        while True:
-            url = START_URL_TEMPLATE.format(page=page_num)
-            print(f"Load page {page_num}: {url}")
-            logger.debug(f"Load page {page_num}: {url}")
-            await page.goto(url)
-            await page.wait_for_load_state("networkidle")
+def build_html_snapshot(cards: List[Dict[str, str]]) -> str:
+    """
+    Builds the HTML snapshot from parsed question cards.
 
-            filename = os.path.join(RAW_DIR, f"page_{page_num}.html")
-            locator = page.locator("div.Ri4XE")
-            count = await locator.count()
-
-            data = ''
-            for i in range(count):
-                element = locator.nth(i)
-                text = await element.text_content()
-                rating_pos = text.find("Рейтинг")
-                # complexity_pos = text.find("Сложность")
-                question = text[:rating_pos]
-                # rating = text[rating_pos:complexity_pos]
-                answer_pos = text.find("Сложность") + 11
-                answer = text[answer_pos:].replace("Подробнее", "")
-
-                data += f"Вопрос {i+1}<br>"
-                data += f"{question}<br>"
-                data += "Ответ<br>"
-                data += f"{answer}<br><br>"
+    Args:
+        cards (List[Dict[str, str]]): Cards returned by `PARSE_CARDS_JS`, each with
+            `question`, `rating`, `complexity` and `answer` fields.
 
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(data)
-            print(f"Saved: {filename}")
-            logger.debug(f"Saved: {filename}")
+    Returns:
+        str: Questions and answers separated by `<br>`.
+    """
 
-            button = page.get_by_label("forward button")
-            if await button.count() > 0:
-                class_attr = await button.get_attribute("disabled")
+    parts = []
+    for i, card in enumerate(cards):
+        parts.append(
+            f"Вопрос {i+1}<br>"
+            f"{card['question']}<br>"
+            f"Рейтинг: {card['rating']}<br>"
+            f"Сложность: {card['complexity']}<br>"
+            "Ответ<br>"
+            f"{card['answer']}<br><br>"
+        )
+    return ''.join(parts)
 
-                if class_attr is not None:
-                    print("`Next` button is disabled, parsing finished.")
-                    logger.warning("`Next` button is disabled, parsing finished.")
-                    break
-                page_num += 1
-            else:
-                print("`Next` button didn't find, parsing finished.")
-                logger.warning("`Next` button didn't find, parsing finished.")
-                break
 
-        await browser.close()
+def should_block_request(resource_type: str, url: str) -> bool:
+    """
+    Checks whether a request is not needed for scraping and can be aborted.
 
+    Args:
+        resource_type (str): Playwright resource type (image, font, stylesheet, ...).
+        url (str): Requested URL.
 
-def parse_yeahub():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page_num = 1
+    Returns:
+        bool: True if the request should be aborted.
+    """
+
+    if API_URL in url:
+        return False
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    return any(pattern in url for pattern in BLOCKED_URL_PATTERNS)
+
+
+async def _async_route_request(route: AsyncRoute) -> None:
+    request = route.request
+    if should_block_request(request.resource_type, request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def _route_request(route: Route) -> None:
+    request = route.request
+    if should_block_request(request.resource_type, request.url):
+        route.abort()
+    else:
+        route.continue_()
+
+
+def _is_api_response(response) -> bool:
+    return API_URL in response.url and response.status == 200
+
+
+async def _async_open_browser(p: AsyncPlaywright) -> Browser:
+    """Connects to the long-lived browser server if configured, else launches Chromium."""
+
+    ws_endpoint = get_param_from_env("PLAYWRIGHT_WS_ENDPOINT")
+    if ws_endpoint:
+        logger.debug(f"Connect to browser server {ws_endpoint}")
+        return await p.chromium.connect(ws_endpoint)
+    return await p.chromium.launch(headless=True)
+
+
+def _open_browser(p: Playwright) -> SyncBrowser:
+    """Connects to the long-lived browser server if configured, else launches Chromium."""
+
+    ws_endpoint = get_param_from_env("PLAYWRIGHT_WS_ENDPOINT")
+    if ws_endpoint:
+        logger.debug(f"Connect to browser server {ws_endpoint}")
+        return p.chromium.connect(ws_endpoint)
+    return p.chromium.launch(headless=True)
+
+
+async def _async_load_page(page: Page, page_num: int) -> dict:
+    """
+    Loads one list page, saves its API response and HTML snapshot.
+
+    Args:
+        page (Page): Playwright page owned by the calling worker.
+        page_num (int): Number of the list page to load.
 
-        def handle_response(response):
-            if API_URL in response.url and response.status == 200:
-                filename = os.path.join(JSON_DIR, f"page_{page_num}.json")
-                json_data = response.json()
-                with open(filename, 'w', encoding='utf-8') as file:
-                    json.dump(json_data, file, ensure_ascii=False, indent=2)
+    Returns:
+        dict: API response of the page.
+    """
 
-        page.on("response", handle_response)
+    url = START_URL_TEMPLATE.format(page=page_num)
+    logger.debug(f"Load page {page_num}: {url}")
 
+    async with page.expect_response(_is_api_response) as response_info:
+        await page.goto(url, wait_until="domcontentloaded")
+
+    response = await response_info.value
+    json_data = await response.json()
+    save_json_page(page_num, json_data)
+
+    await page.wait_for_selector(CARD_SELECTOR, state="attached")
+
+    filename = os.path.join(RAW_DIR, f"page_{page_num}.html")
+    cards = await page.locator(CARD_SELECTOR).evaluate_all(PARSE_CARDS_JS)
+
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(build_html_snapshot(cards))
+    logger.debug(f"Saved: {filename}")
+
+    return json_data
+
+
+async def _async_page_worker(page: Page, queue: asyncio.Queue) -> None:
+    """Pulls page numbers from the shared queue until it is drained."""
+
+    while True:
+        try:
+            page_num = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        try:
+            await _async_load_page(page, page_num)
+        except Exception as e:
+            logger.error(f"Failed to load page {page_num}: {e}")
+            raise
+        finally:
+            queue.task_done()
+
+
+async def _async_crawl(browser: Browser, concurrency: int) -> None:
+    contexts, pages = [], []
+    for _ in range(max(1, concurrency)):
+        context = await browser.new_context()
+        await context.route("**/*", _async_route_request)
+        contexts.append(context)
+        pages.append(await context.new_page())
+
+    try:
+        json_data = await _async_load_page(pages[0], 1)
+        total_pages = get_total_pages(json_data)
+
+        if total_pages is None:
+            raise ValueError("Pagination metadata (`total`, `limit`) not found in API response.")
+        logger.debug(f"Total pages: {total_pages}")
+
+        queue = asyncio.Queue()
+        for page_num in range(2, total_pages + 1):
+            queue.put_nowait(page_num)
+
+        workers = [asyncio.create_task(_async_page_worker(page, queue)) for page in pages]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            # stop the other workers before their contexts are closed below
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        logger.info(f"Parsing finished, {total_pages} pages loaded.")
+    finally:
+        for context in contexts:
+            await context.close()
+
+
+async def async_parse_yeahub(
+    concurrency: int = CRAWL_CONCURRENCY,
+    browser: Optional[Browser] = None,
+) -> None:
+    """
+    Crawls all list pages concurrently with a bounded pool of browser pages.
+
+    The first page is loaded alone to read the pagination metadata of the API,
+    then the remaining page numbers are put into a shared queue, which is
+    drained by `concurrency` workers, each with its own browser context.
+    Images, fonts, styles and analytics are aborted by route rules, and every
+    page waits only for the API response and the question cards.
+
+    Args:
+        concurrency (int): Number of pages loaded at the same time.
+        browser (Optional[Browser]): Warm browser to reuse. If None, connects to
+            `PLAYWRIGHT_WS_ENDPOINT` when set, otherwise launches Chromium.
+
+    Raises:
+        ValueError: If the pagination metadata is missing in the API response.
+    """
+
+    os.makedirs(RAW_DIR, exist_ok=True)
+    os.makedirs(JSON_DIR, exist_ok=True)
+
+    if browser is not None:
+        await _async_crawl(browser, concurrency)
+        return
+
+    async with async_playwright() as p:
+        browser = await _async_open_browser(p)
+        try:
+            await _async_crawl(browser, concurrency)
+        finally:
+            await browser.close()
+
+
+def run_async_parse_yeahub(concurrency: int = CRAWL_CONCURRENCY) -> None:
+    """Runs `async_parse_yeahub` from synchronous code (e.g. Airflow task)."""
+
+    asyncio.run(async_parse_yeahub(concurrency=concurrency))
+
+
+def _crawl(browser: SyncBrowser) -> None:
+    context = browser.new_context()
+    context.route("**/*", _route_request)
+    page = context.new_page()
+    page_num = 1
+
+    try:
         while True:
             url = START_URL_TEMPLATE.format(page=page_num)
             print(f"Load page {page_num}: {url}")
             logger.debug(f"Load page {page_num}: {url}")
-            page.goto(url)
-            page.wait_for_load_state("networkidle")
+
+            with page.expect_response(_is_api_response) as response_info:
+                page.goto(url, wait_until="domcontentloaded")
+            save_json_page(page_num, response_info.value.json())
+
+            page.wait_for_selector(CARD_SELECTOR, state="attached")
 
             filename = os.path.join(RAW_DIR, f"page_{page_num}.html")
-            locator = page.locator("div.Ri4XE")
-            count = locator.count()
-
-            data = ''
-            for i in range(count):
-                element = locator.nth(i)
-                text = element.text_content()
-                rating_pos = text.find("Рейтинг")
-                # complexity_pos = text.find("Сложность")
-                question = text[:rating_pos]
-                # rating = text[rating_pos:complexity_pos]
-                answer_pos = text.find("Сложность") + 11
-                answer = text[answer_pos:].replace("Подробнее", "")
-
-                data += f"Вопрос {i+1}<br>"
-                data += f"{question}<br>"
-                data += "Ответ<br>"
-                data += f"{answer}<br><br>"
+            cards = page.locator(CARD_SELECTOR).evaluate_all(PARSE_CARDS_JS)
 
             with open(filename, "w", encoding="utf-8") as f:
-                f.write(data)
+                f.write(build_html_snapshot(cards))
             print(f"Saved: {filename}")
             logger.debug(f"Saved: {filename}")
 
@@ -142,10 +310,34 @@ def parse_yeahub():
                 print("`Next` button didn't find, parsing finished.")
                 logger.warning("`Next` button didn't find, parsing finished.")
                 break
+    finally:
+        context.close()
+
+
+def parse_yeahub(browser: Optional[SyncBrowser] = None) -> None:
+    """
+    Crawls list pages one by one, following the `forward button`.
 
-        browser.close()
+    Args:
+        browser (Optional[Browser]): Warm browser to reuse. If None, connects to
+            `PLAYWRIGHT_WS_ENDPOINT` when set, otherwise launches Chromium.
+    """
+
+    os.makedirs(RAW_DIR, exist_ok=True)
+    os.makedirs(JSON_DIR, exist_ok=True)
+
+    if browser is not None:
+        _crawl(browser)
+        return
+
+    with sync_playwright() as p:
+        browser = _open_browser(p)
+        try:
+            _crawl(browser)
+        finally:
+            browser.close()
 
 
 if __name__ == "__main__":
-    # asyncio.run(async_parse_yeahub())
+    # run_async_parse_yeahub()
     parse_yeahub()
@@ -0,0 +1,119 @@
+from functools import partial
+from typing import Callable, Iterable, List, Tuple
+
+from src.utils.config import COPY_CHUNK_SIZE, JSON_DIR
+from src.utils.logger import setup_logger
+from src.utils.work_json import (
+    fan_out_records,
+    iter_question_records,
+    iter_question_records_parallel,
+    to_answer_row,
+    to_question_row,
+)
+from src.utils.work_pg import backfill_embeddings, copy_many_rows, delete_rows, upsert_many_rows
+
+logger = setup_logger(level=10)
+
+TABLE_COLUMNS = {
+    'questions': ['id', 'title', 'created_at', 'keywords', 'short_answer'],
+    'answers': ['question_id', 'body_md'],
+}
+TABLE_KEYS = {
+    'questions': ['id'],
+    'answers': ['question_id'],
+}
+
+
+def _table_sink(table_name: str, upsert: bool) -> Callable[[List[Tuple]], int]:
+    if upsert:
+        return partial(
+            upsert_many_rows,
+            table_name,
+            TABLE_COLUMNS[table_name],
+            conflict_columns=TABLE_KEYS[table_name],
+        )
+    return partial(copy_many_rows, table_name, TABLE_COLUMNS[table_name])
+
+
+def load_postgres(
+    file_dir: str = JSON_DIR,
+    batch_size: int = COPY_CHUNK_SIZE,
+    workers: int = 0,
+    upsert: bool = False,
+) -> int:
+    """
+    Stores questions and answers from JSON files in PostgreSQL in one pass.
+
+    Every file is read once, its records are fanned out into rows of both
+    tables and copied batch by batch (questions first, as answers reference them).
+    A batch is copied with one COPY and committed at once, so batches are as
+    large as `COPY_CHUNK_SIZE`.
+
+    Args:
+        file_dir (str): Path to JSON folder to load.
+        batch_size (int): Number of rows per COPY (and transaction).
+        workers (int): Number of processes to parse files with (0 - parse serially).
+        upsert (bool): Merge rows into existing tables (insert new, update changed)
+            instead of plain COPY into empty tables.
+
+    Returns:
+        int: Number of loaded questions.
+    """
+
+    if workers:
+        records = iter_question_records_parallel(file_dir, workers=workers)
+    else:
+        records = iter_question_records(file_dir)
+
+    count = fan_out_records(
+        records,
+        sinks=[
+            (to_question_row, _table_sink('questions', upsert)),
+            (to_answer_row, _table_sink('answers', upsert)),
+        ],
+        batch_size=batch_size,
+    )
+    logger.info(f"Loaded {count} questions into PostgreSQL.")
+    return count
+
+
+def delete_questions(question_ids: Iterable[str]) -> int:
+    """
+    Deletes questions removed from the site, their answers go with them (`on delete cascade`).
+
+    Args:
+        question_ids (Iterable[str]): Ids of removed questions, e.g. from `DELTA_DIR`.
+
+    Returns:
+        int: Number of deleted questions.
+    """
+
+    count = delete_rows('questions', 'id', [int(question_id) for question_id in question_ids])
+    logger.info(f"Deleted {count} questions from PostgreSQL.")
+    return count
+
+
+def backfill_question_embeddings() -> int:
+    """
+    Embeds new and edited question titles into `questions.embedding` (pgvector backend).
+
+    Embeddings are kept in the on-disk `EmbeddingCache`, so a rebuilt database
+    is filled without encoding known titles again.
+
+    Returns:
+        int: Number of updated questions.
+    """
+
+    from src.utils.work_embedding import EmbeddingCache, get_sentence_embeddings
+
+    cache = EmbeddingCache()
+    try:
+        count = backfill_embeddings(lambda titles: get_sentence_embeddings(titles, cache=cache))
+    finally:
+        cache.close()
+    logger.info(f"Embedded {count} questions in PostgreSQL.")
+    return count
+
+
+if __name__ == '__main__':
+    load_postgres()
@@ -1,35 +1,44 @@
 /*
-   drop all tables
+   non-destructive: every statement may run on an existing database
 */
-drop table if exists questions cascade;
-drop table if exists answers;
-
 
 /*
    questions
 */
 
-create table questions (
+create table if not exists questions (
    id         serial primary key,
    title      varchar(300),
    body_md    varchar(500),
-   tsv        tsvector,
    created_at timestamp
 );
 
-create index questions_tsv_gin on questions using gin(tsv);
+/*
+   search document: title (A), keywords (B) and short answer (C) in one
+   generated tsvector, kept up to date by Postgres without a trigger
+*/
+alter table questions add column if not exists keywords text;
+alter table questions add column if not exists short_answer text;
+alter table questions add column if not exists search_tsv tsvector
+   generated always as (
+      setweight(to_tsvector('russian', coalesce(title, '')), 'A')
+      || setweight(to_tsvector('russian', coalesce(keywords, '')), 'B')
+      || setweight(to_tsvector('russian', coalesce(short_answer, '')), 'C')
+   ) stored;
 
-create trigger tsvectorupdate 
-   before insert or update 
-      on questions
-for each row execute procedure
-   tsvector_update_trigger(tsv, 'pg_catalog.russian', title)
-;
+create index if not exists questions_search_tsv_gin on questions using gin (search_tsv);
+
+/*
+   title-only tsvector of older schemas, replaced by search_tsv (derived data only)
+*/
+drop trigger if exists tsvectorupdate on questions;
+drop index if exists questions_tsv_gin;
+alter table questions drop column if exists tsv;
 
 /*
    answers
 */
-create table answers (
+create table if not exists answers (
    id          serial primary key,
    question_id integer not null,
    body_md     varchar(3000),
@@ -37,4 +46,9 @@ create table answers (
    constraint fk_question foreign key ( question_id )
       references questions ( id )
          on delete cascade
-);
\ No newline at end of file
+);
+
+/*
+   btree on the foreign key, joins back from answers are index scans
+*/
+create unique index if not exists answers_question_id_key on answers (question_id);
@@ -0,0 +1,16 @@
+/*
+   pgvector, for the single-store hybrid search, applied by `init_db` only
+   with VECTOR_BACKEND=pgvector (needs the `vector` extension on the server),
+   non-destructive: every statement may run on an existing database
+*/
+create extension if not exists vector;
+
+/*
+   title embeddings of EMBEDDING_MODEL (512 dims), filled by `backfill_embeddings`,
+   embedding_md5 is md5 of the embedded title and marks stale rows
+*/
+alter table questions add column if not exists embedding vector(512);
+alter table questions add column if not exists embedding_md5 char(32);
+
+create index if not exists questions_embedding_hnsw
+   on questions using hnsw (embedding vector_cosine_ops);
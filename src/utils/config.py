@@ -4,3 +4,62 @@ START_URL_TEMPLATE = "https://yeahub.ru/questions?page={page}&status=all&special
 RAW_DIR = "data/raw"
 JSON_DIR = "data/json"
 QUESTION_URL = "https://yeahub.ru/questions/{0}"
+CRAWL_CONCURRENCY = 4
+API_ENDPOINT = "https://api.yeahub.ru/questions/public-questions"
+API_PARAMS = {"specialization": 39}
+API_PAGE_SIZE = 50
+API_CONCURRENCY = 8
+API_TIMEOUT = 30
+DELTA_DIR = "data/delta"
+CRAWL_MANIFEST_PATH = "data/crawl_manifest.json"
+FULL_CRAWL_INTERVAL = 7 * 24 * 3600
+CARD_SELECTOR = "div.Ri4XE"
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+BLOCKED_URL_PATTERNS = ("google-analytics", "googletagmanager", "mc.yandex", "doubleclick")
+RECORD_BATCH_SIZE = 1000
+CORPUS_PATH = "data/corpus.jsonl.gz"
+COPY_CHUNK_SIZE = 50000
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 10
+POOL_MAX_LIFETIME = 1800
+POOL_CHECKOUT_TIMEOUT = 5
+POOL_HEALTHCHECK_IDLE = 30
+ASYNC_POOL_COMMAND_TIMEOUT = 10
+SEARCH_KEYWORD_TIMEOUT = 2.0
+SEARCH_SEMANTIC_TIMEOUT = 3.0
+KEYWORD_SEARCH_APPROXIMATE = False
+KEYWORD_SEARCH_CANDIDATES = 1000
+SEARCH_CACHE_SIZE = 1024
+SEARCH_CACHE_TTL = 600
+SEARCH_CACHE_VERSION_TTL = 5
+DATASET_VERSION_KEY = "yeahub:dataset_version"
+SEARCH_PAGES_AHEAD = 5
+SEARCH_MAX_DEPTH = 1000
+SEARCH_RANKING_TTL = 120
+SEARCH_BATCH_MAX_QUERIES = 500
+SEARCH_BATCH_CONCURRENCY = 8
+VECTOR_BACKEND = "pinecone"
+LOCAL_INDEX_DIR = "data/vector_index"
+LOCAL_INDEX_DTYPE = "float32"
+LOCAL_INDEX_SCAN_ROWS = 16384
+LOCAL_INDEX_HNSW_MIN_SIZE = 50000
+LOCAL_INDEX_HNSW_EF = 128
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_MODEL = "distiluse-base-multilingual-cased"
+EMBEDDING_BACKEND = "torch"
+EMBEDDING_ONNX_FILE = "onnx/model_qint8_avx2.onnx"
+EMBEDDING_THREADS = 0
+EMBEDDING_CACHE_PATH = "data/embeddings.sqlite"
+PGVECTOR_HNSW_EF_SEARCH = 200
+PINECONE_MAX_BATCH_BYTES = 2 * 1024 * 1024
+PINECONE_MAX_IN_FLIGHT = 4
+PINECONE_MAX_RETRIES = 5
+PINECONE_BACKOFF_BASE = 0.5
+PINECONE_BACKOFF_MAX = 30
+PINECONE_CHECKPOINT_PATH = "data/pinecone_upsert_checkpoint.jsonl"
+PINECONE_DELETE_BATCH_SIZE = 1000
+PINECONE_MANIFEST_PATH = "data/pinecone_manifest.json"
+FUSION_METHOD = "rrf"
+FUSION_NORMALISE = "minmax"
+FUSION_RRF_K = 60
+FUSION_OVERFETCH = 2
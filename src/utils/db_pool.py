@@ -0,0 +1,363 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Generator, Optional, Tuple
+
+import psycopg2
+from prometheus_client import Counter, Gauge, Histogram
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_UNKNOWN,
+    connection as _connection,
+)
+
+from src.utils.config import (
+    ASYNC_POOL_COMMAND_TIMEOUT,
+    PGVECTOR_HNSW_EF_SEARCH,
+    POOL_CHECKOUT_TIMEOUT,
+    POOL_HEALTHCHECK_IDLE,
+    POOL_MAX_LIFETIME,
+    POOL_MAX_SIZE,
+    POOL_MIN_SIZE,
+)
+from src.utils.helper import get_postgres_params
+from src.utils.logger import setup_logger
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+logger = setup_logger(level=10)
+
+POOL_IN_USE = Gauge("pg_pool_connections_in_use", "PostgreSQL connections checked out of the pool")
+POOL_IDLE = Gauge("pg_pool_connections_idle", "Idle PostgreSQL connections in the pool")
+POOL_WAITS = Counter("pg_pool_checkout_waits_total", "Checkouts which had to wait for a free connection")
+POOL_TIMEOUTS = Counter("pg_pool_checkout_timeouts_total", "Checkouts which timed out")
+POOL_CHECKOUT_SECONDS = Histogram(
+    "pg_pool_checkout_seconds",
+    "Time to check a connection out of the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+# asyncpg pool of the API, read from the pool itself at scrape time
+ASYNC_POOL_SIZE = Gauge("pg_async_pool_connections", "Open connections of the asyncpg pool")
+ASYNC_POOL_IDLE = Gauge("pg_async_pool_connections_idle", "Idle connections of the asyncpg pool")
+ASYNC_POOL_IN_USE = Gauge("pg_async_pool_connections_in_use", "Connections acquired from the asyncpg pool")
+
+
+class PoolTimeout(ConnectionError):
+    """Raised when no connection became free within the checkout timeout."""
+
+
+class PgConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    Connections are health-checked on checkout when they were idle for a while,
+    replaced after `max_lifetime` seconds, and reset (rolled back) on return.
+    """
+
+    def __init__(
+        self,
+        db_params: Optional[Dict[str, Any]] = None,
+        min_size: int = POOL_MIN_SIZE,
+        max_size: int = POOL_MAX_SIZE,
+        max_lifetime: float = POOL_MAX_LIFETIME,
+        checkout_timeout: float = POOL_CHECKOUT_TIMEOUT,
+        healthcheck_idle: float = POOL_HEALTHCHECK_IDLE,
+    ):
+        """
+        Initialize the pool and open `min_size` connections.
+
+        Args:
+            db_params (Optional[Dict[str, Any]]): Connection parameters. If None,
+                they are read once via `get_postgres_params()`.
+            min_size (int): Number of connections opened up front.
+            max_size (int): Maximum number of open connections.
+            max_lifetime (float): Seconds after which a connection is replaced.
+            checkout_timeout (float): Seconds to wait for a free connection.
+            healthcheck_idle (float): Idle seconds after which a connection is
+                checked with `SELECT 1` before it is handed out.
+        """
+        self.db_params = db_params or get_postgres_params()
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.healthcheck_idle = healthcheck_idle
+
+        self._cond = threading.Condition()
+        self._idle: Deque[Tuple[_connection, float]] = deque()
+        self._created: Dict[int, float] = {}
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        for _ in range(min_size):
+            conn = self._connect()
+            self._size += 1
+            self._idle.append((conn, time.monotonic()))
+        self._update_gauges()
+
+    def _connect(self) -> _connection:
+        try:
+            conn = psycopg2.connect(**self.db_params)
+        except psycopg2.Error as err:
+            logger.error(f"Database connection error: {err}")
+            raise ConnectionError("Failed to establish database connection") from err
+
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn: _connection) -> None:
+        with self._cond:
+            self._size -= 1
+            self._created.pop(id(conn), None)
+            self._cond.notify()
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _is_expired(self, conn: _connection) -> bool:
+        created = self._created.get(id(conn), 0.0)
+        return time.monotonic() - created > self.max_lifetime
+
+    def _is_healthy(self, conn: _connection, idle_since: float) -> bool:
+        if conn.closed or self._is_expired(conn):
+            return False
+        if time.monotonic() - idle_since < self.healthcheck_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _update_gauges(self) -> None:
+        POOL_IN_USE.set(self._in_use)
+        POOL_IDLE.set(len(self._idle))
+
+    def getconn(self) -> _connection:
+        """
+        Checks a connection out of the pool.
+
+        Returns:
+            psycopg2.extensions.connection: Healthy connection.
+
+        Raises:
+            PoolTimeout: If no connection became free within `checkout_timeout`.
+            ConnectionError: If a new connection could not be established.
+        """
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        waited = False
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise ConnectionError("Connection pool is closed")
+
+                candidate = None
+                if self._idle:
+                    candidate = self._idle.pop()
+                elif self._size < self.max_size:
+                    # reserve a slot, the connection is opened outside the lock
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        POOL_TIMEOUTS.inc()
+                        raise PoolTimeout(f"No free connection within {self.checkout_timeout}s")
+                    if not waited:
+                        POOL_WAITS.inc()
+                        waited = True
+                    self._cond.wait(remaining)
+                    continue
+
+            if candidate is not None:
+                conn, idle_since = candidate
+                if not self._is_healthy(conn, idle_since):
+                    logger.debug("Replace stale pooled connection.")
+                    self._discard(conn)
+                    continue
+            else:
+                try:
+                    conn = self._connect()
+                except ConnectionError:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            with self._cond:
+                self._in_use += 1
+                self._update_gauges()
+            POOL_CHECKOUT_SECONDS.observe(time.monotonic() - start)
+            return conn
+
+    def putconn(self, conn: _connection, discard: bool = False) -> None:
+        """
+        Returns a connection to the pool.
+
+        Args:
+            conn (psycopg2.extensions.connection): Connection from `getconn`.
+            discard (bool): Close the connection instead of reusing it.
+        """
+        with self._cond:
+            self._in_use -= 1
+
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+
+        if discard or conn.closed or self._closed or self._is_expired(conn):
+            self._discard(conn)
+        else:
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+        with self._cond:
+            self._update_gauges()
+
+    @contextmanager
+    def connection(self) -> Generator[_connection, None, None]:
+        """Context manager which checks a connection out and returns it afterwards."""
+        conn = self.getconn()
+        try:
+            yield conn
+        except Exception:
+            self.putconn(conn, discard=conn.closed)
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self) -> None:
+        """Closes all idle connections, checked out ones are closed on return."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._discard(conn)
+        self._update_gauges()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the current pool size, idle and checked out connections."""
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle), "in_use": self._in_use}
+
+
+_pool: Optional[PgConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> PgConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it on first use.
+
+    A forked process (e.g. Airflow task runner) gets its own pool, as
+    connections can't be shared across processes.
+    """
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = PgConnectionPool()
+            _pool_pid = os.getpid()
+        return _pool
+
+
+@contextmanager
+def pooled_connection() -> Generator[_connection, None, None]:
+    """
+    Checks a connection out of the process-wide pool.
+
+    **Usage**
+
+    ```python
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+    ```
+
+    Raises:
+        ConnectionError: If the database connection could not be established.
+        PoolTimeout: If no connection became free within the checkout timeout.
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def instrument_async_pool(pool: "asyncpg.Pool") -> None:
+    """Exports size, idle and acquired connections of an asyncpg pool as Prometheus gauges."""
+
+    ASYNC_POOL_SIZE.set_function(pool.get_size)
+    ASYNC_POOL_IDLE.set_function(pool.get_idle_size)
+    ASYNC_POOL_IN_USE.set_function(lambda: pool.get_size() - pool.get_idle_size())
+
+
+async def create_async_pool(
+    db_params: Optional[Dict[str, Any]] = None,
+    min_size: int = POOL_MIN_SIZE,
+    max_size: int = POOL_MAX_SIZE,
+) -> "asyncpg.Pool":
+    """
+    Creates an asyncpg pool for the async request path of the API.
+
+    The pool must be created and closed inside the running event loop, e.g. in
+    the FastAPI lifespan hook. Its connections are exported as the
+    `pg_async_pool_*` gauges (the `pg_pool_*` ones belong to the psycopg2 pool).
+
+    Args:
+        db_params (Optional[Dict[str, Any]]): Connection parameters. If None,
+            they are read via `get_postgres_params()`.
+        min_size (int): Number of connections opened up front.
+        max_size (int): Maximum number of open connections.
+
+    Returns:
+        asyncpg.Pool: Connection pool.
+
+    Raises:
+        RuntimeError: If asyncpg is not installed.
+        ConnectionError: If the database connection could not be established.
+    """
+
+    if asyncpg is None:
+        raise RuntimeError("asyncpg is required for the async search path")
+
+    params = db_params or get_postgres_params()
+    try:
+        pool = await asyncpg.create_pool(
+            database=params["dbname"],
+            user=params["user"],
+            password=params["password"],
+            host=params["host"],
+            port=int(params["port"]),
+            min_size=min_size,
+            max_size=max_size,
+            max_inactive_connection_lifetime=POOL_MAX_LIFETIME,
+            command_timeout=ASYNC_POOL_COMMAND_TIMEOUT,
+            # candidates of an HNSW scan, caps the rows of the pgvector leg
+            server_settings={"hnsw.ef_search": str(PGVECTOR_HNSW_EF_SEARCH)},
+        )
+    except (OSError, asyncpg.PostgresError) as err:
+        logger.error(f"Database connection error: {err}")
+        raise ConnectionError("Failed to establish database connection") from err
+
+    instrument_async_pool(pool)
+    logger.debug(f"Async connection pool created, size {min_size}..{max_size}.")
+    return pool
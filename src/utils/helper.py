@@ -1,3 +1,5 @@
+import hashlib
+import json
 import os
 from typing import Any, Dict, Optional
 
@@ -62,3 +64,52 @@ def get_param_from_env(param_name: str) -> Optional[str]:
     """
 
     return os.getenv(param_name, None)
+
+
+def content_hash(obj: Any) -> str:
+    """
+    Calculates a stable SHA-256 hash of JSON-serializable content.
+
+    Args:
+        obj (Any): Content to hash (dict keys order doesn't matter).
+
+    Returns:
+        str: Hex digest of the hash.
+    """
+
+    payload = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_json_manifest(path: str) -> Dict[str, Any]:
+    """
+    Reads a manifest file in JSON format.
+
+    Args:
+        path (str): Path to the manifest file.
+
+    Returns:
+        Dict[str, Any]: Manifest content, or empty dict if the file doesn't exist.
+    """
+
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json_manifest(manifest: Dict[str, Any], path: str) -> None:
+    """
+    Atomically writes a manifest file in JSON format.
+
+    Args:
+        manifest (Dict[str, Any]): Manifest content.
+        path (str): Path to the manifest file.
+    """
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,313 @@
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.utils.config import (
+    EMBEDDING_BATCH_SIZE,
+    JSON_DIR,
+    LOCAL_INDEX_DIR,
+    LOCAL_INDEX_DTYPE,
+    LOCAL_INDEX_HNSW_EF,
+    LOCAL_INDEX_HNSW_MIN_SIZE,
+    LOCAL_INDEX_SCAN_ROWS,
+)
+from src.utils.helper import save_json_manifest
+from src.utils.logger import setup_logger
+from src.utils.work_json import iter_question_records, to_pinecone_record
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+EmbedFn = Callable[[List[str]], Any]
+logger = setup_logger(level=10)
+
+VECTORS_FILE = "vectors.npy"
+META_FILE = "meta.json"
+HNSW_FILE = "hnsw.bin"
+
+
+def _default_embed(texts: List[str]) -> np.ndarray:
+    from src.utils.work_embedding import get_sentence_embeddings
+
+    return get_sentence_embeddings(texts)
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class LocalVectorIndex:
+    """
+    Offline vector index with the same hit format as Pinecone `search_records`.
+
+    Embeddings are L2-normalised and stored in a memory-mapped `.npy` matrix,
+    so the cosine similarity of a query is one matrix-vector product. For
+    large corpora an HNSW graph is used instead, if `hnswlib` is installed.
+    """
+
+    def __init__(self, path: str = LOCAL_INDEX_DIR, embed: Optional[EmbedFn] = None):
+        """
+        Opens an index built by `LocalVectorIndex.build`.
+
+        Args:
+            path (str): Folder of the index.
+            embed (Optional[EmbedFn]): Function which embeds query texts, must be
+                the same model the index was built with.
+
+        Raises:
+            FileNotFoundError: If the index wasn't built yet.
+        """
+        self.path = path
+        self.embed = embed or _default_embed
+
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.ids: List[str] = meta["ids"]
+        self.fields: List[Dict[str, str]] = meta["fields"]
+        self.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+
+        self.hnsw = None
+        hnsw_path = os.path.join(path, HNSW_FILE)
+        if hnswlib is not None and os.path.exists(hnsw_path):
+            self.hnsw = hnswlib.Index(space="ip", dim=self.vectors.shape[1])
+            self.hnsw.load_index(hnsw_path, max_elements=len(self.ids))
+            self.hnsw.set_ef(LOCAL_INDEX_HNSW_EF)
+
+        logger.debug(f"Local index loaded: {len(self.ids)} vectors, dim {self.vectors.shape[1]}.")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        records: Iterable[Dict[str, Any]],
+        path: str = LOCAL_INDEX_DIR,
+        embed: Optional[EmbedFn] = None,
+        dtype: str = LOCAL_INDEX_DTYPE,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        hnsw_min_size: int = LOCAL_INDEX_HNSW_MIN_SIZE,
+    ) -> "LocalVectorIndex":
+        """
+        Embeds question titles and writes the index.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Pinecone records (`_id`, `title`, `url`).
+            path (str): Folder of the index, replaced if it exists.
+            embed (Optional[EmbedFn]): Function which embeds a batch of texts.
+            dtype (str): `float32`, or `float16` to halve the memory.
+            batch_size (int): Number of titles embedded at once.
+            hnsw_min_size (int): Minimal corpus size for an HNSW graph.
+
+        Returns:
+            LocalVectorIndex: Opened index.
+
+        Raises:
+            ValueError: If there are no records.
+        """
+        embed = embed or _default_embed
+        records = list(records)
+        if not records:
+            raise ValueError("No records to index.")
+
+        os.makedirs(path, exist_ok=True)
+        # files are written aside and moved in, so a process which has the
+        # previous index mapped keeps reading it until it reopens the index
+        vectors_path = os.path.join(path, VECTORS_FILE)
+        vectors = None
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            embeddings = _normalise(np.asarray(embed([r["title"] for r in batch]), dtype=np.float32))
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    f"{vectors_path}.tmp",
+                    mode="w+",
+                    dtype=dtype,
+                    shape=(len(records), embeddings.shape[1]),
+                )
+            vectors[start:start + len(batch)] = embeddings
+        vectors.flush()
+
+        hnsw_path = os.path.join(path, HNSW_FILE)
+        graph = None
+        if hnswlib is not None and len(records) >= hnsw_min_size:
+            graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+            graph.init_index(max_elements=len(records), ef_construction=200, M=16)
+            graph.add_items(np.asarray(vectors, dtype=np.float32), np.arange(len(records)))
+            graph.save_index(f"{hnsw_path}.tmp")
+
+        meta = {
+            "ids": [r["_id"] for r in records],
+            "fields": [{"title": r["title"], "url": r["url"]} for r in records],
+        }
+        os.replace(f"{vectors_path}.tmp", vectors_path)
+        save_json_manifest(meta, os.path.join(path, META_FILE))
+        if graph is not None:
+            os.replace(f"{hnsw_path}.tmp", hnsw_path)
+        elif os.path.exists(hnsw_path):
+            os.remove(hnsw_path)
+
+        logger.info(f"Local index built: {len(records)} vectors in {path}.")
+        return cls(path, embed)
+
+    def search(self, query_vector: Sequence[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Returns the `top_k` nearest questions of an embedded query.
+
+        Args:
+            query_vector (Sequence[float]): Query embedding.
+            top_k (int): Number of hits.
+
+        Returns:
+            List[Dict[str, Any]]: Hits like Pinecone's `{"_id", "_score", "fields": {"title", "url"}}`.
+        """
+        query = _normalise(np.asarray(query_vector, dtype=np.float32).reshape(-1))
+        top_k = min(top_k, len(self.ids))
+        if top_k <= 0:
+            return []
+
+        if self.hnsw is not None:
+            labels, distances = self.hnsw.knn_query(query, k=top_k)
+            indices, scores = labels[0], 1.0 - distances[0]
+        else:
+            similarities = self._similarities(query[None, :])[0]
+            indices = np.argpartition(-similarities, top_k - 1)[:top_k]
+            indices = indices[np.argsort(-similarities[indices])]
+            scores = similarities[indices]
+
+        return self._hits(indices, scores)
+
+    def search_many(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 10,
+        chunk_size: int = EMBEDDING_BATCH_SIZE,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Batch version of `search`, one list of hits per query vector.
+
+        Brute-force search does one matrix-matrix product per chunk of queries
+        instead of one scan of the vectors per query.
+
+        Args:
+            query_vectors (Sequence[Sequence[float]]): Query embeddings.
+            top_k (int): Number of hits per query.
+            chunk_size (int): Number of queries scored at once, bounds the
+                `(chunk_size, len(index))` similarity matrix.
+
+        Returns:
+            List[List[Dict[str, Any]]]: Hits of every query, in input order.
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        queries = _normalise(queries.reshape(len(queries), -1))
+        top_k = min(top_k, len(self.ids))
+        if top_k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        results = []
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            if self.hnsw is not None:
+                indices, distances = self.hnsw.knn_query(chunk, k=top_k)
+                scores = 1.0 - distances
+            else:
+                similarities = self._similarities(chunk)
+                indices = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+                scores = np.take_along_axis(similarities, indices, axis=1)
+                order = np.argsort(-scores, axis=1)
+                indices = np.take_along_axis(indices, order, axis=1)
+                scores = np.take_along_axis(scores, order, axis=1)
+            results.extend(self._hits(row_indices, row_scores) for row_indices, row_scores in zip(indices, scores))
+        return results
+
+    def _similarities(self, queries: np.ndarray, scan_rows: int = LOCAL_INDEX_SCAN_ROWS) -> np.ndarray:
+        """
+        Scores float32 queries against every stored vector, `(len(queries), len(index))`.
+
+        Vectors stored as `float16` are upcast block by block of `scan_rows`
+        rows: float16 only saves memory, a float16 matmul is many times slower.
+        """
+        if self.vectors.dtype == np.float32:
+            return queries @ self.vectors.T
+
+        similarities = np.empty((len(queries), len(self.ids)), dtype=np.float32)
+        for start in range(0, len(self.ids), scan_rows):
+            block = np.asarray(self.vectors[start:start + scan_rows], dtype=np.float32)
+            similarities[:, start:start + len(block)] = queries @ block.T
+        return similarities
+
+    def _hits(self, indices: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        return [
+            {"_id": self.ids[i], "_score": float(score), "fields": self.fields[i]}
+            for i, score in zip(indices.tolist(), scores.tolist())
+        ]
+
+    def search_text(self, text_query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """Embeds the query text and returns its `top_k` nearest questions."""
+
+        return self.search(np.asarray(self.embed([text_query]))[0], top_k)
+
+    def search_text_many(self, text_queries: List[str], top_k: int = 10) -> List[List[Dict[str, Any]]]:
+        """Embeds all query texts in one call and returns the `top_k` nearest questions of each."""
+
+        if not text_queries:
+            return []
+        return self.search_many(np.asarray(self.embed(text_queries)), top_k)
+
+
+_index: Optional[LocalVectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_local_index(path: str = LOCAL_INDEX_DIR) -> LocalVectorIndex:
+    """Returns the process-wide local index, opening it on first use."""
+
+    global _index
+
+    if _index is None or _index.path != path:
+        with _index_lock:
+            if _index is None or _index.path != path:
+                _index = LocalVectorIndex(path)
+    return _index
+
+
+def build_local_index(file_dir: str = JSON_DIR, path: str = LOCAL_INDEX_DIR) -> int:
+    """
+    Builds the local index from JSON files or the consolidated corpus.
+
+    Title embeddings are kept in the on-disk `EmbeddingCache`, so a rebuild
+    only encodes new or edited titles.
+
+    Args:
+        file_dir (str): Path to JSON folder (or consolidated corpus).
+        path (str): Folder of the index.
+
+    Returns:
+        int: Number of indexed questions.
+    """
+
+    from src.utils.work_embedding import EmbeddingCache, get_sentence_embeddings
+
+    cache = EmbeddingCache()
+    try:
+        index = LocalVectorIndex.build(
+            (to_pinecone_record(record) for record in iter_question_records(file_dir)),
+            path=path,
+            embed=lambda texts: get_sentence_embeddings(texts, cache=cache),
+        )
+    finally:
+        cache.close()
+    return len(index)
+
+
+if __name__ == "__main__":
+    build_local_index()
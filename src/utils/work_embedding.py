@@ -1,21 +1,192 @@
-from typing import List
-from sentence_transformers import SentenceTransformer
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 
-def get_sentence_embeddings(texts: List[str], model_name: str = "distiluse-base-multilingual-cased") -> List[List[float]]:
+from src.utils.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_MODEL,
+    EMBEDDING_ONNX_FILE,
+    EMBEDDING_THREADS,
+)
+from src.utils.helper import content_hash
+from src.utils.logger import setup_logger
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+
+logger = setup_logger(level=10)
+
+_models: Dict[Tuple[str, str], "SentenceTransformer"] = {}
+_models_lock = threading.Lock()
+
+
+def get_model(model_name: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND) -> "SentenceTransformer":
+    """
+    Возвращает модель SentenceTransformer, загружая её только при первом обращении.
+
+    Args:
+        model_name (str): Название модели SentenceTransformer.
+        backend (str): `torch` или `onnx` (квантованная int8-модель для CPU, файл `EMBEDDING_ONNX_FILE`).
+
+    Returns:
+        SentenceTransformer: Общая для всех потоков модель.
+
+    Raises:
+        RuntimeError: Если sentence-transformers не установлен.
+    """
+    if SentenceTransformer is None:
+        raise RuntimeError("sentence-transformers is required for local embeddings")
+
+    key = (model_name, backend)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                if EMBEDDING_THREADS:
+                    import torch
+
+                    torch.set_num_threads(EMBEDDING_THREADS)
+                if backend == "onnx":
+                    model_kwargs = {"file_name": EMBEDDING_ONNX_FILE}
+                    if EMBEDDING_THREADS:
+                        # ONNX Runtime has its own thread pool, torch settings don't apply
+                        import onnxruntime
+
+                        session_options = onnxruntime.SessionOptions()
+                        session_options.intra_op_num_threads = EMBEDDING_THREADS
+                        model_kwargs["session_options"] = session_options
+                    model = SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+                else:
+                    model = SentenceTransformer(model_name)
+                _models[key] = model
+                logger.debug(f"Model `{model_name}` loaded ({backend}).")
+    return model
+
+
+def cache_model_key(model_name: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND) -> str:
+    """
+    Возвращает ключ модели в `EmbeddingCache`.
+
+    Векторы квантованной ONNX-модели и torch-модели с тем же именем отличаются,
+    поэтому в ключ входят бэкенд и файл ONNX-модели.
+    """
+    if backend == "onnx":
+        return f"{model_name}|onnx|{EMBEDDING_ONNX_FILE}"
+    return f"{model_name}|{backend}"
+
+
+class EmbeddingCache:
+    """
+    Дисковый кэш эмбеддингов (SQLite), ключ - модель (см. `cache_model_key`) и хэш текста.
+
+    Неизменённые заголовки вопросов не кодируются повторно.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self._conn.commit()
+
+    def get_many(self, model_name: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(chunk))})",
+                    [model_name, *chunk],
+                )
+                for text_hash, vector in rows:
+                    found[text_hash] = np.frombuffer(vector, dtype=np.float32)
+        return found
+
+    def put_many(self, model_name: str, hashes: List[str], vectors: np.ndarray) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+                [
+                    (model_name, text_hash, np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+                    for text_hash, vector in zip(hashes, vectors)
+                ],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_sentence_embeddings(
+    texts: List[str],
+    model_name: str = EMBEDDING_MODEL,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    backend: str = EMBEDDING_BACKEND,
+    cache: Optional[EmbeddingCache] = None,
+) -> np.ndarray:
     """
     Преобразует список текстов в эмбеддинги с помощью SentenceTransformers.
 
+    Модель загружается один раз (см. `get_model`), тексты кодируются батчами.
+    Одинаковые тексты кодируются один раз, а при переданном `cache` - только
+    те, которых ещё нет в кэше.
+
     Args:
         texts (List[str]): Список строк (предложений или документов) для кодирования.
         model_name (str): Название модели SentenceTransformer. По умолчанию - многоязычная модель.
+        batch_size (int): Размер батча при кодировании.
+        backend (str): `torch` или `onnx`.
+        cache (Optional[EmbeddingCache]): Дисковый кэш эмбеддингов.
 
     Returns:
-        List[List[float]]: Список эмбеддингов, каждый из которых - список чисел с плавающей точкой.
+        np.ndarray: Матрица float32 размера (len(texts), dim).
     """
-    model = SentenceTransformer(model_name)
-    embeddings = model.encode(texts, convert_to_numpy=True)
-    return embeddings.tolist()
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    hashes = [content_hash(text) for text in texts]
+    unique = dict(zip(hashes, texts))
+
+    if cache is None and len(unique) == len(texts):
+        # склеивать нечего - массив модели возвращается без копирования
+        return get_model(model_name, backend).encode(
+            texts, batch_size=batch_size, convert_to_numpy=True,
+        ).astype(np.float32, copy=False)
+
+    vectors: Dict[str, np.ndarray] = {}
+    if cache is not None:
+        vectors.update(cache.get_many(cache_model_key(model_name, backend), list(unique)))
+
+    missing = [text_hash for text_hash in unique if text_hash not in vectors]
+    if missing:
+        model = get_model(model_name, backend)
+        encoded = model.encode(
+            [unique[text_hash] for text_hash in missing],
+            batch_size=batch_size,
+            convert_to_numpy=True,
+        ).astype(np.float32, copy=False)
+        vectors.update(zip(missing, encoded))
+        if cache is not None:
+            cache.put_many(cache_model_key(model_name, backend), missing, encoded)
+    logger.debug(f"Embedded {len(texts)} texts, {len(missing)} encoded by the model.")
+
+    return np.stack([vectors[text_hash] for text_hash in hashes])
 
 # Пример использования
 if __name__ == "__main__":
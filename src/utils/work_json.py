@@ -1,17 +1,63 @@
+import gzip
 import json
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
-
-from src.utils.config import QUESTION_URL
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from src.utils.config import CORPUS_PATH, QUESTION_URL, RECORD_BATCH_SIZE
+from src.utils.helper import load_json_manifest, save_json_manifest
 from src.utils.logger import setup_logger
 
 from src.utils.config import JSON_DIR
 
 
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
 JSONType = Union[Dict[str, Any], List[Any], str, int, float, bool, None]
+RecordSink = Tuple[Callable[[Dict[str, Any]], Any], Callable[[List[Any]], None]]
 logger = setup_logger(level=10)
 
 
+if msgspec is not None:
+    class QuestionItem(msgspec.Struct):
+        """Item of the API `data` list, unknown fields are skipped while decoding."""
+
+        id: Union[int, str, None] = None
+        title: Optional[str] = None
+        # a list, or its string form in older dumps (see `keywords_text`)
+        keywords: Union[List[str], str, None] = None
+        shortAnswer: Optional[str] = None
+        createdAt: Optional[str] = None
+
+    class QuestionPage(msgspec.Struct):
+        data: List[QuestionItem] = []
+
+    _page_decoder = msgspec.json.Decoder(QuestionPage)
+    _item_decoder = msgspec.json.Decoder(QuestionItem)
+
+
 def get_all_json_files(directory: str = JSON_DIR) -> List[str]:
     """
     Returns a list of all .json file paths in the specified directory and its subdirectories.
@@ -90,64 +136,372 @@ def read_json_file_all(filename: str) -> List[Dict]:
         logger.debug(r)
 
 
-def parse_json_pinecone(file_dir: str) -> List[Dict]:
+def normalise_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds a question record from an item of the API `data` list."""
+
+    return {
+        'id': item.get('id'),
+        'title': item.get('title'),
+        'keywords': item.get('keywords'),
+        'shortAnswer': item.get('shortAnswer'),
+        'createdAt': item.get('createdAt'),
+    }
+
+
+def corpus_index_path(corpus_path: str) -> str:
+    """Returns the path of the offset index of a consolidated corpus."""
+
+    return f"{corpus_path}.idx"
+
+
+def reset_corpus(corpus_path: str = CORPUS_PATH) -> None:
+    """Removes a consolidated corpus together with its offset index."""
+
+    for path in (corpus_path, corpus_index_path(corpus_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def corpus_exists(corpus_path: str = CORPUS_PATH) -> bool:
+    """Checks that a corpus and its offset index are both on disk."""
+
+    return os.path.exists(corpus_path) and os.path.exists(corpus_index_path(corpus_path))
+
+
+def replace_corpus(src_path: str, corpus_path: str = CORPUS_PATH) -> None:
+    """
+    Replaces a corpus with a completely written one (e.g. `<corpus>.tmp`).
+
+    The old index is removed first, and the new index is moved in last. If the
+    process dies in between, the corpus has no index, so `corpus_exists` is
+    False and the next crawl rebuilds it instead of trusting a partial file.
+    """
+
+    index_path = corpus_index_path(corpus_path)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    os.replace(src_path, corpus_path)
+    os.replace(corpus_index_path(src_path), index_path)
+
+
+def append_corpus(
+    items: Iterable[Dict[str, Any]],
+    corpus_path: str = CORPUS_PATH,
+    label: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Parse a JSON string and return the corresponding Python object.
+    Appends API items to a consolidated corpus as one gzip member of JSON lines.
+
+    The corpus is append-only: every call adds a new gzip member at the end of
+    the file and an entry (`offset`, `length`, `count`, `label`) to the index,
+    so a member can be read back without decompressing the whole file.
 
     Args:
-        file_dir (str): PAth to JSON folder to parse.
+        items (Iterable[Dict[str, Any]]): Items of the API `data` list.
+        corpus_path (str): Path to the `.jsonl.gz` corpus.
+        label (Optional[str]): Name of the member (e.g. `page_3`).
 
     Returns:
-        Any: Python object parsed from the JSON string.
+        Dict[str, Any]: Index entry of the written member.
+    """
 
-    Raises:
-        json.JSONDecodeError: If the input string is not valid JSON.
+    lines = [json.dumps(item, ensure_ascii=False, separators=(',', ':')) for item in items]
+    member = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8') if lines else b'')
+
+    os.makedirs(os.path.dirname(corpus_path) or '.', exist_ok=True)
+    with open(corpus_path, 'ab') as f:
+        offset = f.seek(0, os.SEEK_END)
+        f.write(member)
+
+    index_path = corpus_index_path(corpus_path)
+    index = load_json_manifest(index_path) or {'members': []}
+    entry = {'offset': offset, 'length': len(member), 'count': len(lines), 'label': label}
+    index['members'].append(entry)
+    save_json_manifest(index, index_path)
+
+    logger.debug(f"Appended {len(lines)} items to `{corpus_path}` at offset {offset}.")
+    return entry
+
+
+def _loads(line: bytes) -> Any:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def _iter_corpus(
+    corpus_path: str,
+    latest_only: bool,
+    decode: Callable[[bytes], Dict[str, Any]],
+) -> Generator[Dict[str, Any], None, None]:
+    index = load_json_manifest(corpus_index_path(corpus_path))
+    members = index.get('members', [])
+    if not members:
+        return
+    if not os.path.exists(corpus_path):
+        logger.warning(f"Corpus `{corpus_path}` is missing, its index is ignored.")
+        return
+    if os.path.getsize(corpus_path) == 0:
+        return
+
+    seen = set()
+    with open(corpus_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for entry in (reversed(members) if latest_only else members):
+            payload = gzip.decompress(mm[entry['offset']:entry['offset'] + entry['length']])
+            for line in payload.splitlines():
+                item = decode(line)
+                if latest_only:
+                    key = str(item.get('id'))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                yield item
+
+
+def iter_corpus_items(
+    corpus_path: str = CORPUS_PATH,
+    latest_only: bool = True,
+) -> Generator[Dict[str, Any], None, None]:
     """
+    Reads API items from a consolidated corpus through a memory map.
 
-    json_list = get_all_json_files(file_dir)
+    Members are located by the offset index and decompressed one at a time.
+    With `latest_only` members are read from the newest one and every question
+    id is yielded once, so appended updates win over older versions. Lines are
+    decoded with `orjson` when installed.
 
-    if not json_list:
-        logger.error(f"list of FILES is empty.")
+    Args:
+        corpus_path (str): Path to the `.jsonl.gz` corpus.
+        latest_only (bool): Yield only the latest version of every question.
+
+    Yields:
+        Dict[str, Any]: Items of the API `data` list.
+    """
+
+    yield from _iter_corpus(corpus_path, latest_only, _loads)
+
+
+def iter_question_records(
+    file_dir: str,
+    json_list: Optional[List[str]] = None,
+) -> Generator[Dict[str, Any], None, None]:
+    """
+    Reads every JSON file once and yields normalised question records.
+
+    Only one file is held in memory at a time, so the stream can be consumed
+    by several sinks in batches (see `fan_out_records`). If `file_dir` points
+    to a consolidated `.jsonl.gz` corpus, records are read from it instead.
+
+    Args:
+        file_dir (str): Path to JSON folder (or consolidated corpus) to parse.
+        json_list (Optional[List[str]]): Files to read. If None, all `.json` files
+            of `file_dir` are read.
+
+    Yields:
+        Dict[str, Any]: Record with `id`, `title`, `keywords`, `shortAnswer`, `createdAt`.
+
+    Raises:
+        ValueError: If a file can't be read.
+    """
+
+    if json_list is None and os.path.isfile(file_dir):
+        # typed decoding skips the fields records don't need
+        yield from _iter_corpus(file_dir, True, decode_item_line)
         return
 
-    try:
-        results = []
-        for filename in json_list:
-            data = read_json_file(filename)
-
-            if data is None:
-                logger.error(f"file {filename} is empty.")
-                return
-
-            for item in data['data']:
-                parsed = {
-                    '_id': str(item.get('id')),
-                    'title': item.get('title'),
-                    'tags': item.get('keywords'),
-                    'url': QUESTION_URL.format(item.get('id')),
-                }
-                results.append(parsed)
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decoding failed: {e}")
-        raise
-    return results
+    if json_list is None:
+        json_list = get_all_json_files(file_dir)
 
+    for filename in json_list:
+        data = read_json_file(filename)
 
-def parse_json_postgres_question(file_dir: str) -> List[Tuple]:
+        if data is None:
+            logger.error(f"file {filename} is empty.")
+            raise ValueError(f"File {filename} can't be read.")
+
+        for item in data['data']:
+            yield normalise_item(item)
+
+
+def to_pinecone_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds a Pinecone record from a question record."""
+
+    return {
+        '_id': str(record['id']),
+        'title': record['title'],
+        'tags': record['keywords'],
+        'url': QUESTION_URL.format(record['id']),
+    }
+
+
+def keywords_text(keywords: Any) -> Optional[str]:
+    """Joins question keywords (a list, or its string form in older dumps) into searchable text."""
+
+    if not keywords:
+        return None
+    if isinstance(keywords, str):
+        return keywords
+    return ' '.join(str(keyword) for keyword in keywords)
+
+
+def to_question_row(record: Dict[str, Any]) -> Tuple:
+    """Builds a row of table `QUESTIONS` from a question record."""
+
+    return (
+        record['id'],
+        record['title'],
+        record['createdAt'],
+        keywords_text(record.get('keywords')),
+        record.get('shortAnswer'),
+    )
+
+
+def to_answer_row(record: Dict[str, Any]) -> Tuple:
+    """Builds a row of table `ANSWERS` from a question record."""
+
+    return (record['id'], record['shortAnswer'])
+
+
+def fan_out_records(
+    records: Iterable[Dict[str, Any]],
+    sinks: Sequence[RecordSink],
+    batch_size: int = RECORD_BATCH_SIZE,
+) -> int:
     """
-    Parse a JSON string and return the corresponding Python object.
-    Parse DATA for table `QUESTIONS`
+    Sends one stream of records to several sinks in batches.
+
+    Every sink is a pair `(transform, consume)`: `transform` builds a sink item
+    from a record, `consume` receives a list of up to `batch_size` items.
+    Batches are flushed to the sinks in the given order, so e.g. questions are
+    stored before the answers which reference them.
 
     Args:
-        file_dir (str): PAth to JSON folder to parse.
+        records (Iterable[Dict[str, Any]]): Stream of question records.
+        sinks (Sequence[RecordSink]): Pairs of `(transform, consume)` callables.
+        batch_size (int): Maximum number of items per batch.
 
     Returns:
-        Any: Python object parsed from the JSON string.
+        int: Number of processed records.
+    """
 
-    Raises:
-        json.JSONDecodeError: If the input string is not valid JSON.
+    buffers = [[] for _ in sinks]
+
+    def flush() -> None:
+        for (_, consume), buffer in zip(sinks, buffers):
+            if buffer:
+                consume(buffer[:])
+                buffer.clear()
+
+    count = 0
+    for record in records:
+        for (transform, _), buffer in zip(sinks, buffers):
+            buffer.append(transform(record))
+        count += 1
+
+        if count % batch_size == 0:
+            flush()
+    flush()
+
+    logger.debug(f"Fanned out {count} records to {len(sinks)} sinks.")
+    return count
+
+
+def _struct_record(item: "QuestionItem") -> Dict[str, Any]:
+    return {
+        'id': item.id,
+        'title': item.title,
+        'keywords': item.keywords,
+        'shortAnswer': item.shortAnswer,
+        'createdAt': item.createdAt,
+    }
+
+
+def decode_page(raw: bytes) -> List[Dict[str, Any]]:
+    """
+    Decodes a page file into question records with the fastest available decoder.
+
+    Uses typed `msgspec` structs when installed, then `orjson`, then stdlib `json`.
+
+    Args:
+        raw (bytes): Content of a `page_N.json` file.
+
+    Returns:
+        List[Dict[str, Any]]: Normalised question records.
+    """
+
+    if msgspec is not None:
+        return [_struct_record(item) for item in _page_decoder.decode(raw).data]
+
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    return [normalise_item(item) for item in data['data']]
+
+
+def decode_item_line(line: bytes) -> Dict[str, Any]:
+    """Decodes one JSON line of a consolidated corpus into a question record."""
+
+    if msgspec is not None:
+        return _struct_record(_item_decoder.decode(line))
+
+    return normalise_item(_loads(line))
+
+
+def _load_file_records(filename: str) -> List[Dict[str, Any]]:
+    with open(filename, 'rb') as f:
+        return decode_page(f.read())
+
+
+def _load_corpus_member(member: Tuple[str, int, int]) -> List[Dict[str, Any]]:
+    corpus_path, offset, length = member
+    with open(corpus_path, 'rb') as f:
+        f.seek(offset)
+        payload = gzip.decompress(f.read(length))
+    return [decode_item_line(line) for line in payload.splitlines()]
+
+
+def iter_question_records_parallel(
+    file_dir: str,
+    workers: Optional[int] = None,
+    chunksize: int = 4,
+) -> Generator[Dict[str, Any], None, None]:
     """
+    Parses JSON files (or corpus members) in a process pool.
+
+    Opt-in alternative to `iter_question_records` for backfills and re-indexing:
+    files are decoded on all cores with `decode_page`, records keep the same
+    deterministic order as the serial reader.
 
+    Args:
+        file_dir (str): Path to JSON folder (or consolidated corpus) to parse.
+        workers (Optional[int]): Number of processes. Defaults to CPU count.
+        chunksize (int): Number of files sent to a process at once.
+
+    Yields:
+        Dict[str, Any]: Record with `id`, `title`, `keywords`, `shortAnswer`, `createdAt`.
+    """
+
+    latest_only = os.path.isfile(file_dir)
+    if latest_only:
+        index = load_json_manifest(corpus_index_path(file_dir))
+        tasks = [
+            (file_dir, entry['offset'], entry['length'])
+            for entry in reversed(index.get('members', []))
+        ]
+        loader = _load_corpus_member
+    else:
+        tasks = get_all_json_files(file_dir)
+        loader = _load_file_records
+
+    seen = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for records in pool.map(loader, tasks, chunksize=chunksize):
+            for record in records:
+                if latest_only:
+                    key = str(record['id'])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                yield record
+
+
+def _parse_records(file_dir: str, transform: Callable[[Dict[str, Any]], Any]) -> Optional[List[Any]]:
     json_list = get_all_json_files(file_dir)
 
     if not json_list:
@@ -155,69 +509,54 @@ def parse_json_postgres_question(file_dir: str) -> List[Tuple]:
         return
 
     try:
-        results = []
-        for filename in json_list:
-            data = read_json_file(filename)
-
-            if data is None:
-                logger.error(f"file {filename} is empty.")
-                return
-
-            for item in data['data']:
-                parsed = {
-                    'id': item.get('id'),
-                    'title': item.get('title'),
-                    # 'tags': item.get('keywords'),
-                    'createdAt': item.get('createdAt'),
-                }
-                results.append(tuple(parsed.values()))
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decoding failed: {e}")
-        raise
-    return results
+        return [transform(record) for record in iter_question_records(file_dir, json_list)]
+    except ValueError:
+        return
 
 
-def parse_json_postgres_answer(file_dir: str) -> List[Tuple]:
+def parse_json_pinecone(file_dir: str) -> List[Dict]:
     """
-    Parse a JSON string and return the corresponding Python object.
-    Parse DATA for table `ANSWERS`
+    Parse JSON files and return records for Pinecone.
 
     Args:
         file_dir (str): PAth to JSON folder to parse.
 
     Returns:
-        Any: Python object parsed from the JSON string.
+        List[Dict]: Records with `_id`, `title`, `tags`, `url`, or None if
+            no files were found or a file can't be read.
+    """
 
-    Raises:
-        json.JSONDecodeError: If the input string is not valid JSON.
+    return _parse_records(file_dir, to_pinecone_record)
+
+
+def parse_json_postgres_question(file_dir: str) -> List[Tuple]:
     """
+    Parse JSON files and return rows for table `QUESTIONS`.
 
-    json_list = get_all_json_files(file_dir)
+    Args:
+        file_dir (str): PAth to JSON folder to parse.
 
-    if not json_list:
-        logger.error(f"list of FILES is empty.")
-        return
+    Returns:
+        List[Tuple]: Rows `(id, title, createdAt, keywords, shortAnswer)`, or None if no files were
+            found or a file can't be read.
+    """
 
-    try:
-        results = []
-        for filename in json_list:
-            data = read_json_file(filename)
-
-            if data is None:
-                logger.error(f"file {filename} is empty.")
-                return
-
-            for item in data['data']:
-                parsed = {
-                    'id': item.get('id'),
-                    'shortAnswer': item.get('shortAnswer'),
-                    
-                }
-                results.append(tuple(parsed.values()))
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decoding failed: {e}")
-        raise
-    return results
+    return _parse_records(file_dir, to_question_row)
+
+
+def parse_json_postgres_answer(file_dir: str) -> List[Tuple]:
+    """
+    Parse JSON files and return rows for table `ANSWERS`.
+
+    Args:
+        file_dir (str): PAth to JSON folder to parse.
+
+    Returns:
+        List[Tuple]: Rows `(id, shortAnswer)`, or None if no files were found
+            or a file can't be read.
+    """
+
+    return _parse_records(file_dir, to_answer_row)
 
 if __name__ == '__main__':
     # print(get_all_json_files())
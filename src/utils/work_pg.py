@@ -1,13 +1,15 @@
-from typing import List, Tuple
+import io
+from itertools import chain, islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from psycopg2 import (
     sql, 
     Error,
 )
-from src.utils.helper import (
-    get_db_connection, 
-    get_postgres_params,
-)
+from psycopg2.extras import execute_values
+from src.utils.config import COPY_CHUNK_SIZE, EMBEDDING_BATCH_SIZE, VECTOR_BACKEND
+from src.utils.db_pool import pooled_connection
+from src.utils.helper import get_param_from_env
 from src.utils.logger import setup_logger
 
 logger = setup_logger(level=10)
@@ -19,30 +21,40 @@ def read_sql_file(file_path: str) -> str:
         return file.read()
 
 
-def init_db() -> None:
-    """Initializes the database by executing SQL commands from a file."""
+def init_db(pgvector: Optional[bool] = None) -> None:
+    """
+    Initializes the database by executing SQL commands from files.
 
-    conn = get_db_connection(get_postgres_params())
-    
-    if conn is None:
-        logger.error("Failed to establish a connection to the database.")
-        raise ConnectionError("Failed to establish database connection")
+    Args:
+        pgvector (Optional[bool]): Also create the `embedding` column and its
+            HNSW index, needs the `vector` extension. By default only when
+            `VECTOR_BACKEND` (env or config) is `pgvector`.
+    """
+
+    if pgvector is None:
+        pgvector = (get_param_from_env("VECTOR_BACKEND") or VECTOR_BACKEND).lower() == "pgvector"
+    ddl_files = ["src/sql_ddl/init_sql_ddl.sql"]
+    if pgvector:
+        ddl_files.append("src/sql_ddl/pgvector_sql_ddl.sql")
 
     try:
-        with conn.cursor() as cur:
-            sql_commands = read_sql_file(file_path="src/sql_ddl/init_sql_ddl.sql")
-            for command in sql_commands.split(';'):
-                command = command.strip()
-                logger.debug(f"command={command}")
-                if command:
-                    cur.execute(command)
-            conn.commit()
-            logger.debug("DB created.")
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                for ddl_file in ddl_files:
+                    sql_commands = read_sql_file(file_path=ddl_file)
+                    for command in sql_commands.split(';'):
+                        command = command.strip()
+                        logger.debug(f"command={command}")
+                        if command:
+                            cur.execute(command)
+                conn.commit()
+                logger.debug("DB created.")
+    except ConnectionError:
+        logger.error("Failed to establish a connection to the database.")
+        raise
     except Error as e:
         logger.error(f"Error initializing the database: {e}")
         raise
-    finally:
-        conn.close()
 
 
 def insert_many_rows(
@@ -80,24 +92,331 @@ def insert_many_rows(
         fields=sql.SQL(', ').join(map(sql.Identifier, columns)),
     )
 
-    conn = None
     try:
-        conn = get_db_connection(get_postgres_params())
-        if conn is None:
-            raise ConnectionError("Failed to establish database connection")
-
-        with conn.cursor() as cur:
-            args_str = b','.join(
-                cur.mogrify(f"({values_placeholder})", row) for row in rows
-            )
-            cur.execute(insert_query + sql.SQL(args_str.decode('utf-8')))
-        conn.commit()
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                args_str = b','.join(
+                    cur.mogrify(f"({values_placeholder})", row) for row in rows
+                )
+                cur.execute(insert_query + sql.SQL(args_str.decode('utf-8')))
+            conn.commit()
         logger.debug(f"Successfully inserted {len(rows)} rows into '{table_name}'.")
     except Exception as e:
         logger.error(f"Error: {e}")
         raise
-    finally:
-        conn.close()
+
+
+def to_copy_value(value: Any) -> str:
+    """Formats a value for `COPY ... FROM STDIN` in text format."""
+
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+class CopyRowStream(io.TextIOBase):
+    """
+    File-like adapter which renders rows for `COPY ... FROM STDIN` on demand.
+
+    Rows are pulled from the iterator only when `copy_expert` reads the next
+    block, so at most one block of text is held in memory.
+    """
+
+    def __init__(self, rows: Iterable[Tuple]):
+        self._rows = iter(rows)
+        self._buffer = ''
+        self.count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> str:
+        lines = []
+        length = len(self._buffer)
+        while size is None or size < 0 or length < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = '\t'.join(map(to_copy_value, row)) + '\n'
+            lines.append(line)
+            length += len(line)
+            self.count += 1
+
+        data = self._buffer + ''.join(lines)
+        if size is None or size < 0:
+            self._buffer = ''
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def _chunks(rows: Iterable[Tuple], chunk_size: int) -> Iterator[Iterator[Tuple]]:
+    rows = iter(rows)
+    for first in rows:
+        yield chain([first], islice(rows, chunk_size - 1))
+
+
+def copy_many_rows(
+    table_name: str,
+    columns: List[str],
+    rows: Iterable[Tuple],
+    chunk_size: int = COPY_CHUNK_SIZE,
+) -> int:
+    """
+    Bulk-loads rows into a PostgreSQL table with `COPY ... FROM STDIN`.
+
+    Rows are streamed from the iterator through `CopyRowStream`, so they are
+    never rendered into one statement. Every chunk of `chunk_size` rows is
+    copied and committed in its own transaction.
+
+    Args:
+        table_name (str): Name of the target table.
+        columns (List[str]): List of column names to insert data into.
+        rows (Iterable[Tuple]): Rows to insert, may be a generator.
+        chunk_size (int): Number of rows per transaction.
+
+    Returns:
+        int: Number of inserted rows.
+
+    Raises:
+        ConnectionError: If the database connection could not be established.
+    """
+
+    copy_query = sql.SQL("COPY {table} ({fields}) FROM STDIN").format(
+        table=sql.Identifier(table_name),
+        fields=sql.SQL(', ').join(map(sql.Identifier, columns)),
+    )
+
+    total = 0
+    try:
+        with pooled_connection() as conn:
+            try:
+                for chunk in _chunks(rows, chunk_size):
+                    stream = CopyRowStream(chunk)
+                    with conn.cursor() as cur:
+                        cur.copy_expert(copy_query, stream)
+                    conn.commit()
+                    total += stream.count
+                    logger.debug(f"Copied {stream.count} rows into '{table_name}'.")
+            except Exception:
+                conn.rollback()
+                raise
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise
+
+    if not total:
+        logger.error("No rows to insert.")
+    else:
+        logger.debug(f"Successfully copied {total} rows into '{table_name}'.")
+    return total
+
+
+def upsert_many_rows(
+    table_name: str,
+    columns: List[str],
+    rows: Iterable[Tuple],
+    conflict_columns: List[str],
+    chunk_size: int = COPY_CHUNK_SIZE,
+) -> int:
+    """
+    Idempotently loads rows: new rows are inserted, changed rows are updated.
+
+    Every chunk is copied into a temporary staging table and merged into the
+    target with `INSERT ... ON CONFLICT DO UPDATE`. Rows whose content didn't
+    change are not touched, so triggers and indexes only see the real changes.
+
+    Args:
+        table_name (str): Name of the target table.
+        columns (List[str]): List of column names to load.
+        rows (Iterable[Tuple]): Rows to load, may be a generator.
+        conflict_columns (List[str]): Columns of the unique key (e.g. `['id']`).
+        chunk_size (int): Number of rows per transaction.
+
+    Returns:
+        int: Number of inserted or updated rows.
+
+    Raises:
+        ConnectionError: If the database connection could not be established.
+    """
+
+    stage_name = f"{table_name}_stage"
+    table = sql.Identifier(table_name)
+    stage = sql.Identifier(stage_name)
+    fields = sql.SQL(', ').join(map(sql.Identifier, columns))
+    conflict_fields = sql.SQL(', ').join(map(sql.Identifier, conflict_columns))
+    update_columns = [c for c in columns if c not in conflict_columns]
+
+    create_stage_query = sql.SQL(
+        "CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {fields} FROM {table} WITH NO DATA"
+    ).format(stage=stage, fields=fields, table=table)
+    copy_query = sql.SQL("COPY {stage} ({fields}) FROM STDIN").format(stage=stage, fields=fields)
+
+    if update_columns:
+        conflict_action = sql.SQL("DO UPDATE SET {assignments} WHERE ({current}) IS DISTINCT FROM ({excluded})").format(
+            assignments=sql.SQL(', ').join(
+                sql.SQL("{col} = EXCLUDED.{col}").format(col=sql.Identifier(c)) for c in update_columns
+            ),
+            current=sql.SQL(', ').join(sql.Identifier(table_name, c) for c in update_columns),
+            excluded=sql.SQL(', ').join(sql.Identifier('excluded', c) for c in update_columns),
+        )
+    else:
+        conflict_action = sql.SQL("DO NOTHING")
+
+    merge_query = sql.SQL(
+        "INSERT INTO {table} ({fields}) "
+        "SELECT DISTINCT ON ({conflict}) {fields} FROM {stage} "
+        "ON CONFLICT ({conflict}) {action}"
+    ).format(table=table, fields=fields, conflict=conflict_fields, stage=stage, action=conflict_action)
+
+    total = changed = 0
+    try:
+        with pooled_connection() as conn:
+            try:
+                for chunk in _chunks(rows, chunk_size):
+                    stream = CopyRowStream(chunk)
+                    with conn.cursor() as cur:
+                        cur.execute(create_stage_query)
+                        cur.copy_expert(copy_query, stream)
+                        cur.execute(merge_query)
+                        changed += max(cur.rowcount, 0)
+                    conn.commit()
+                    total += stream.count
+            except Exception:
+                conn.rollback()
+                raise
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise
+
+    logger.debug(f"Upserted {total} rows into '{table_name}', {changed} inserted or changed.")
+    return changed
+
+
+def delete_rows(table_name: str, key_column: str, keys: Sequence[Any]) -> int:
+    """
+    Deletes rows by their key in one transaction.
+
+    Args:
+        table_name (str): Name of the target table.
+        key_column (str): Column to match the keys against (e.g. `'id'`).
+        keys (Sequence[Any]): Keys of the rows to delete.
+
+    Returns:
+        int: Number of deleted rows.
+
+    Raises:
+        ConnectionError: If the database connection could not be established.
+    """
+
+    if not keys:
+        return 0
+
+    delete_query = sql.SQL("DELETE FROM {table} WHERE {key} = ANY(%s)").format(
+        table=sql.Identifier(table_name),
+        key=sql.Identifier(key_column),
+    )
+
+    try:
+        with pooled_connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(delete_query, (list(keys),))
+                    deleted = max(cur.rowcount, 0)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise
+
+    logger.debug(f"Deleted {deleted} rows from '{table_name}'.")
+    return deleted
+
+
+def to_vector_literal(vector: Sequence[float]) -> str:
+    """Formats an embedding as a pgvector text literal, e.g. `[0.1,0.2]`."""
+
+    return '[' + ','.join(f"{float(x):.7g}" for x in vector) + ']'
+
+
+def backfill_embeddings(
+    embed: Callable[[List[str]], Any],
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+) -> int:
+    """
+    Fills `questions.embedding` for new questions and questions with an edited title.
+
+    A row is stale if `embedding_md5` differs from the md5 of its title. Stale
+    rows are embedded and updated batch by batch, one transaction per batch,
+    so an interrupted backfill continues where it stopped.
+
+    Args:
+        embed (Callable[[List[str]], Any]): Function which embeds a batch of titles,
+            must be the model the `embedding` column was created for.
+        batch_size (int): Number of titles per batch.
+
+    Returns:
+        int: Number of updated rows.
+
+    Raises:
+        ConnectionError: If the database connection could not be established.
+    """
+
+    select_query = (
+        "SELECT id, title, md5(title) FROM questions "
+        "WHERE title IS NOT NULL AND embedding_md5 IS DISTINCT FROM md5(title) "
+        "ORDER BY id LIMIT %s"
+    )
+    # the md5 of the embedded title is stored, not of the current one, so a
+    # title edited in between stays stale and is picked up by the next batch
+    update_query = (
+        "UPDATE questions AS q SET embedding = v.embedding::vector, embedding_md5 = v.md5 "
+        "FROM (VALUES %s) AS v (id, embedding, md5) WHERE q.id = v.id"
+    )
+
+    total = 0
+    try:
+        with pooled_connection() as conn:
+            try:
+                while True:
+                    with conn.cursor() as cur:
+                        cur.execute(select_query, (batch_size,))
+                        rows = cur.fetchall()
+                    if not rows:
+                        break
+                    vectors = embed([title for _, title, _ in rows])
+                    with conn.cursor() as cur:
+                        execute_values(
+                            cur,
+                            update_query,
+                            [
+                                (question_id, to_vector_literal(vector), md5)
+                                for (question_id, _, md5), vector in zip(rows, vectors)
+                            ],
+                            page_size=batch_size,
+                        )
+                    conn.commit()
+                    total += len(rows)
+            except Exception:
+                conn.rollback()
+                raise
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise
+
+    logger.debug(f"Backfilled {total} question embeddings.")
+    return total
+
 
 if __name__ == '__main__':
     pass
\ No newline at end of file
@@ -1,15 +1,70 @@
+import json
 import os
-from typing import Any, Dict, Generator, List, Optional
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Generator, Iterable, List, Optional, Set, Tuple
 
 from dotenv import load_dotenv
 from pinecone import Pinecone
 
-# from src.utils.config import JSON_DIR
+try:
+    from pinecone.errors import PineconeConnectionError
+except ImportError:
+    PineconeConnectionError = ConnectionError
+
+from src.utils.config import (
+    JSON_DIR,
+    PINECONE_BACKOFF_BASE,
+    PINECONE_BACKOFF_MAX,
+    PINECONE_CHECKPOINT_PATH,
+    PINECONE_DELETE_BATCH_SIZE,
+    PINECONE_MANIFEST_PATH,
+    PINECONE_MAX_BATCH_BYTES,
+    PINECONE_MAX_IN_FLIGHT,
+    PINECONE_MAX_RETRIES,
+)
+from src.utils.helper import content_hash, load_json_manifest, save_json_manifest
 from src.utils.logger import setup_logger
-from src.utils.work_json import parse_json_pinecone
+from src.utils.work_json import iter_question_records, to_pinecone_record
 
 
 MAX_BATCH_SIZE=50
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, PineconeConnectionError)
+
+
+def load_checkpoint(path: str) -> Dict[str, str]:
+    """
+    Reads an upsert checkpoint log: one JSON object of `{id: content hash}` per batch.
+
+    A line cut short by a crash while it was written is skipped.
+    """
+
+    done: Dict[str, str] = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.update(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return done
+
+
+def record_size(record: Dict[str, Any]) -> int:
+    """Returns the size of a record in the request body, in bytes."""
+    return len(json.dumps(record, ensure_ascii=False).encode('utf-8'))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Checks whether an upsert error is transient (throttling, server or network error)."""
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if status is not None:
+        return int(status) in RETRYABLE_STATUSES
+    return isinstance(error, TRANSIENT_ERRORS)
 
 class PineconeClient:
     """
@@ -47,6 +102,22 @@ class PineconeClient:
         except:
             pass
 
+    def warm_up(self) -> None:
+        """
+        Opens the connection to the index ahead of the first query.
+
+        Resolves the index host and runs a cheap `describe_index_stats` call, so
+        DNS, TLS handshake and host lookup are not paid by the first request.
+        Errors are logged only, semantic search degrades on its own.
+        """
+        try:
+            if not hasattr(self, "dense_index"):
+                self.dense_index = self.pc.Index(self.index_name)
+            self.dense_index.describe_index_stats()
+            self.logger.debug(f"Index `{self.index_name}` warmed up.")
+        except Exception as e:
+            self.logger.warning(f"Warm-up of index `{self.index_name}` failed: {e}")
+
     def create_index(self) -> None:
         """
         Create Pinecone index if it does not exist.
@@ -77,31 +148,262 @@ class PineconeClient:
         for i in range(0, len(records), max_batch_size):
             yield records[i:i + max_batch_size]
 
-    def upsert_data(self, file_dir: str) -> None:
+    def batch_records_by_size(
+            self,
+            records: Iterable[Dict[str, Any]],
+            max_batch_size: int = MAX_BATCH_SIZE,
+            max_batch_bytes: int = PINECONE_MAX_BATCH_BYTES,
+    ) -> Generator[List[Dict[str, Any]], None, None]:
         """
-        Parse JSON data and upsert into Pinecone index.
+        Streams records into batches limited by record count and payload bytes.
+        """
+        batch, batch_bytes = [], 0
+        for record in records:
+            size = record_size(record)
+            if batch and (len(batch) >= max_batch_size or batch_bytes + size > max_batch_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(record)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    def _upsert_batch(self, batch: List[Dict[str, Any]], max_retries: int = PINECONE_MAX_RETRIES) -> None:
+        for attempt in range(max_retries + 1):
+            try:
+                self.dense_index.upsert_records(self.namespace, batch)
+                return
+            except Exception as e:
+                if attempt == max_retries or not is_retryable(e):
+                    raise
+                # exponential backoff with full jitter
+                delay = random.uniform(0, min(PINECONE_BACKOFF_MAX, PINECONE_BACKOFF_BASE * 2 ** attempt))
+                self.logger.warning(f"Upsert failed ({e}), retry {attempt + 1}/{max_retries} in {delay:.1f}s.")
+                time.sleep(delay)
+
+    def upsert_records(
+            self,
+            records: Iterable[Dict[str, Any]],
+            max_in_flight: int = PINECONE_MAX_IN_FLIGHT,
+            checkpoint_path: Optional[str] = None,
+    ) -> int:
+        """
+        Upserts a stream of records with a bounded number of concurrent batches.
+
+        Batches are sized by record count and payload bytes. Throttled or failed
+        requests are retried with exponential backoff and jitter. With
+        `checkpoint_path`, the ids and content hashes of every upserted batch
+        are appended to a checkpoint log as one line, so a retried task skips
+        records which were already upserted unchanged. The checkpoint is
+        removed on success.
 
         Args:
-            file_dir (str): Directory path containing JSON files.
+            records (Iterable[Dict[str, Any]]): Pinecone records, may be a generator.
+            max_in_flight (int): Maximum number of batches sent at the same time.
+            checkpoint_path (Optional[str]): Path to the checkpoint file.
+
+        Returns:
+            int: Number of upserted records.
         """
-        try:
-            records = parse_json_pinecone(file_dir)
-            self.logger.debug(f"Parsed {len(records)} records from JSON.")
+        done: Dict[str, str] = load_checkpoint(checkpoint_path) if checkpoint_path else {}
+        log_lock = threading.Lock()
+        if done:
+            self.logger.info(f"Resume upsert, {len(done)} records done before.")
+        if checkpoint_path:
+            os.makedirs(os.path.dirname(checkpoint_path) or '.', exist_ok=True)
+        log = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
 
-            for i, batch in enumerate(self.batch_records(records)):
-                self.dense_index.upsert_records(self.namespace, batch)
-                self.logger.debug(f"Upserted batch {i + 1} with {len(batch)} records.")
+        def pending() -> Generator[Dict[str, Any], None, None]:
+            for record in records:
+                if done.get(record['_id']) != content_hash(record):
+                    yield record
+
+        def send(batch: List[Dict[str, Any]]) -> int:
+            self._upsert_batch(batch)
+            if log is not None:
+                line = json.dumps({record['_id']: content_hash(record) for record in batch}) + '\n'
+                with log_lock:
+                    log.write(line)
+                    log.flush()
+            return len(batch)
+
+        total = 0
+        in_flight: Set[Future] = set()
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            try:
+                for i, batch in enumerate(self.batch_records_by_size(pending())):
+                    if len(in_flight) >= max_in_flight:
+                        completed, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        total += sum(future.result() for future in completed)
+                    in_flight.add(executor.submit(send, batch))
+                    self.logger.debug(f"Upsert batch {i + 1} with {len(batch)} records.")
+                total += sum(future.result() for future in in_flight)
+            except Exception:
+                for future in in_flight:
+                    future.cancel()
+                raise
+            finally:
+                if log is not None:
+                    # the executor is shut down first, so no batch writes into a closed log
+                    executor.shutdown(wait=True)
+                    log.close()
+
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return total
+
+    def delete_ids(self, ids: List[str], batch_size: int = PINECONE_DELETE_BATCH_SIZE) -> int:
+        """
+        Deletes records by id from the namespace.
+
+        Returns:
+            int: Number of deleted ids.
+        """
+        for i in range(0, len(ids), batch_size):
+            self.dense_index.delete(ids=ids[i:i + batch_size], namespace=self.namespace)
+        return len(ids)
+
+    def sync_records(
+            self,
+            records: Iterable[Dict[str, Any]],
+            manifest_path: str = PINECONE_MANIFEST_PATH,
+            checkpoint_path: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """
+        Brings the index in line with the full set of records.
+
+        The content hash of every record (`title`, `tags`, `url`) is compared
+        with the manifest of the previous sync. Only new or changed records are
+        upserted, ids missing from `records` are deleted. The manifest is
+        replaced after both steps succeeded.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): All Pinecone records of the dataset.
+            manifest_path (str): Path to the manifest of the last sync.
+            checkpoint_path (Optional[str]): Checkpoint of the upsert, see `upsert_records`.
+
+        Returns:
+            Dict[str, int]: Counts of `upserted`, `deleted` and `unchanged` records.
+
+        Raises:
+            ValueError: If there are no records, to not wipe the index by mistake.
+        """
+        manifest: Dict[str, str] = load_json_manifest(manifest_path)
+        current: Dict[str, str] = {}
+        changed: Dict[str, Dict[str, Any]] = {}
+
+        for record in records:
+            record_hash = content_hash(record)
+            current[record['_id']] = record_hash
+            if manifest.get(record['_id']) == record_hash:
+                changed.pop(record['_id'], None)
+            else:
+                changed[record['_id']] = record
+
+        if not current:
+            raise ValueError("No records to sync, the index is left unchanged.")
 
-            self.logger.info("All data upserted into Pinecone successfully.")
+        removed = [record_id for record_id in manifest if record_id not in current]
+
+        upserted = self.upsert_records(changed.values(), checkpoint_path=checkpoint_path) if changed else 0
+        deleted = self.delete_ids(removed) if removed else 0
+        save_json_manifest(current, manifest_path)
+
+        stats = {
+            "upserted": upserted,
+            "deleted": deleted,
+            "unchanged": len(current) - len(changed),
+        }
+        self.logger.info(f"Pinecone sync done: {stats}.")
+        return stats
+
+    def upsert_data(self, file_dir: str, checkpoint_path: Optional[str] = None) -> int:
+        """
+        Parse JSON data and upsert into Pinecone index.
+
+        Records are streamed from the parser into the upsert pipeline, the
+        corpus is never held in memory as a whole.
+
+        Args:
+            file_dir (str): Directory path containing JSON files (or consolidated corpus).
+            checkpoint_path (Optional[str]): Path to the checkpoint file to resume from.
+
+        Returns:
+            int: Number of upserted records.
+        """
+        try:
+            records = (to_pinecone_record(record) for record in iter_question_records(file_dir))
+            total = self.upsert_records(records, checkpoint_path=checkpoint_path)
+            self.logger.info(f"All data upserted into Pinecone successfully, {total} records.")
+            return total
         except Exception as e:
             self.logger.error(f"An error occurred during upsert: {e}")
             raise
 
 
-def run_pinecone_upsert(file_dir: str) -> None:
+_clients: Dict[Tuple[Optional[str], ...], PineconeClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_pinecone_client(
+    api_key: Optional[str] = None,
+    index_name: Optional[str] = None,
+    namespace: Optional[str] = None,
+) -> PineconeClient:
+    """
+    Returns a long-lived client for the given configuration, creating it on first use.
+
+    The client (and the HTTP connection pool of its index handle) is shared by
+    all threads of the process, so `.env` loading, SDK setup and the index host
+    lookup happen once instead of on every query.
+
+    Args:
+        api_key (Optional[str]): Pinecone API key.
+        index_name (Optional[str]): Pinecone index name.
+        namespace (Optional[str]): Pinecone namespace.
+
+    Returns:
+        PineconeClient: Shared client.
+    """
+    key = (api_key, index_name, namespace)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = PineconeClient(api_key, index_name, namespace)
+                _clients[key] = client
+    return client
+
+
+def reset_pinecone_clients() -> None:
+    """Drops all shared clients, e.g. after the API key was rotated."""
+    with _clients_lock:
+        _clients.clear()
+
+
+def run_pinecone_upsert(file_dir: str, checkpoint_path: str = PINECONE_CHECKPOINT_PATH) -> int:
+    client = PineconeClient()
+    client.create_index()
+    return client.upsert_data(file_dir, checkpoint_path=checkpoint_path)
+
+
+def run_pinecone_sync(
+    file_dir: str = JSON_DIR,
+    manifest_path: str = PINECONE_MANIFEST_PATH,
+    checkpoint_path: str = PINECONE_CHECKPOINT_PATH,
+) -> Dict[str, int]:
+    """
+    Syncs the index with all questions of `file_dir` (see `PineconeClient.sync_records`).
+
+    Returns:
+        Dict[str, int]: Counts of `upserted`, `deleted` and `unchanged` records,
+            pushed to XCom when run by Airflow.
+    """
     client = PineconeClient()
     client.create_index()
-    client.upsert_data(file_dir)
+    records = (to_pinecone_record(record) for record in iter_question_records(file_dir))
+    return client.sync_records(records, manifest_path=manifest_path, checkpoint_path=checkpoint_path)
 
 
 if __name__ == "__main__":
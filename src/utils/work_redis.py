@@ -0,0 +1,38 @@
+from typing import Optional
+
+from src.utils.config import DATASET_VERSION_KEY
+from src.utils.helper import get_param_from_env
+from src.utils.logger import setup_logger
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = setup_logger(level=10)
+
+
+def bump_dataset_version(redis_url: Optional[str] = None) -> Optional[int]:
+    """
+    Increments the dataset version, which invalidates all cached search results.
+
+    Args:
+        redis_url (Optional[str]): Redis URL. If None, `REDIS_URL` from env is used.
+
+    Returns:
+        Optional[int]: New dataset version, or None if Redis isn't configured.
+    """
+
+    redis_url = redis_url or get_param_from_env("REDIS_URL")
+    if not redis_url or redis is None:
+        logger.warning("Redis is not configured, cached search results expire by TTL only.")
+        return None
+
+    client = redis.Redis.from_url(redis_url)
+    try:
+        version = client.incr(DATASET_VERSION_KEY)
+    finally:
+        client.close()
+
+    logger.info(f"Dataset version bumped to {version}.")
+    return version
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+# Imported by package path: the metrics are registered once per process and
+# `query` already imports `src.api.cache`.
+from src.api import cache
+
+
+# Patch logger to avoid cluttering test output
+@pytest.fixture(autouse=True)
+def patch_logger():
+    with patch("src.api.cache.logger") as mock_logger:
+        yield mock_logger
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for `redis.asyncio.Redis`."""
+
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+
+    async def get(self, key):
+        self.gets += 1
+        value = self.data.get(key)
+        return value.encode("utf-8") if isinstance(value, str) else value
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expiry = ex
+
+    async def aclose(self):
+        pass
+
+
+def test_make_cache_key_normalises_query():
+    key = cache.make_cache_key("  Python   GIL ", 10, (0.7, 0.3), "1")
+    assert key == cache.make_cache_key("python gil", 10, (0.7, 0.3), "1")
+    assert key != cache.make_cache_key("python gil", 5, (0.7, 0.3), "1")
+    assert key != cache.make_cache_key("python gil", 10, (0.5, 0.5), "1")
+    assert key != cache.make_cache_key("python gil", 10, (0.7, 0.3), "2")
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    local = cache.TTLCache(maxsize=2, ttl=60)
+    local.set("a", 1)
+    local.set("b", 2)
+    local.get("a")
+    local.set("c", 3)
+
+    assert local.get("a") == 1
+    assert local.get("b") is None
+    assert len(local) == 2
+
+
+def test_ttl_cache_expires_entries():
+    local = cache.TTLCache(maxsize=2, ttl=0)
+    local.set("a", 1)
+    assert local.get("a") is None
+
+
+def test_ttl_cache_entry_ttl_overrides_default():
+    local = cache.TTLCache(maxsize=2, ttl=60)
+    local.set("a", 1, ttl=0)
+    local.set("b", 2)
+    assert local.get("a") is None
+    assert local.get("b") == 2
+
+
+def test_cursor_roundtrip():
+    cursor = cache.encode_cursor("3", 20)
+    assert "=" not in cursor
+    assert cache.decode_cursor(cursor) == ("3", 20)
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "", cache.encode_cursor("3", -10), "eyJ2IjoiMyJ9"])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(ValueError):
+        cache.decode_cursor(cursor)
+
+
+def test_search_cache_set_uses_entry_ttl():
+    client = FakeRedis()
+    search_cache = cache.SearchCache(client=client, ttl=600)
+
+    asyncio.run(search_cache.set("key", [], ttl=120))
+    assert client.expiry == 120
+
+
+def test_search_cache_shares_results_through_redis():
+    client = FakeRedis()
+    first = cache.SearchCache(client=client)
+    second = cache.SearchCache(client=client)
+
+    asyncio.run(first.set("key", [{"question_id": "1"}]))
+
+    assert asyncio.run(second.get("key")) == [{"question_id": "1"}]
+    assert second.local.get("key") == [{"question_id": "1"}]
+
+
+def test_search_cache_keeps_shared_ttl_in_local_tier():
+    client = FakeRedis()
+    first = cache.SearchCache(client=client, ttl=600)
+    second = cache.SearchCache(client=client, ttl=600)
+
+    asyncio.run(first.set("key", ["ranking"], ttl=120))
+    assert asyncio.run(second.get("key")) == ["ranking"]
+
+    expires_at, _ = second.local._data["key"]
+    assert expires_at - cache.time.monotonic() <= 120
+
+
+def test_search_cache_reads_dataset_version():
+    client = FakeRedis()
+    search_cache = cache.SearchCache(client=client, version_ttl=60)
+
+    assert asyncio.run(search_cache.version()) == "0"
+    client.data[cache.DATASET_VERSION_KEY] = "3"
+    # the version is re-read only after `version_ttl`
+    assert asyncio.run(search_cache.version()) == "0"
+
+    search_cache.version_ttl = 0
+    assert asyncio.run(search_cache.version()) == "3"
@@ -0,0 +1,67 @@
+import ast
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+DAG_FILE = Path(__file__).parent.parent / "dags" / "process_YeaHub.py"
+
+# modules the scheduler may import while parsing the DAG file
+ALLOWED_TOP_LEVEL = {"airflow", "datetime", "textwrap", "src.utils.config"}
+
+
+def top_level_imports(tree):
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            yield node.module
+
+
+def test_dag_file_imports_no_project_code_at_parse_time():
+    tree = ast.parse(DAG_FILE.read_text(encoding="utf-8"))
+
+    for module in top_level_imports(tree):
+        assert module in ALLOWED_TOP_LEVEL or module.split(".")[0] in ALLOWED_TOP_LEVEL, module
+
+
+def test_dag_file_has_no_module_level_calls_outside_dag_block():
+    tree = ast.parse(DAG_FILE.read_text(encoding="utf-8"))
+
+    for node in tree.body:
+        if isinstance(node, ast.Expr):
+            assert not isinstance(node.value, ast.Call), ast.unparse(node)
+
+
+def test_extract_data_import_has_no_side_effects(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop("src.extract_data", None)
+
+    importlib.import_module("src.extract_data")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def load_callables():
+    """Executes only the function definitions of the DAG file, Airflow isn't needed for them."""
+    tree = ast.parse(DAG_FILE.read_text(encoding="utf-8"))
+    module = ast.Module(body=[node for node in tree.body if isinstance(node, ast.FunctionDef)], type_ignores=[])
+    namespace = {"FETCH_TASK_ID": "fetch"}
+    exec(compile(module, str(DAG_FILE), "exec"), namespace)
+    return namespace
+
+
+@pytest.mark.parametrize("backend, task", [
+    ("local", "sync_pinecone"),
+    ("pgvector", "sync_pinecone"),
+    ("pinecone", "build_vector_index"),
+])
+def test_vector_store_tasks_skip_other_backends(monkeypatch, backend, task):
+    from unittest.mock import MagicMock
+
+    monkeypatch.setenv("VECTOR_BACKEND", backend)
+    ti = MagicMock()
+
+    assert not load_callables()[task](ti)
+    ti.xcom_pull.assert_not_called()
@@ -5,6 +5,8 @@ from psycopg2.extensions import connection
 
 from src.utils.helper import get_db_connection, get_postgres_params
 
+DDL_PATH = os.path.join(os.path.dirname(__file__), '..', 'src', 'sql_ddl', 'init_sql_ddl.sql')
+
 
 def test_get_db_connection_success():
     conn = get_db_connection(get_postgres_params())
@@ -28,3 +30,103 @@ def test_get_db_connection_fail(monkeypatch):
         "port": "5432"
     })
     assert conn is None
+
+
+def test_search_schema_uses_index_scans():
+    """Applies the DDL in a rolled back transaction, skipped without a reachable Postgres."""
+
+    import psycopg2
+
+    conn = get_db_connection(get_postgres_params())
+    if conn is None:
+        pytest.skip("Postgres is not reachable")
+
+    with open(DDL_PATH, "r", encoding="utf-8") as f:
+        commands = [command.strip() for command in f.read().split(';') if command.strip()]
+
+    try:
+        with conn.cursor() as cur:
+            try:
+                for command in commands:
+                    cur.execute(command)
+            except psycopg2.Error as e:
+                pytest.skip(f"DDL can't be applied here: {e}")
+
+            cur.execute("SET LOCAL enable_seqscan = off")
+            cur.execute(
+                "EXPLAIN SELECT id FROM questions "
+                "WHERE search_tsv @@ plainto_tsquery('russian', 'python')"
+            )
+            plan = "\n".join(row[0] for row in cur.fetchall())
+            assert "questions_search_tsv_gin" in plan
+
+            cur.execute(
+                "EXPLAIN SELECT q.id, a.body_md FROM questions AS q "
+                "JOIN answers AS a ON a.question_id = q.id WHERE q.id = 1"
+            )
+            plan = "\n".join(row[0] for row in cur.fetchall())
+            assert "answers_question_id_key" in plan
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def test_removed_question_disappears_from_questions():
+    """Upserts and deletes through the loaders in a rolled back transaction, skipped without Postgres."""
+
+    from contextlib import contextmanager
+    from unittest.mock import patch
+
+    import psycopg2
+
+    from src.load_data import delete_questions, load_postgres
+
+    conn = get_db_connection(get_postgres_params())
+    if conn is None:
+        pytest.skip("Postgres is not reachable")
+
+    class Uncommitted:
+        """Keeps the loaders' commits inside the test transaction."""
+
+        def __init__(self, conn):
+            self._conn = conn
+
+        def __getattr__(self, name):
+            return getattr(self._conn, name)
+
+        def commit(self):
+            pass
+
+    @contextmanager
+    def test_connection():
+        yield Uncommitted(conn)
+
+    with open(DDL_PATH, "r", encoding="utf-8") as f:
+        commands = [command.strip() for command in f.read().split(';') if command.strip()]
+
+    records = [
+        {"id": 900001, "title": "T1", "createdAt": "2024-01-01", "keywords": [], "shortAnswer": "", "longAnswer": "A1"},
+        {"id": 900002, "title": "T2", "createdAt": "2024-01-01", "keywords": [], "shortAnswer": "", "longAnswer": "A2"},
+    ]
+
+    try:
+        with conn.cursor() as cur:
+            try:
+                for command in commands:
+                    cur.execute(command)
+            except psycopg2.Error as e:
+                pytest.skip(f"DDL can't be applied here: {e}")
+
+        with patch("src.utils.work_pg.pooled_connection", test_connection), \
+                patch("src.load_data.iter_question_records", return_value=iter(records)):
+            load_postgres(file_dir="unused", upsert=True)
+            assert delete_questions(["900002"]) == 1
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM questions WHERE id IN (900001, 900002)")
+            assert [row[0] for row in cur.fetchall()] == [900001]
+            cur.execute("SELECT count(*) FROM answers WHERE question_id = 900002")
+            assert cur.fetchone()[0] == 0
+    finally:
+        conn.rollback()
+        conn.close()
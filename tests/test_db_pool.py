@@ -0,0 +1,132 @@
+import threading
+
+import psycopg2
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+from unittest.mock import MagicMock, patch
+
+# Imported by package path: the metrics are registered once per process and
+# `work_pg` already imports `src.utils.db_pool`.
+from src.utils import db_pool
+
+
+# Patch logger to avoid cluttering test output
+@pytest.fixture(autouse=True)
+def patch_logger():
+    with patch("src.utils.db_pool.logger") as mock_logger:
+        yield mock_logger
+
+
+def make_conn():
+    conn = MagicMock()
+    conn.closed = 0
+    conn.get_transaction_status.return_value = TRANSACTION_STATUS_IDLE
+    return conn
+
+
+@pytest.fixture
+def mock_connect():
+    with patch("src.utils.db_pool.psycopg2.connect", side_effect=lambda **kwargs: make_conn()) as connect:
+        yield connect
+
+
+def test_pool_reuses_connections(mock_connect):
+    pool = db_pool.PgConnectionPool(db_params={"dbname": "test"}, min_size=1, max_size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert mock_connect.call_count == 1
+    assert pool.stats() == {"size": 1, "idle": 1, "in_use": 0}
+
+
+def test_pool_times_out_when_exhausted(mock_connect):
+    pool = db_pool.PgConnectionPool(
+        db_params={"dbname": "test"}, min_size=0, max_size=1, checkout_timeout=0.05,
+    )
+    conn = pool.getconn()
+
+    with pytest.raises(db_pool.PoolTimeout):
+        pool.getconn()
+
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+
+
+def test_pool_waiter_gets_returned_connection(mock_connect):
+    pool = db_pool.PgConnectionPool(
+        db_params={"dbname": "test"}, min_size=0, max_size=1, checkout_timeout=2,
+    )
+    conn = pool.getconn()
+    timer = threading.Timer(0.05, pool.putconn, args=(conn,))
+    timer.start()
+
+    assert pool.getconn() is conn
+    timer.join()
+
+
+def test_pool_rolls_back_open_transaction_on_return(mock_connect):
+    pool = db_pool.PgConnectionPool(db_params={"dbname": "test"}, min_size=0, max_size=1)
+    conn = pool.getconn()
+    conn.get_transaction_status.return_value = TRANSACTION_STATUS_INTRANS
+
+    pool.putconn(conn)
+
+    conn.rollback.assert_called_once()
+    assert pool.stats()["idle"] == 1
+
+
+def test_pool_replaces_broken_and_expired_connections(mock_connect):
+    pool = db_pool.PgConnectionPool(
+        db_params={"dbname": "test"}, min_size=1, max_size=1, healthcheck_idle=0,
+    )
+    broken = pool.getconn()
+    broken.cursor.return_value.__enter__.return_value.execute.side_effect = psycopg2.OperationalError
+    pool.putconn(broken)
+
+    conn = pool.getconn()
+    assert conn is not broken
+    broken.close.assert_called_once()
+    pool.putconn(conn)
+
+    pool.max_lifetime = 0
+    assert pool.getconn() is not conn
+    assert pool.stats()["size"] == 1
+
+
+def test_pool_connection_error(mock_connect):
+    mock_connect.side_effect = psycopg2.OperationalError("no route")
+    pool = db_pool.PgConnectionPool(db_params={"dbname": "test"}, min_size=0, max_size=1)
+
+    with pytest.raises(ConnectionError):
+        pool.getconn()
+    assert pool.stats()["size"] == 0
+
+
+def test_get_pool_is_recreated_after_fork(mock_connect):
+    with patch("src.utils.db_pool.get_postgres_params", return_value={"dbname": "test"}), \
+            patch.object(db_pool, "_pool", None):
+        pool = db_pool.get_pool()
+        assert db_pool.get_pool() is pool
+
+        with patch("src.utils.db_pool.os.getpid", return_value=-1):
+            assert db_pool.get_pool() is not pool
+
+
+def test_instrument_async_pool_reads_pool_at_scrape_time():
+    from prometheus_client import REGISTRY
+
+    pool = MagicMock()
+    pool.get_size.return_value = 4
+    pool.get_idle_size.return_value = 1
+
+    db_pool.instrument_async_pool(pool)
+
+    assert REGISTRY.get_sample_value("pg_async_pool_connections") == 4
+    assert REGISTRY.get_sample_value("pg_async_pool_connections_idle") == 1
+    assert REGISTRY.get_sample_value("pg_async_pool_connections_in_use") == 3
+    pool.get_idle_size.return_value = 4
+    assert REGISTRY.get_sample_value("pg_async_pool_connections_in_use") == 0
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+sibling_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(sibling_dir)
+
+from extract_api import clear_delta, fetch_yeahub_api, get_total_pages, load_removed_ids, save_delta
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "public_questions"
+
+
+# Patch the logger to avoid cluttering test output
+@pytest.fixture(autouse=True)
+def patch_logger():
+    with patch("extract_api.logger") as mock_logger:
+        yield mock_logger
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Replays recorded `public-questions` responses from FIXTURES_DIR."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        page = params.get("page", ["1"])[0]
+        self.server.requests.append(params)
+        self.server.clients.add(self.client_address)
+
+        fixture = Path(self.server.fixtures_dir) / f"page_{page}.json"
+        if not fixture.exists():
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = fixture.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReplayHandler)
+    server.requests = []
+    server.clients = set()
+    server.fixtures_dir = FIXTURES_DIR
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}/questions/public-questions"
+    server.shutdown()
+    server.server_close()
+
+
+def fetch_and_run(endpoint, json_dir, concurrency, **kwargs):
+    kwargs.setdefault("manifest_path", str(Path(json_dir) / ".." / "manifest.json"))
+    kwargs.setdefault("delta_dir", str(Path(json_dir) / ".." / "delta"))
+    return asyncio.run(fetch_yeahub_api(
+        concurrency=concurrency,
+        page_size=2,
+        endpoint=endpoint,
+        json_dir=str(json_dir),
+        **kwargs,
+    ))
+
+
+def loaded(json_dir):
+    """Clears pending changes, as the Postgres load does after a successful upsert."""
+    clear_delta(str(Path(json_dir) / ".." / "delta"))
+
+
+def read_delta_ids(json_dir):
+    delta = Path(json_dir) / ".." / "delta" / "changes.json"
+    return [item["id"] for item in json.loads(delta.read_text(encoding="utf-8"))["data"]]
+
+
+def test_get_total_pages():
+    assert get_total_pages({"total": 5, "limit": 2, "data": []}) == 3
+    assert get_total_pages({"total": 0, "limit": 2, "data": []}) == 1
+    assert get_total_pages({"total": 4, "data": [{}, {}]}) == 2
+    assert get_total_pages({"data": []}) is None
+
+
+def test_fetch_yeahub_api_saves_all_pages(stub_server, tmp_path):
+    server, endpoint = stub_server
+    json_dir = tmp_path / "json"
+    json_dir.mkdir()
+    (json_dir / "page_9.json").write_text("{}", encoding="utf-8")
+
+    files = fetch_and_run(endpoint, json_dir, concurrency=2)
+
+    assert [Path(f).name for f in files] == ["page_1.json", "page_2.json", "page_3.json"]
+    for name in ["page_1.json", "page_2.json", "page_3.json"]:
+        saved = json.loads((json_dir / name).read_text(encoding="utf-8"))
+        expected = json.loads((FIXTURES_DIR / name).read_text(encoding="utf-8"))
+        assert saved == expected
+
+    assert len(server.requests) == 3
+    assert all(params["limit"] == ["2"] for params in server.requests)
+    # keep-alive: no more connections than the concurrency limit
+    assert len(server.clients) <= 2
+    # stale pages of a previous crawl are removed
+    assert not (json_dir / "page_9.json").exists()
+    assert read_delta_ids(json_dir) == [1, 2, 3, 4, 5]
+
+
+def test_fetch_yeahub_api_incremental_stops_at_known_page(stub_server, tmp_path):
+    server, endpoint = stub_server
+    json_dir = tmp_path / "json"
+    fetch_and_run(endpoint, json_dir, concurrency=2)
+    loaded(json_dir)
+
+    server.requests.clear()
+    files = fetch_and_run(endpoint, json_dir, concurrency=2, incremental=True)
+
+    assert files == []
+    assert len(server.requests) == 1
+    assert read_delta_ids(json_dir) == []
+
+
+def test_fetch_yeahub_api_incremental_saves_only_changes(stub_server, tmp_path):
+    server, endpoint = stub_server
+    json_dir = tmp_path / "json"
+    fetch_and_run(endpoint, json_dir, concurrency=2)
+    loaded(json_dir)
+
+    # new question on top of the list shifts the pages, question 1 is edited
+    items = []
+    for page in range(1, 4):
+        items += json.loads((FIXTURES_DIR / f"page_{page}.json").read_text(encoding="utf-8"))["data"]
+    items[0] = {**items[0], "title": "Что такое GIL в CPython?"}
+    items.insert(0, {**items[1], "id": 6, "title": "Что такое asyncio?"})
+
+    served = tmp_path / "served"
+    served.mkdir()
+    for page in range(1, 4):
+        chunk = items[(page - 1) * 2:page * 2]
+        data = {"page": page, "limit": 2, "total": len(items), "data": chunk}
+        (served / f"page_{page}.json").write_text(json.dumps(data), encoding="utf-8")
+    server.fixtures_dir = served
+    server.requests.clear()
+
+    files = fetch_and_run(endpoint, json_dir, concurrency=2, incremental=True)
+
+    assert [params["page"] for params in server.requests] == [["1"], ["2"]]
+    assert sorted(read_delta_ids(json_dir)) == [1, 6]
+    assert len(files) == 2
+
+    page_1 = json.loads((json_dir / "page_1.json").read_text(encoding="utf-8"))
+    assert page_1["data"][0]["title"] == "Что такое GIL в CPython?"
+    new_file = next(Path(f) for f in files if "incremental_" in f)
+    assert [item["id"] for item in json.loads(new_file.read_text(encoding="utf-8"))["data"]] == [6]
+
+
+def test_fetch_yeahub_api_raises_on_missing_page(stub_server, tmp_path):
+    _, endpoint = stub_server
+    broken = tmp_path / "broken"
+    broken.mkdir()
+
+    with patch("extract_api.get_total_pages", return_value=4):
+        with pytest.raises(httpx.HTTPStatusError):
+            fetch_and_run(endpoint, broken, concurrency=2)
+
+
+def test_fetch_yeahub_api_without_pagination_metadata(stub_server, tmp_path):
+    _, endpoint = stub_server
+
+    with patch("extract_api.get_total_pages", return_value=None):
+        with pytest.raises(ValueError):
+            fetch_and_run(endpoint, tmp_path, concurrency=1)
+
+
+def test_fetch_yeahub_api_emits_consolidated_corpus(stub_server, tmp_path):
+    from src.utils.work_json import iter_corpus_items
+
+    _, endpoint = stub_server
+    json_dir = tmp_path / "json"
+    corpus = str(tmp_path / "corpus.jsonl.gz")
+
+    fetch_and_run(endpoint, json_dir, concurrency=2, corpus_path=corpus)
+    assert sorted(item["id"] for item in iter_corpus_items(corpus)) == [1, 2, 3, 4, 5]
+
+    fetch_and_run(endpoint, json_dir, concurrency=2, corpus_path=corpus)
+    assert len(list(iter_corpus_items(corpus, latest_only=False))) == 5
+
+
+
+def test_fetch_yeahub_api_failed_crawl_keeps_previous_corpus(stub_server, tmp_path):
+    from src.utils.work_json import iter_corpus_items
+
+    _, endpoint = stub_server
+    json_dir = tmp_path / "json"
+    corpus = str(tmp_path / "corpus.jsonl.gz")
+    fetch_and_run(endpoint, json_dir, concurrency=2, corpus_path=corpus)
+
+    with patch("extract_api.get_total_pages", return_value=4):
+        with pytest.raises(httpx.HTTPStatusError):
+            fetch_and_run(endpoint, json_dir, concurrency=2, corpus_path=corpus, incremental=False)
+
+    assert sorted(item["id"] for item in iter_corpus_items(corpus)) == [1, 2, 3, 4, 5]
+
+
+def test_fetch_yeahub_api_keeps_changes_until_loaded(stub_server, tmp_path):
+    _, endpoint = stub_server
+    json_dir = tmp_path / "json"
+    fetch_and_run(endpoint, json_dir, concurrency=2)
+
+    # the load of the first run failed, nothing new is fetched by the next one
+    fetch_and_run(endpoint, json_dir, concurrency=2, incremental=True)
+    assert sorted(read_delta_ids(json_dir)) == [1, 2, 3, 4, 5]
+
+    loaded(json_dir)
+    fetch_and_run(endpoint, json_dir, concurrency=2, incremental=True)
+    assert read_delta_ids(json_dir) == []
+
+
+def test_fetch_yeahub_api_incremental_falls_back_to_full_crawl_on_deletions(stub_server, tmp_path):
+    server, endpoint = stub_server
+    json_dir = tmp_path / "json"
+    fetch_and_run(endpoint, json_dir, concurrency=2)
+    loaded(json_dir)
+
+    # question 5 (the only one of page 3) is deleted
+    served = tmp_path / "served"
+    served.mkdir()
+    for page in range(1, 3):
+        data = json.loads((FIXTURES_DIR / f"page_{page}.json").read_text(encoding="utf-8"))
+        (served / f"page_{page}.json").write_text(json.dumps({**data, "total": 4}), encoding="utf-8")
+    server.fixtures_dir = served
+    server.requests.clear()
+
+    files = fetch_and_run(endpoint, json_dir, concurrency=2, incremental=True)
+
+    assert [Path(f).name for f in files] == ["page_1.json", "page_2.json"]
+    assert not (json_dir / "page_3.json").exists()
+    assert load_removed_ids(str(Path(json_dir) / ".." / "delta")) == ["5"]
+
+
+def test_fetch_yeahub_api_incremental_falls_back_to_full_crawl_when_stale(stub_server, tmp_path):
+    server, endpoint = stub_server
+    json_dir = tmp_path / "json"
+    fetch_and_run(endpoint, json_dir, concurrency=2)
+    loaded(json_dir)
+
+    manifest_path = Path(json_dir) / ".." / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest["full_crawl_at"] -= 8 * 24 * 3600
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    server.requests.clear()
+
+    files = fetch_and_run(endpoint, json_dir, concurrency=2, incremental=True)
+
+    assert len(files) == 3
+    assert len(server.requests) == 3
+
+
+def test_save_delta_merges_removed_ids_with_pending_changes(tmp_path):
+    delta_dir = str(tmp_path / "delta")
+    save_delta([{"id": 1, "title": "T1"}, {"id": 2, "title": "T2"}], delta_dir)
+    save_delta([], delta_dir, removed=["2", "3"])
+    # question 3 came back before the load
+    save_delta([{"id": 3, "title": "T3"}], delta_dir)
+
+    delta = json.loads((tmp_path / "delta" / "changes.json").read_text(encoding="utf-8"))
+    assert [item["id"] for item in delta["data"]] == [1, 3]
+    assert load_removed_ids(delta_dir) == ["2"]
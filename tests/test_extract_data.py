@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sibling_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(sibling_dir)
+
+from extract_data import PARSE_CARDS_JS, async_parse_yeahub, build_html_snapshot, parse_yeahub, should_block_request
+
+
+# Patch the logger to avoid cluttering test output
+@pytest.fixture(autouse=True)
+def patch_logger():
+    with patch("extract_data.logger") as mock_logger:
+        yield mock_logger
+
+
+@pytest.mark.parametrize("resource_type, url", [
+    ("image", "https://yeahub.ru/static/logo.png"),
+    ("font", "https://fonts.gstatic.com/s/roboto.woff2"),
+    ("stylesheet", "https://yeahub.ru/static/main.css"),
+    ("script", "https://www.googletagmanager.com/gtag/js?id=G-1"),
+    ("xhr", "https://mc.yandex.ru/watch/123"),
+])
+def test_should_block_request_blocks_heavy_and_tracking(resource_type, url):
+    assert should_block_request(resource_type, url)
+
+
+@pytest.mark.parametrize("resource_type, url", [
+    ("document", "https://yeahub.ru/questions?page=1&status=all&specialization=39"),
+    ("script", "https://yeahub.ru/static/app.js"),
+    ("fetch", "https://api.yeahub.ru/questions/public-questions?page=1"),
+    # the API response is never blocked, whatever its resource type
+    ("image", "https://api.yeahub.ru/questions/public-questions?page=2"),
+])
+def test_should_block_request_allows_page_and_api(resource_type, url):
+    assert not should_block_request(resource_type, url)
+
+
+CARD_TEXTS = [
+    "Что такое GIL?Рейтинг:4Сложность:7GIL — глобальная блокировка интерпретатора.Подробнее",
+    "Зачем нужен git rebase? Рейтинг: 5 Сложность:3 Переписывает историю коммитов. Подробнее",
+    "Что такое MVCC?Рейтинг:3Сложность:10Версии строк вместо блокировок.Подробнее",
+]
+
+
+def evaluate_cards_js(texts):
+    """Runs `PARSE_CARDS_JS` in Node on card stubs with the given `textContent`."""
+    script = (
+        f"const parse = {PARSE_CARDS_JS};"
+        "const cards = JSON.parse(process.argv[1]).map(text => ({textContent: text}));"
+        "process.stdout.write(JSON.stringify(parse(cards)));"
+    )
+    result = subprocess.run(
+        ["node", "-e", script, json.dumps(texts)],
+        capture_output=True, check=True, text=True, encoding="utf-8",
+    )
+    return json.loads(result.stdout)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Node.js is not installed")
+def test_parse_cards_js_splits_card_fields():
+    cards = evaluate_cards_js(CARD_TEXTS + ["Вопрос без метаданных"])
+
+    assert cards[0] == {
+        "question": "Что такое GIL?",
+        "rating": "4",
+        "complexity": "7",
+        "answer": "GIL — глобальная блокировка интерпретатора.",
+    }
+    assert cards[1] == {
+        "question": "Зачем нужен git rebase?",
+        "rating": "5",
+        "complexity": "3",
+        "answer": "Переписывает историю коммитов.",
+    }
+    # two-digit complexity doesn't leak into the answer
+    assert cards[2] == {
+        "question": "Что такое MVCC?",
+        "rating": "3",
+        "complexity": "10",
+        "answer": "Версии строк вместо блокировок.",
+    }
+    assert cards[3] == {"question": "Вопрос без метаданных", "rating": "", "complexity": "", "answer": ""}
+
+
+def test_build_html_snapshot_from_parsed_cards():
+    cards = [
+        {"question": "Что такое GIL?", "rating": "4", "complexity": "7", "answer": "Блокировка."},
+        {"question": "Что такое rebase?", "rating": "5", "complexity": "3", "answer": "Перенос коммитов."},
+    ]
+
+    assert build_html_snapshot(cards) == (
+        "Вопрос 1<br>Что такое GIL?<br>Рейтинг: 4<br>Сложность: 7<br>Ответ<br>Блокировка.<br><br>"
+        "Вопрос 2<br>Что такое rebase?<br>Рейтинг: 5<br>Сложность: 3<br>Ответ<br>Перенос коммитов.<br><br>"
+    )
+    assert build_html_snapshot([]) == ""
+
+
+def test_parse_yeahub_creates_folders_and_writes_snapshot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cards = [{"question": "Что такое GIL?", "rating": "4", "complexity": "7", "answer": "Блокировка."}]
+
+    browser = MagicMock()
+    page = browser.new_context.return_value.new_page.return_value
+    page.expect_response.return_value.__enter__.return_value.value.json.return_value = {"data": []}
+    page.locator.return_value.evaluate_all.return_value = cards
+    page.get_by_label.return_value.count.return_value = 0
+
+    with patch("builtins.print"):
+        parse_yeahub(browser=browser)
+
+    snapshot = tmp_path / "data" / "raw" / "page_1.html"
+    assert snapshot.read_text(encoding="utf-8") == build_html_snapshot(cards)
+    assert (tmp_path / "data" / "json" / "page_1.json").exists()
+    page.locator.return_value.evaluate_all.assert_called_once_with(PARSE_CARDS_JS)
+    browser.new_context.return_value.close.assert_called_once()
+
+
+def make_async_browser(contexts):
+    def new_context():
+        context = MagicMock()
+        context.route = AsyncMock()
+        context.new_page = AsyncMock(return_value=MagicMock(context=context))
+        context.closed = False
+
+        async def close():
+            context.closed = True
+            # closing takes a round trip, other tasks run meanwhile
+            await asyncio.sleep(0.1)
+
+        context.close = close
+        contexts.append(context)
+        return context
+
+    browser = MagicMock()
+    browser.new_context = AsyncMock(side_effect=new_context)
+    return browser
+
+
+def test_async_parse_yeahub_loads_every_page_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    loaded, contexts = [], []
+
+    async def load_page(page, page_num):
+        assert not page.context.closed
+        await asyncio.sleep(0.01)
+        loaded.append(page_num)
+        return {"total": 7, "limit": 1}
+
+    with patch("extract_data._async_load_page", side_effect=load_page):
+        asyncio.run(async_parse_yeahub(concurrency=3, browser=make_async_browser(contexts)))
+
+    assert sorted(loaded) == list(range(1, 8))
+    assert len(contexts) == 3 and all(context.closed for context in contexts)
+
+
+def test_async_parse_yeahub_stops_workers_before_closing_contexts(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    contexts, used_after_close = [], []
+
+    async def load_page(page, page_num):
+        if page_num == 1:
+            return {"total": 20, "limit": 1}
+        if page_num == 2:
+            raise RuntimeError("page 2 failed")
+        await asyncio.sleep(0.05)
+        if page.context.closed:
+            used_after_close.append(page_num)
+        return {}
+
+    with patch("extract_data._async_load_page", side_effect=load_page):
+        with pytest.raises(RuntimeError, match="page 2 failed"):
+            asyncio.run(async_parse_yeahub(concurrency=3, browser=make_async_browser(contexts)))
+
+    assert used_after_close == []
+    assert all(context.closed for context in contexts)
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+sibling_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'api'))
+sys.path.append(sibling_dir)
+
+import fulltext
+
+
+# Patch logger to avoid cluttering test output
+@pytest.fixture(autouse=True)
+def patch_logger():
+    with patch("fulltext.logger") as mock_logger:
+        yield mock_logger
+
+
+def test_keyword_sql_builds_tsquery_once():
+    sql_query = fulltext.keyword_sql()
+
+    assert sql_query.count("plainto_tsquery") == 1
+    assert "$3" not in sql_query
+    assert "ts_headline" not in sql_query
+
+
+def test_keyword_sql_limits_candidates_in_approximate_mode():
+    sql_query = fulltext.keyword_sql(approximate=True)
+
+    # candidates are limited in the inner query, before ranking
+    assert sql_query.index("LIMIT $3") < sql_query.index("ORDER BY rank") < sql_query.index("LIMIT $2")
+    assert fulltext.keyword_args("python", 10, True, 500) == ["python", 10, 500]
+    assert fulltext.keyword_args("python", 10, False, 500) == ["python", 10]
+
+
+def test_keyword_sql_builds_headlines_for_top_k_only():
+    sql_query = fulltext.keyword_sql(headline=True)
+
+    # the headline is computed in the outer query, over the limited rows
+    outer, inner = sql_query.split("FROM (", 1)
+    assert "ts_headline" in outer and "ts_headline" not in inner
+
+
+def test_execute_prepared_prepares_once_per_connection():
+    cur = MagicMock()
+    cur.connection = MagicMock()
+
+    fulltext.execute_prepared(cur, "stmt", "SELECT $1", ["text"], ["a"])
+    fulltext.execute_prepared(cur, "stmt", "SELECT $1", ["text"], ["b"])
+
+    statements = [call.args[0] for call in cur.execute.call_args_list]
+    assert statements == ["PREPARE stmt (text) AS SELECT $1", "EXECUTE stmt (%s)", "EXECUTE stmt (%s)"]
+    assert cur.execute.call_args.args[1] == ("b",)
+
+    other = MagicMock()
+    other.connection = MagicMock()
+    fulltext.execute_prepared(other, "stmt", "SELECT $1", ["text"], ["c"])
+    assert other.execute.call_args_list[0].args[0].startswith("PREPARE stmt")
+
+
+def test_execute_prepared_retries_prepare_after_failure():
+    cur = MagicMock()
+    cur.connection = MagicMock()
+    cur.execute.side_effect = [Exception("syntax error"), None, None]
+
+    with pytest.raises(Exception):
+        fulltext.execute_prepared(cur, "stmt", "SELECT $1", ["text"], ["a"])
+    fulltext.execute_prepared(cur, "stmt", "SELECT $1", ["text"], ["a"])
+
+    assert cur.execute.call_args_list[1].args[0].startswith("PREPARE stmt")
+
+
+def test_to_results_with_headline():
+    rows = [{"id": 1, "rank": 0.5, "title": "GIL", "headline": "<b>GIL</b>"}]
+
+    assert fulltext.to_results(rows, headline=True) == [
+        {"id": 1, "score": 0.5, "title": "GIL", "headline": "<b>GIL</b>"}
+    ]
+    assert fulltext.to_results(rows, headline=False) == [{"id": 1, "score": 0.5, "title": "GIL"}]
@@ -0,0 +1,87 @@
+import os
+import sys
+
+import pytest
+
+sibling_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'api'))
+sys.path.append(sibling_dir)
+
+from fusion import fuse, keyword_entries, minmax, semantic_entries, zscore
+
+SEMANTIC = semantic_entries([
+    {"_id": "1", "_score": 0.91, "fields": {"title": "GIL", "url": "https://yeahub.ru/questions/1"}},
+    {"_id": "2", "_score": 0.90, "fields": {"title": "asyncio", "url": "https://yeahub.ru/questions/2"}},
+    {"_id": "3", "_score": 0.89, "fields": {"title": "threads", "url": "https://yeahub.ru/questions/3"}},
+])
+KEYWORD = keyword_entries([
+    {"id": "3", "score": 0.005, "title": "threads"},
+    {"id": "4", "score": 0.001, "title": "processes"},
+])
+
+
+def ids(results):
+    return [row["question_id"] for row in results]
+
+
+def test_weighted_without_normalisation_keeps_raw_scores():
+    results = fuse(SEMANTIC, KEYWORD, method="weighted", normalise="none")
+
+    assert ids(results) == ["1", "2", "3", "4"]
+    assert results[2]["score"] == pytest.approx(0.7 * 0.89 + 0.3 * 0.005)
+    assert results[3] == {
+        "question_id": "4", "score": pytest.approx(0.3 * 0.001),
+        "title": "processes", "url": "https://yeahub.ru/questions/4",
+    }
+
+
+def test_rrf_ignores_score_scales():
+    results = fuse(SEMANTIC, KEYWORD, weight_semantic=0.5, weight_keyword=0.5, method="rrf")
+
+    # found by both legs, so it wins although its semantic score is the lowest
+    assert ids(results)[0] == "3"
+    assert results[0]["score"] == pytest.approx(0.5 / 63 + 0.5 / 61)
+
+
+def test_minmax_lets_keyword_leg_count():
+    raw = fuse(SEMANTIC, KEYWORD, weight_semantic=0.4, weight_keyword=0.6, method="weighted", normalise="none")
+    scaled = fuse(SEMANTIC, KEYWORD, weight_semantic=0.4, weight_keyword=0.6, method="weighted", normalise="minmax")
+
+    assert ids(raw)[0] == "1"
+    assert ids(scaled)[0] == "3"
+
+
+def test_int_keyword_ids_merge_with_str_semantic_ids():
+    semantic = semantic_entries([
+        {"_id": "7", "_score": 0.9, "fields": {"title": "GIL", "url": "https://yeahub.ru/questions/7"}},
+    ])
+    # asyncpg returns int ids for keyword rows
+    keyword = keyword_entries([
+        {"id": 7, "score": 0.5, "title": "GIL"},
+        {"id": 8, "score": 0.1, "title": "threads"},
+    ])
+
+    results = fuse(semantic, keyword, weight_semantic=0.5, weight_keyword=0.5, method="rrf")
+
+    assert ids(results) == ["7", "8"]
+    assert results[0]["score"] == pytest.approx(0.5 / 61 + 0.5 / 61)
+
+
+def test_normalisers():
+    assert minmax([2.0, 4.0, 3.0]) == [0.0, 1.0, 0.5]
+    assert minmax([5.0, 5.0]) == [1.0, 1.0]
+    assert zscore([1.0, 3.0]) == [-1.0, 1.0]
+    assert zscore([2.0, 2.0]) == [0.0, 0.0]
+    assert minmax([]) == []
+
+
+@pytest.mark.parametrize("method", ["rrf", "weighted"])
+def test_top_k_selection_matches_full_sort(method):
+    full = fuse(SEMANTIC, KEYWORD, method=method)
+    assert fuse(SEMANTIC, KEYWORD, method=method, top_k=2) == full[:2]
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        fuse(SEMANTIC, KEYWORD, method="borda")
+    with pytest.raises(ValueError):
+        fuse(SEMANTIC, KEYWORD, method="weighted", normalise="softmax")
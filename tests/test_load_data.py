@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+from unittest.mock import patch
+
+sibling_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(sibling_dir)
+
+import load_data
+
+
+# Patch the logger to avoid cluttering test output
+@pytest.fixture(autouse=True)
+def patch_logger():
+    with patch("load_data.logger") as mock_logger:
+        yield mock_logger
+
+
+def make_records(count):
+    return [
+        {
+            "id": i,
+            "title": f"title_{i}",
+            "createdAt": "2024-01-01",
+            "keywords": ["kw"],
+            "shortAnswer": f"short_{i}",
+            "longAnswer": f"long_{i}",
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("upsert", [False, True])
+def test_load_postgres_copies_each_table_once_per_chunk(upsert):
+    sink = "upsert_many_rows" if upsert else "copy_many_rows"
+    with patch("load_data.iter_question_records", return_value=iter(make_records(2500))), \
+            patch(f"load_data.{sink}") as copy:
+        count = load_data.load_postgres(file_dir="unused", upsert=upsert)
+
+    assert count == 2500
+    assert [c.args[0] for c in copy.call_args_list] == ["questions", "answers"]
+    assert all(len(c.args[2]) == 2500 for c in copy.call_args_list)
+
+
+def test_delete_questions_deletes_by_int_id():
+    with patch("load_data.delete_rows", return_value=2) as delete_rows:
+        assert load_data.delete_questions(["5", "7"]) == 2
+    delete_rows.assert_called_once_with("questions", "id", [5, 7])
@@ -0,0 +1,335 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sibling_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'api'))
+sys.path.append(sibling_dir)
+
+import query
+
+
+# Patch logger to avoid cluttering test output
+@pytest.fixture(autouse=True)
+def patch_logger():
+    with patch("query.logger") as mock_logger:
+        yield mock_logger
+
+
+SEMANTIC_HITS = [{"_id": "1", "_score": 0.9, "fields": {"title": "GIL", "url": "https://yeahub.ru/questions/1"}}]
+
+
+def make_pool(rows=None, delay=0.0):
+    async def fetch(sql_query, *args):
+        await asyncio.sleep(delay)
+        return rows or []
+
+    pool = MagicMock()
+    pool.fetch = AsyncMock(side_effect=fetch)
+    return pool
+
+
+def test_async_keyword_search_uses_positional_params():
+    pool = make_pool(rows=[{"id": "2", "rank": 0.5, "title": "asyncio"}])
+
+    results = asyncio.run(query.async_keyword_search(pool, "asyncio", top_k=5))
+
+    assert results == [{"id": "2", "score": 0.5, "title": "asyncio"}]
+    sql_query, *args = pool.fetch.call_args.args
+    assert "$1" in sql_query and "$2" in sql_query
+    assert args == ["asyncio", 5]
+
+
+def test_hybrid_search_runs_legs_concurrently():
+    def slow_semantic(text_query, top_k, rerank, raise_errors=False):
+        time.sleep(0.2)
+        return SEMANTIC_HITS
+
+    pool = make_pool(rows=[{"id": "2", "rank": 0.5, "title": "asyncio"}], delay=0.2)
+
+    with patch("query.semantic_search", side_effect=slow_semantic):
+        start = time.monotonic()
+        results = asyncio.run(query.hybrid_search(pool, "python"))
+        elapsed = time.monotonic() - start
+
+    assert elapsed < 0.35
+    assert [row["question_id"] for row in results] == ["1", "2"]
+
+
+def test_hybrid_search_skips_leg_on_timeout():
+    pool = make_pool(rows=[{"id": "2", "rank": 0.5, "title": "asyncio"}], delay=1)
+
+    with patch("query.semantic_search", return_value=SEMANTIC_HITS):
+        results = asyncio.run(query.hybrid_search(pool, "python", keyword_timeout=0.05))
+
+    assert [row["question_id"] for row in results] == ["1"]
+
+
+def test_hybrid_search_raises_on_keyword_error():
+    pool = MagicMock()
+    pool.fetch = AsyncMock(side_effect=RuntimeError("DB error"))
+
+    with patch("query.semantic_search", return_value=SEMANTIC_HITS):
+        with pytest.raises(RuntimeError):
+            asyncio.run(query.hybrid_search(pool, "python"))
+
+
+def test_cached_search_computes_once_per_dataset_version():
+    from src.api.cache import SearchCache
+
+    search_cache = SearchCache()
+    pool = make_pool(rows=[{"id": "2", "rank": 0.5, "title": "asyncio"}])
+
+    with patch("query.semantic_search", return_value=SEMANTIC_HITS):
+        first = asyncio.run(query.cached_search(pool, search_cache, "Python"))
+        second = asyncio.run(query.cached_search(pool, search_cache, "  python "))
+        assert first == second
+        assert pool.fetch.call_count == 1
+
+        search_cache._version = "1"
+        asyncio.run(query.cached_search(pool, search_cache, "python"))
+        assert pool.fetch.call_count == 2
+
+
+def test_cached_search_skips_cache_when_a_leg_failed():
+    from src.api.cache import SearchCache
+
+    search_cache = SearchCache()
+    pool = make_pool(rows=[{"id": "2", "rank": 0.5, "title": "asyncio"}])
+
+    with patch("query.semantic_search", side_effect=RuntimeError("Pinecone is down")):
+        degraded = asyncio.run(query.cached_search(pool, search_cache, "python"))
+    assert [row["question_id"] for row in degraded] == ["2"]
+    assert len(search_cache.local) == 0
+
+    with patch("query.semantic_search", return_value=SEMANTIC_HITS):
+        results = asyncio.run(query.cached_search(pool, search_cache, "python"))
+    assert [row["question_id"] for row in results] == ["1", "2"]
+    assert len(search_cache.local) == 1
+
+
+def test_stream_search_skips_cache_on_timeout():
+    from src.api.cache import SearchCache
+
+    search_cache = SearchCache()
+    pool = make_pool(rows=[{"id": "2", "rank": 0.5, "title": "asyncio"}], delay=1)
+
+    async def collect():
+        return [
+            event async for event in query.stream_search(pool, search_cache, "python", keyword_timeout=0.05)
+        ]
+
+    with patch("query.semantic_search", return_value=SEMANTIC_HITS):
+        events = asyncio.run(collect())
+
+    assert [row["question_id"] for row in events[-1]["results"]] == ["1"]
+    assert len(search_cache.local) == 0
+
+
+def test_semantic_search_uses_local_backend(monkeypatch):
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    with patch("query.get_local_index") as get_index, patch("query.get_pinecone_client") as get_client:
+        get_index.return_value.search_text.return_value = SEMANTIC_HITS
+        assert query.semantic_search("python", top_k=3) == SEMANTIC_HITS
+
+    get_index.return_value.search_text.assert_called_once_with("python", 3)
+    get_client.assert_not_called()
+
+
+def test_hybrid_search_uses_pgvector_backend(monkeypatch):
+    monkeypatch.setenv("VECTOR_BACKEND", "pgvector")
+    pool = make_pool(rows=[{"id": 2, "title": "asyncio", "score": 0.02}])
+
+    with patch("query.embed_query", return_value=[0.1, 0.2]) as embed, \
+            patch("query.semantic_search") as semantic:
+        results = asyncio.run(query.hybrid_search(pool, "asyncio", top_k=5))
+
+    embed.assert_called_once_with("asyncio")
+    semantic.assert_not_called()
+    assert pool.fetch.call_count == 1
+    sql_query, *args = pool.fetch.call_args.args
+    assert "<=>" in sql_query and "ts_rank_cd" in sql_query
+    # ranks of both legs come from an ordered window, not from the subquery order
+    assert "OVER ()" not in sql_query
+    assert args[:3] == ["asyncio", "[0.1,0.2]", 5 * query.FUSION_OVERFETCH]
+    assert args[-1] == 5
+    assert results == [
+        {"question_id": "2", "score": 0.02, "title": "asyncio", "url": query.QUESTION_URL.format(2)}
+    ]
+
+
+def test_pgvector_search_against_postgres():
+    """Runs the fused statement on a temporary table, skipped without a reachable Postgres with pgvector."""
+
+    asyncpg = pytest.importorskip("asyncpg")
+    from src.utils.helper import get_postgres_params
+
+    async def run():
+        params = get_postgres_params()
+        try:
+            conn = await asyncpg.connect(
+                database=params["dbname"], user=params["user"], password=params["password"],
+                host=params["host"], port=int(params["port"]), timeout=2,
+            )
+        except Exception as e:
+            pytest.skip(f"Postgres is not reachable: {e}")
+        try:
+            try:
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            except asyncpg.PostgresError as e:
+                pytest.skip(f"pgvector is not available: {e}")
+            # a temporary table shadows `questions` for this session only
+            await conn.execute(
+                "CREATE TEMP TABLE questions (id int PRIMARY KEY, title text, search_tsv tsvector, embedding vector(3))"
+            )
+            await conn.executemany(
+                "INSERT INTO questions VALUES ($1, $2, to_tsvector('russian', $2), $3::text::vector)",
+                [
+                    (1, "Что такое GIL в Python", "[1,0,0]"),
+                    (2, "Как работает git rebase", "[0,1,0]"),
+                    (3, "Декораторы в Python", "[0.9,0.1,0]"),
+                ],
+            )
+            return await query.pgvector_search(conn, "python", top_k=3, query_vector=[1, 0, 0])
+        finally:
+            await conn.close()
+
+    results = asyncio.run(run())
+
+    # 1 and 3 are found by both legs, 2 only by the vector leg
+    assert [row["question_id"] for row in results] == ["1", "3", "2"]
+    assert results[2]["score"] == pytest.approx(0.7 / 63)
+
+
+def test_paginated_search_serves_later_pages_from_cached_ranking():
+    from src.api.cache import SearchCache
+
+    search_cache = SearchCache()
+    rows = [{"id": str(i), "rank": 1.0 / (i + 1), "title": f"Q{i}"} for i in range(5)]
+    pool = make_pool(rows=rows)
+
+    with patch("query.semantic_search", return_value=[]) as semantic:
+        first, cursor = asyncio.run(query.paginated_search(pool, search_cache, "python", page_size=2))
+        # the first page costs what a plain top-k search does
+        assert pool.fetch.call_args.args[-1] == 2 * query.FUSION_OVERFETCH
+        second, cursor = asyncio.run(query.paginated_search(pool, search_cache, "python", 2, cursor))
+        third, cursor = asyncio.run(query.paginated_search(pool, search_cache, "python", 2, cursor))
+
+    assert [row["question_id"] for row in first + second + third] == ["0", "1", "2", "3", "4"]
+    assert cursor is None
+    # later pages share one ranking, `SEARCH_PAGES_AHEAD` pages deep
+    assert pool.fetch.call_count == 2
+    assert semantic.call_args.args[1] == 2 * query.SEARCH_PAGES_AHEAD * query.FUSION_OVERFETCH
+
+
+def test_paginated_search_recomputes_expired_ranking():
+    from src.api.cache import SearchCache
+
+    search_cache = SearchCache()
+    pool = make_pool(rows=[{"id": str(i), "rank": 1.0 / (i + 1), "title": f"Q{i}"} for i in range(5)])
+
+    with patch("query.semantic_search", return_value=[]):
+        _, cursor = asyncio.run(query.paginated_search(pool, search_cache, "python", page_size=2))
+        _, cursor = asyncio.run(query.paginated_search(pool, search_cache, "python", 2, cursor))
+        search_cache.local.clear()
+        third, _ = asyncio.run(query.paginated_search(pool, search_cache, "python", 2, cursor))
+
+    assert [row["question_id"] for row in third] == ["4"]
+    assert pool.fetch.call_count == 3
+
+
+def test_ranking_depth_grows_by_windows():
+    window = 10 * query.SEARCH_PAGES_AHEAD
+    assert query._ranking_depth(10, 10) == window
+    assert query._ranking_depth(window - 10, 10) == window
+    assert query._ranking_depth(window, 10) == 2 * window
+    assert query._ranking_depth(10 ** 6, 10) == query.SEARCH_MAX_DEPTH
+
+
+def test_stream_search_yields_faster_leg_first():
+    from src.api.cache import SearchCache
+
+    def slow_semantic(text_query, top_k, rerank, raise_errors=False):
+        time.sleep(0.2)
+        return SEMANTIC_HITS
+
+    pool = make_pool(rows=[{"id": "2", "rank": 0.5, "title": "asyncio"}])
+
+    async def collect():
+        return [event async for event in query.stream_search(pool, SearchCache(), "python", page_size=1)]
+
+    with patch("query.semantic_search", side_effect=slow_semantic):
+        events = asyncio.run(collect())
+
+    assert [event["event"] for event in events] == ["keyword", "final"]
+    assert [row["question_id"] for row in events[0]["results"]] == ["2"]
+    assert [row["question_id"] for row in events[1]["results"]] == ["1"]
+    assert events[1]["next_cursor"] is not None
+
+
+def test_batch_keyword_search_groups_rows_in_input_order():
+    pool = make_pool(rows=[
+        {"ord": 1, "id": 1, "rank": 0.9, "title": "GIL"},
+        {"ord": 1, "id": 3, "rank": 0.1, "title": "asyncio"},
+        {"ord": 3, "id": 2, "rank": 0.5, "title": "git"},
+    ])
+
+    results = asyncio.run(query.batch_keyword_search(pool, ["python", "docker", "git"], top_k=5))
+
+    assert [[row["id"] for row in group] for group in results] == [[1, 3], [], [2]]
+    sql_query, queries, top_k = pool.fetch.call_args.args
+    assert "unnest($1::text[]) WITH ORDINALITY" in sql_query and "LATERAL" in sql_query
+    assert queries == ["python", "docker", "git"] and top_k == 5
+
+
+def test_batch_search_runs_each_leg_once_and_keeps_input_order(monkeypatch):
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    pool = make_pool(rows=[
+        {"ord": 1, "id": "2", "rank": 0.5, "title": "asyncio"},
+        {"ord": 2, "id": "3", "rank": 0.5, "title": "git"},
+    ])
+
+    with patch("query.get_local_index") as get_index:
+        get_index.return_value.search_text_many.return_value = [SEMANTIC_HITS, []]
+        results = asyncio.run(query.batch_search(pool, ["python", "git", "python"], top_k=2))
+
+    get_index.return_value.search_text_many.assert_called_once_with(["python", "git"], 2 * query.FUSION_OVERFETCH)
+    assert pool.fetch.call_count == 1
+    assert [[row["question_id"] for row in group] for group in results] == [["1", "2"], ["3"], ["1", "2"]]
+
+
+def test_batch_semantic_search_bounds_pinecone_concurrency(monkeypatch):
+    monkeypatch.setenv("VECTOR_BACKEND", "pinecone")
+    monkeypatch.setattr(query, "SEARCH_BATCH_CONCURRENCY", 2)
+    running, peak = 0, 0
+
+    async def fake_search(text_query, top_k):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [{"_id": text_query, "_score": 1.0, "fields": {"title": text_query, "url": ""}}]
+
+    with patch("query.async_semantic_search", side_effect=fake_search):
+        results = asyncio.run(query.batch_semantic_search(None, ["a", "b", "c", "d", "e"], top_k=1))
+
+    assert [hits[0]["_id"] for hits in results] == ["a", "b", "c", "d", "e"]
+    assert peak == 2
+
+
+def test_batch_semantic_search_pgvector_returns_str_ids(monkeypatch):
+    import numpy as np
+
+    monkeypatch.setenv("VECTOR_BACKEND", "pgvector")
+    pool = make_pool(rows=[{"ord": 1, "id": 7, "title": "GIL", "score": 0.9}])
+
+    with patch("src.utils.work_embedding.get_sentence_embeddings", return_value=np.ones((1, 2), dtype=np.float32)):
+        results = asyncio.run(query.batch_semantic_search(pool, ["python"], top_k=1))
+
+    assert results[0][0]["_id"] == "7"
+    sql_query, vectors, top_k = pool.fetch.call_args.args
+    assert vectors == ["[1,1]"] and top_k == 1
@@ -0,0 +1,114 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+sibling_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+sys.path.append(sibling_dir)
+
+import vector_index
+from vector_index import LocalVectorIndex
+
+DIM = 16
+WORDS = ["git", "python", "gil", "asyncio", "docker", "sql", "index", "merge"]
+
+
+# Patch logger to avoid cluttering test output
+@pytest.fixture(autouse=True)
+def patch_logger():
+    with patch("vector_index.logger") as mock_logger:
+        yield mock_logger
+
+
+def fake_embed(texts):
+    """Bag-of-words embedding: one dimension per known word."""
+    vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            if word in WORDS:
+                vectors[row, WORDS.index(word)] += 1.0
+        vectors[row, DIM - 1] = 0.1
+    return vectors
+
+
+def make_records():
+    titles = ["git merge", "python gil", "python asyncio", "docker index", "sql index", "git"]
+    return [
+        {"_id": str(i), "title": title, "url": f"https://yeahub.ru/questions/{i}"}
+        for i, title in enumerate(titles, start=1)
+    ]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_build_and_search_text(tmp_path, dtype):
+    index = LocalVectorIndex.build(make_records(), path=str(tmp_path), embed=fake_embed, dtype=dtype, batch_size=4)
+
+    assert len(index) == 6
+    assert isinstance(index.vectors, np.memmap)
+    assert index.vectors.dtype == np.dtype(dtype)
+
+    hits = index.search_text("python gil", top_k=2)
+    assert [hit["_id"] for hit in hits] == ["2", "3"]
+    assert hits[0]["_score"] > hits[1]["_score"]
+    assert hits[0]["fields"] == {"title": "python gil", "url": "https://yeahub.ru/questions/2"}
+
+
+def test_search_matches_brute_force(tmp_path):
+    records = make_records()
+    index = LocalVectorIndex.build(records, path=str(tmp_path), embed=fake_embed)
+    query = fake_embed(["git index"])[0]
+
+    matrix = fake_embed([r["title"] for r in records])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    expected = np.sort(matrix @ (query / np.linalg.norm(query)))[::-1][:3]
+
+    hits = index.search(query, top_k=3)
+    assert np.allclose([hit["_score"] for hit in hits], expected)
+    assert len(index.search(query, top_k=100)) == len(records)
+
+
+def test_float16_index_scores_in_float32(tmp_path):
+    index = LocalVectorIndex.build(make_records(), path=str(tmp_path), embed=fake_embed, dtype="float16")
+    queries = vector_index._normalise(fake_embed(["python gil", "docker"]))
+
+    similarities = index._similarities(queries, scan_rows=4)
+
+    assert similarities.dtype == np.float32
+    expected = queries @ np.asarray(index.vectors, dtype=np.float32).T
+    np.testing.assert_allclose(similarities, expected, rtol=1e-6)
+
+
+def test_search_many_matches_single_searches(tmp_path):
+    index = LocalVectorIndex.build(make_records(), path=str(tmp_path), embed=fake_embed)
+    queries = ["git index", "python", "docker sql"]
+
+    batched = index.search_text_many(queries, top_k=3)
+    chunked = index.search_many(fake_embed(queries), top_k=3, chunk_size=2)
+
+    for query, hits, chunk_hits in zip(queries, batched, chunked):
+        single = index.search_text(query, top_k=3)
+        assert np.allclose([hit["_score"] for hit in hits], [hit["_score"] for hit in single])
+        assert [hit["_score"] for hit in chunk_hits] == [hit["_score"] for hit in hits]
+    assert index.search_text_many([], top_k=3) == []
+
+
+def test_reopen_index(tmp_path):
+    LocalVectorIndex.build(make_records(), path=str(tmp_path), embed=fake_embed)
+    index = LocalVectorIndex(str(tmp_path), embed=fake_embed)
+    assert index.search_text("docker", top_k=1)[0]["_id"] == "4"
+
+
+def test_rebuild_keeps_open_index_readable(tmp_path):
+    opened = LocalVectorIndex.build(make_records(), path=str(tmp_path), embed=fake_embed)
+    LocalVectorIndex.build(make_records()[:2], path=str(tmp_path), embed=fake_embed)
+
+    assert opened.search_text("docker", top_k=1)[0]["_id"] == "4"
+    assert len(LocalVectorIndex(str(tmp_path), embed=fake_embed)) == 2
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_build_without_records(tmp_path):
+    with pytest.raises(ValueError):
+        LocalVectorIndex.build([], path=str(tmp_path), embed=fake_embed)
@@ -0,0 +1,94 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+sibling_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
+sys.path.append(sibling_dir)
+
+import work_embedding
+
+
+# Patch logger to avoid cluttering test output
+@pytest.fixture(autouse=True)
+def patch_logger():
+    with patch("work_embedding.logger") as mock_logger:
+        yield mock_logger
+
+
+@pytest.fixture
+def mock_model():
+    model = MagicMock()
+    model.encode.side_effect = lambda texts, **kwargs: np.array(
+        [[len(text), 1.0] for text in texts], dtype=np.float32,
+    )
+    with patch("work_embedding.SentenceTransformer", return_value=model) as model_cls, \
+            patch.dict(work_embedding._models, clear=True):
+        yield model_cls, model
+
+
+def test_model_is_loaded_once(mock_model):
+    model_cls, model = mock_model
+
+    first = work_embedding.get_sentence_embeddings(["git pull", "git push"])
+    work_embedding.get_sentence_embeddings(["docker"])
+
+    model_cls.assert_called_once()
+    assert isinstance(first, np.ndarray)
+    assert first.dtype == np.float32
+    assert first.tolist() == [[8.0, 1.0], [8.0, 1.0]]
+
+
+def test_duplicates_are_encoded_once(mock_model):
+    _, model = mock_model
+
+    vectors = work_embedding.get_sentence_embeddings(["git", "sql", "git"], batch_size=16)
+
+    assert model.encode.call_args.args[0] == ["git", "sql"]
+    assert model.encode.call_args.kwargs["batch_size"] == 16
+    assert vectors.shape == (3, 2)
+
+
+def test_cache_skips_known_texts(mock_model, tmp_path):
+    _, model = mock_model
+    cache = work_embedding.EmbeddingCache(str(tmp_path / "cache" / "embeddings.sqlite"))
+
+    work_embedding.get_sentence_embeddings(["git", "sql"], cache=cache)
+    vectors = work_embedding.get_sentence_embeddings(["sql", "python", "git"], cache=cache)
+
+    assert model.encode.call_args.args[0] == ["python"]
+    assert vectors.tolist() == [[3.0, 1.0], [6.0, 1.0], [3.0, 1.0]]
+    cache.close()
+
+
+def test_cache_is_separate_per_backend(mock_model, tmp_path):
+    _, model = mock_model
+    cache = work_embedding.EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+
+    work_embedding.get_sentence_embeddings(["git"], backend="torch", cache=cache)
+    work_embedding.get_sentence_embeddings(["git"], backend="onnx", cache=cache)
+
+    assert model.encode.call_count == 2
+    cache.close()
+
+
+def test_onnx_session_uses_embedding_threads(mock_model, monkeypatch):
+    model_cls, _ = mock_model
+    onnxruntime = MagicMock()
+    monkeypatch.setitem(sys.modules, "onnxruntime", onnxruntime)
+    monkeypatch.setitem(sys.modules, "torch", MagicMock())
+
+    with patch("work_embedding.EMBEDDING_THREADS", 2):
+        work_embedding.get_model("model", backend="onnx")
+
+    session_options = model_cls.call_args.kwargs["model_kwargs"]["session_options"]
+    assert session_options is onnxruntime.SessionOptions.return_value
+    assert session_options.intra_op_num_threads == 2
+
+
+def test_empty_texts(mock_model):
+    _, model = mock_model
+    assert work_embedding.get_sentence_embeddings([]).shape == (0, 0)
+    model.encode.assert_not_called()
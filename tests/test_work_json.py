@@ -17,6 +17,17 @@ from work_json import (
     parse_json_pinecone,
     parse_json_postgres_question,
     parse_json_postgres_answer,
+    iter_question_records,
+    fan_out_records,
+    to_answer_row,
+    to_question_row,
+    append_corpus,
+    iter_corpus_items,
+    reset_corpus,
+    replace_corpus,
+    corpus_exists,
+    decode_page,
+    iter_question_records_parallel,
 )
 
 # Patch the logger to avoid cluttering test output
@@ -127,12 +138,13 @@ def test_parse_json_postgres_question_success(mock_read_json, mock_get_files):
     mock_read_json.return_value = {
         "data": [
             {"id": 1, "title": "T1", "createdAt": "2024-01-01"},
-            {"id": 2, "title": "T2", "createdAt": "2024-01-02"},
+            {"id": 2, "title": "T2", "createdAt": "2024-01-02", "keywords": ["git", "rebase"], "shortAnswer": "A2"},
         ]
     }
     results = parse_json_postgres_question("dummy_dir")
     assert isinstance(results, list)
-    assert results[0] == (1, "T1", "2024-01-01")
+    assert results[0] == (1, "T1", "2024-01-01", None, None)
+    assert results[1] == (2, "T2", "2024-01-02", "git rebase", "A2")
 
 @patch("work_json.get_all_json_files")
 @patch("work_json.read_json_file")
@@ -154,3 +166,126 @@ def test_parse_json_postgres_answer_success(mock_read_json, mock_get_files):
 def test_parse_json_postgres_answer_empty_files(mock_read_json, mock_get_files):
     mock_get_files.return_value = []
     assert parse_json_postgres_answer("dummy_dir") is None
+
+def test_iter_question_records_reads_each_file_once(temp_json_dir):
+    temp_dir, files = temp_json_dir
+    with patch("work_json.read_json_file", wraps=read_json_file) as mock_read_json:
+        records = list(iter_question_records(temp_dir, files))
+    assert mock_read_json.call_count == 2
+    assert len(records) == 4
+    assert set(records[0]) == {"id", "title", "keywords", "shortAnswer", "createdAt"}
+
+@patch("work_json.get_all_json_files")
+@patch("work_json.read_json_file")
+def test_iter_question_records_raises_on_unreadable_file(mock_read_json, mock_get_files):
+    mock_get_files.return_value = ["file1.json"]
+    mock_read_json.return_value = None
+    with pytest.raises(ValueError):
+        list(iter_question_records("dummy_dir"))
+
+def test_fan_out_records_batches_in_sink_order():
+    records = [{"id": i, "title": f"T{i}", "createdAt": None, "shortAnswer": f"A{i}"} for i in range(5)]
+    calls = []
+    sinks = [
+        (to_question_row, lambda batch: calls.append(("questions", batch))),
+        (to_answer_row, lambda batch: calls.append(("answers", batch))),
+    ]
+    count = fan_out_records(iter(records), sinks, batch_size=2)
+    assert count == 5
+    assert [name for name, _ in calls] == ["questions", "answers"] * 3
+    assert [len(batch) for _, batch in calls] == [2, 2, 2, 2, 1, 1]
+    assert calls[1][1] == [(0, "A0"), (1, "A1")]
+
+def test_corpus_roundtrip_keeps_latest_version(tmp_path):
+    corpus = str(tmp_path / "corpus.jsonl.gz")
+    first = append_corpus([{"id": 1, "title": "T1"}, {"id": 2, "title": "T2"}], corpus, label="page_1")
+    second = append_corpus([{"id": 1, "title": "T1 edited"}], corpus, label="incremental")
+
+    assert first["offset"] == 0
+    assert second["offset"] == first["length"]
+    assert second["count"] == 1
+
+    latest = {item["id"]: item["title"] for item in iter_corpus_items(corpus)}
+    assert latest == {1: "T1 edited", 2: "T2"}
+    assert len(list(iter_corpus_items(corpus, latest_only=False))) == 3
+
+    records = list(iter_question_records(corpus))
+    assert sorted(r["id"] for r in records) == [1, 2]
+
+    reset_corpus(corpus)
+    assert list(iter_corpus_items(corpus)) == []
+
+def test_iter_corpus_items_without_corpus_file(tmp_path):
+    corpus = str(tmp_path / "corpus.jsonl.gz")
+    append_corpus([{"id": 1, "title": "T1"}], corpus, label="page_1")
+    os.remove(corpus)
+
+    assert list(iter_corpus_items(corpus)) == []
+    assert not corpus_exists(corpus)
+
+def test_replace_corpus_moves_data_and_index(tmp_path):
+    corpus = str(tmp_path / "corpus.jsonl.gz")
+    append_corpus([{"id": 1, "title": "old"}], corpus, label="page_1")
+    build = f"{corpus}.tmp"
+    reset_corpus(build)
+    append_corpus([{"id": 1, "title": "new"}, {"id": 2, "title": "T2"}], build, label="page_1")
+
+    replace_corpus(build, corpus)
+
+    assert corpus_exists(corpus)
+    assert not os.path.exists(build)
+    assert {item["id"]: item["title"] for item in iter_corpus_items(corpus)} == {1: "new", 2: "T2"}
+
+@pytest.mark.parametrize("disabled", [["json"], ["msgspec"], ["msgspec", "orjson"]])
+def test_iter_question_records_reads_corpus_like_page_files(temp_json_dir, tmp_path, disabled):
+    temp_dir, files = temp_json_dir
+    corpus = str(tmp_path / "corpus.jsonl.gz")
+    for filename in files:
+        with open(filename, encoding="utf-8") as f:
+            append_corpus(json.load(f)["data"], corpus)
+
+    with patch("work_json.get_all_json_files", return_value=files):
+        expected = sorted(iter_question_records(temp_dir), key=lambda r: r["id"])
+    # stdlib `json` is never used for corpus lines while a fast decoder is installed
+    with patch.multiple("work_json", **{name: None for name in disabled}):
+        records = sorted(iter_question_records(corpus), key=lambda r: r["id"])
+
+    assert records == expected
+
+def test_iter_question_records_parallel_keeps_order(temp_json_dir):
+    temp_dir, files = temp_json_dir
+    with patch("work_json.get_all_json_files", return_value=files):
+        serial = list(iter_question_records(temp_dir, files))
+        parallel = list(iter_question_records_parallel(temp_dir, workers=2, chunksize=1))
+    assert parallel == serial
+
+def test_iter_question_records_serial_and_parallel_accept_string_keywords(tmp_path):
+    page = {"data": [
+        {"id": 1, "title": "T1", "keywords": "git, rebase", "shortAnswer": "S1", "createdAt": "2024-01-01"},
+        {"id": 2, "title": "T2", "keywords": ["python"], "shortAnswer": "S2", "createdAt": "2024-01-02"},
+    ]}
+    filename = tmp_path / "page_1.json"
+    filename.write_text(json.dumps(page), encoding="utf-8")
+
+    with patch("work_json.get_all_json_files", return_value=[str(filename)]):
+        serial = list(iter_question_records(str(tmp_path)))
+        parallel = list(iter_question_records_parallel(str(tmp_path), workers=2))
+
+    assert parallel == serial
+    assert [to_question_row(record)[3] for record in parallel] == ["git, rebase", "python"]
+
+def test_iter_question_records_parallel_reads_corpus(tmp_path):
+    corpus = str(tmp_path / "corpus.jsonl.gz")
+    append_corpus([{"id": 1, "title": "T1"}, {"id": 2, "title": "T2"}], corpus)
+    append_corpus([{"id": 2, "title": "T2 edited"}], corpus)
+    records = list(iter_question_records_parallel(corpus, workers=2))
+    assert [(r["id"], r["title"]) for r in records] == [(2, "T2 edited"), (1, "T1")]
+
+@pytest.mark.parametrize("fast_decoder", ["msgspec", "orjson"])
+def test_decode_page_without_fast_decoder(fast_decoder):
+    raw = json.dumps({"data": [{"id": 1, "title": "T1", "longAnswer": "skip"}]}).encode("utf-8")
+    expected = [{"id": 1, "title": "T1", "keywords": None, "shortAnswer": None, "createdAt": None}]
+    assert decode_page(raw) == expected
+    with patch(f"work_json.{fast_decoder}", None), patch("work_json.msgspec", None):
+        assert decode_page(raw) == expected
+
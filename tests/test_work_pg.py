@@ -21,60 +21,71 @@ def test_read_sql_file_reads_file_content():
         mock_file.assert_called_once_with("dummy.sql", "r", encoding="utf-8")
         assert result == sql_content
 
-@patch("work_pg.get_db_connection")
-@patch("work_pg.get_postgres_params")
+@patch("work_pg.pooled_connection")
 @patch("work_pg.read_sql_file")
-def test_init_db_success(mock_read_sql, mock_get_params, mock_get_conn):
+def test_init_db_success(mock_read_sql, mock_pooled):
     # Setup mocks
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-    mock_get_conn.return_value = mock_conn
-    mock_get_params.return_value = {"dbname": "test"}
+    mock_pooled.return_value.__enter__.return_value = mock_conn
     mock_read_sql.return_value = "CREATE TABLE test (id SERIAL);"
 
     work_pg.init_db()
 
-    mock_get_conn.assert_called_once()
+    mock_pooled.assert_called_once()
     mock_read_sql.assert_called_once()
     mock_cursor.execute.assert_called()
     mock_conn.commit.assert_called()
-    mock_conn.close.assert_called_once()
+    mock_pooled.return_value.__exit__.assert_called_once()
 
-@patch("work_pg.get_db_connection")
-@patch("work_pg.get_postgres_params")
-def test_init_db_connection_fail(mock_get_params, mock_get_conn):
-    mock_get_conn.return_value = None
-    mock_get_params.return_value = {"dbname": "test"}
+@pytest.mark.parametrize("backend, files", [
+    ("pinecone", ["src/sql_ddl/init_sql_ddl.sql"]),
+    ("pgvector", ["src/sql_ddl/init_sql_ddl.sql", "src/sql_ddl/pgvector_sql_ddl.sql"]),
+])
+@patch("work_pg.pooled_connection")
+@patch("work_pg.read_sql_file", return_value="SELECT 1;")
+def test_init_db_applies_pgvector_ddl_only_for_pgvector(mock_read_sql, mock_pooled, monkeypatch, backend, files):
+    monkeypatch.setenv("VECTOR_BACKEND", backend)
+
+    work_pg.init_db()
+
+    assert [call.kwargs["file_path"] for call in mock_read_sql.call_args_list] == files
+
+def test_base_ddl_needs_no_pgvector():
+    ddl_path = os.path.join(os.path.dirname(__file__), '..', 'src', 'sql_ddl', 'init_sql_ddl.sql')
+    with open(ddl_path, "r", encoding="utf-8") as f:
+        ddl = f.read().lower()
+    assert "vector" not in ddl.replace("tsvector", "")
+
+@patch("work_pg.pooled_connection")
+def test_init_db_connection_fail(mock_pooled):
+    mock_pooled.side_effect = ConnectionError("Failed to establish database connection")
     with pytest.raises(ConnectionError):
         work_pg.init_db()
 
-@patch("work_pg.get_db_connection")
-@patch("work_pg.get_postgres_params")
+@patch("work_pg.pooled_connection")
 @patch("work_pg.read_sql_file")
-def test_init_db_sql_error(mock_read_sql, mock_get_params, mock_get_conn):
+def test_init_db_sql_error(mock_read_sql, mock_pooled):
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-    mock_get_conn.return_value = mock_conn
-    mock_get_params.return_value = {"dbname": "test"}
+    mock_pooled.return_value.__enter__.return_value = mock_conn
     mock_read_sql.return_value = "CREATE TABLE test (id SERIAL);"
     # Simulate DB error
     mock_cursor.execute.side_effect = Exception("DB error")
     with pytest.raises(Exception):
         work_pg.init_db()
-    mock_conn.close.assert_called_once()
+    mock_pooled.return_value.__exit__.assert_called_once()
 
-@patch("work_pg.get_db_connection")
-@patch("work_pg.get_postgres_params")
+@patch("work_pg.pooled_connection")
 @patch("work_pg.sql.SQL")
 @patch("work_pg.sql.Identifier")
-def test_insert_many_rows_success(mock_identifier, mock_sql, mock_get_params, mock_get_conn):
+def test_insert_many_rows_success(mock_identifier, mock_sql, mock_pooled):
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-    mock_get_conn.return_value = mock_conn
-    mock_get_params.return_value = {"dbname": "test"}
+    mock_pooled.return_value.__enter__.return_value = mock_conn
     mock_sql.return_value = MagicMock()
     mock_identifier.side_effect = lambda x: x
 
@@ -87,38 +98,34 @@ def test_insert_many_rows_success(mock_identifier, mock_sql, mock_get_params, mo
 
     work_pg.insert_many_rows(table, columns, rows)
 
-    mock_get_conn.assert_called_once()
+    mock_pooled.assert_called_once()
     mock_cursor.execute.assert_called()
     mock_conn.commit.assert_called_once()
-    mock_conn.close.assert_called_once()
+    mock_pooled.return_value.__exit__.assert_called_once()
 
 def test_insert_many_rows_no_rows():
     with patch("work_pg.logger") as mock_logger:
         work_pg.insert_many_rows("table", ["id"], [])
         mock_logger.error.assert_called_with("No rows to insert.")
 
-@patch("work_pg.get_db_connection")
-@patch("work_pg.get_postgres_params")
+@patch("work_pg.pooled_connection")
 @patch("work_pg.sql.SQL")
 @patch("work_pg.sql.Identifier")
-def test_insert_many_rows_connection_fail(mock_identifier, mock_sql, mock_get_params, mock_get_conn):
-    mock_get_conn.return_value = None
-    mock_get_params.return_value = {"dbname": "test"}
+def test_insert_many_rows_connection_fail(mock_identifier, mock_sql, mock_pooled):
+    mock_pooled.side_effect = ConnectionError("Failed to establish database connection")
     mock_sql.return_value = MagicMock()
     mock_identifier.side_effect = lambda x: x
     with pytest.raises(ConnectionError):
         work_pg.insert_many_rows("table", ["id"], [(1,)])
 
-@patch("work_pg.get_db_connection")
-@patch("work_pg.get_postgres_params")
+@patch("work_pg.pooled_connection")
 @patch("work_pg.sql.SQL")
 @patch("work_pg.sql.Identifier")
-def test_insert_many_rows_db_error(mock_identifier, mock_sql, mock_get_params, mock_get_conn):
+def test_insert_many_rows_db_error(mock_identifier, mock_sql, mock_pooled):
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-    mock_get_conn.return_value = mock_conn
-    mock_get_params.return_value = {"dbname": "test"}
+    mock_pooled.return_value.__enter__.return_value = mock_conn
     mock_sql.return_value = MagicMock()
     mock_identifier.side_effect = lambda x: x
 
@@ -128,4 +135,132 @@ def test_insert_many_rows_db_error(mock_identifier, mock_sql, mock_get_params, m
 
     with pytest.raises(Exception):
         work_pg.insert_many_rows("table", ["id"], [(1,)])
-    mock_conn.close.assert_called_once()
+    mock_pooled.return_value.__exit__.assert_called_once()
+
+def test_copy_row_stream_escapes_and_reads_in_blocks():
+    stream = work_pg.CopyRowStream([(1, "a\tb", None), (2, "c\\d\ne", True)])
+    blocks = []
+    while True:
+        block = stream.read(4)
+        if not block:
+            break
+        blocks.append(block)
+    assert all(len(block) <= 4 for block in blocks)
+    assert "".join(blocks) == "1\ta\\tb\t\\N\n2\tc\\\\d\\ne\tt\n"
+    assert stream.count == 2
+
+@patch("work_pg.pooled_connection")
+def test_copy_many_rows_commits_per_chunk(mock_pooled):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_pooled.return_value.__enter__.return_value = mock_conn
+    copied = []
+    mock_cursor.copy_expert.side_effect = lambda query, stream: copied.append(stream.read())
+
+    rows = ((i, f"title {i}") for i in range(5))
+    total = work_pg.copy_many_rows("questions", ["id", "title"], rows, chunk_size=2)
+
+    assert total == 5
+    assert mock_cursor.copy_expert.call_count == 3
+    assert mock_conn.commit.call_count == 3
+    assert copied[2] == "4\ttitle 4\n"
+    mock_pooled.return_value.__exit__.assert_called_once()
+
+@patch("work_pg.pooled_connection")
+def test_copy_many_rows_rolls_back_on_error(mock_pooled):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_pooled.return_value.__enter__.return_value = mock_conn
+    mock_cursor.copy_expert.side_effect = Exception("DB error")
+
+    with pytest.raises(Exception):
+        work_pg.copy_many_rows("questions", ["id"], [(1,)])
+    mock_conn.rollback.assert_called_once()
+    mock_pooled.return_value.__exit__.assert_called_once()
+
+@patch("work_pg.pooled_connection")
+def test_copy_many_rows_connection_fail(mock_pooled):
+    mock_pooled.side_effect = ConnectionError("Failed to establish database connection")
+    with pytest.raises(ConnectionError):
+        work_pg.copy_many_rows("questions", ["id"], [(1,)])
+
+@patch("work_pg.pooled_connection")
+def test_upsert_many_rows_stages_and_merges_changed_rows(mock_pooled):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_pooled.return_value.__enter__.return_value = mock_conn
+    mock_cursor.copy_expert.side_effect = lambda query, stream: stream.read()
+    mock_cursor.rowcount = 1
+
+    changed = work_pg.upsert_many_rows(
+        "questions", ["id", "title"], [(1, "T1"), (2, "T2"), (3, "T3")], ["id"], chunk_size=2,
+    )
+
+    assert changed == 2
+    assert mock_conn.commit.call_count == 2
+    create_stage, merge = (call.args[0] for call in mock_cursor.execute.call_args_list[:2])
+    assert "CREATE TEMP TABLE" in repr(create_stage)
+    assert "ON CONFLICT" in repr(merge)
+    assert "IS DISTINCT FROM" in repr(merge)
+    mock_pooled.return_value.__exit__.assert_called_once()
+
+
+@patch("work_pg.pooled_connection")
+def test_delete_rows_deletes_keys_in_one_statement(mock_pooled):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_pooled.return_value.__enter__.return_value = mock_conn
+    mock_cursor.rowcount = 2
+
+    assert work_pg.delete_rows("questions", "id", [5, 7]) == 2
+    query, params = mock_cursor.execute.call_args.args
+    assert "DELETE FROM" in repr(query)
+    assert params == ([5, 7],)
+    mock_conn.commit.assert_called_once()
+
+@patch("work_pg.pooled_connection")
+def test_delete_rows_without_keys(mock_pooled):
+    assert work_pg.delete_rows("questions", "id", []) == 0
+    mock_pooled.assert_not_called()
+
+
+def test_to_vector_literal():
+    assert work_pg.to_vector_literal([0.5, 1, -0.25]) == "[0.5,1,-0.25]"
+
+
+@patch("work_pg.execute_values")
+@patch("work_pg.pooled_connection")
+def test_backfill_embeddings_updates_stale_rows_until_none_left(mock_pooled, mock_execute_values):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.side_effect = [[(1, "git", "md5-1"), (2, "python", "md5-2")], []]
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_pooled.return_value.__enter__.return_value = mock_conn
+    embed = MagicMock(return_value=[[0.1, 0.2], [0.3, 0.4]])
+
+    assert work_pg.backfill_embeddings(embed, batch_size=2) == 2
+
+    embed.assert_called_once_with(["git", "python"])
+    values = mock_execute_values.call_args.args[2]
+    assert values == [(1, "[0.1,0.2]", "md5-1"), (2, "[0.3,0.4]", "md5-2")]
+    mock_conn.commit.assert_called_once()
+
+
+@patch("work_pg.execute_values", side_effect=Exception("DB error"))
+@patch("work_pg.pooled_connection")
+def test_backfill_embeddings_rolls_back_on_error(mock_pooled, mock_execute_values):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.return_value = [(1, "git", "md5-1")]
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_pooled.return_value.__enter__.return_value = mock_conn
+
+    with pytest.raises(Exception):
+        work_pg.backfill_embeddings(MagicMock(return_value=[[0.1]]))
+
+    mock_conn.rollback.assert_called_once()
+    mock_conn.commit.assert_not_called()
@@ -6,7 +6,7 @@ from unittest.mock import patch, MagicMock
 sibling_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'utils'))
 sys.path.append(sibling_dir)
 
-from work_pinecone import PineconeClient, MAX_BATCH_SIZE
+from work_pinecone import PineconeClient, MAX_BATCH_SIZE, load_checkpoint
 
 # Patch environment variables and dependencies at the module level
 @pytest.fixture(autouse=True)
@@ -60,21 +60,156 @@ def test_batch_records_batches_correctly(pinecone_client):
     assert len(batches[1]) == 50
     assert len(batches[2]) == 5
 
-@patch("work_pinecone.parse_json_pinecone")
-def test_upsert_data_success(mock_parse_json, pinecone_client):
-    # Mock parse_json_pinecone to return 3 records
-    mock_parse_json.return_value = [{"id": i} for i in range(3)]
+@patch("work_pinecone.to_pinecone_record", side_effect=lambda record: record)
+@patch("work_pinecone.iter_question_records")
+def test_upsert_data_success(mock_iter_records, mock_to_record, pinecone_client):
+    # Mock the record stream to return 3 records
+    mock_iter_records.return_value = iter([{"_id": str(i)} for i in range(3)])
     pinecone_client.dense_index = MagicMock()
-    pinecone_client.batch_records = lambda records, max_batch_size=MAX_BATCH_SIZE: [records]
-    pinecone_client.upsert_data("dummy_dir")
+    total = pinecone_client.upsert_data("dummy_dir")
+    assert total == 3
     pinecone_client.dense_index.upsert_records.assert_called_once_with(
-        pinecone_client.namespace, [{"id": 0}, {"id": 1}, {"id": 2}]
+        pinecone_client.namespace, [{"_id": "0"}, {"_id": "1"}, {"_id": "2"}]
     )
-    pinecone_client.logger.info.assert_called_with("All data upserted into Pinecone successfully.")
+    pinecone_client.logger.info.assert_called_with("All data upserted into Pinecone successfully, 3 records.")
 
-@patch("work_pinecone.parse_json_pinecone")
-def test_upsert_data_raises_on_error(mock_parse_json, pinecone_client):
-    mock_parse_json.side_effect = Exception("parse error")
+@patch("work_pinecone.iter_question_records")
+def test_upsert_data_raises_on_error(mock_iter_records, pinecone_client):
+    mock_iter_records.side_effect = Exception("parse error")
     with pytest.raises(Exception):
         pinecone_client.upsert_data("dummy_dir")
     pinecone_client.logger.error.assert_called()
+
+def test_batch_records_by_size_limits_bytes(pinecone_client):
+    records = [{"_id": str(i), "title": "x" * 100} for i in range(10)]
+    size = len('{"_id": "0", "title": "' + "x" * 100 + '"}')
+    batches = list(pinecone_client.batch_records_by_size(iter(records), max_batch_bytes=3 * size))
+    assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+    batches = list(pinecone_client.batch_records_by_size(iter(records), max_batch_size=4))
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+class Throttled(Exception):
+    status = 429
+
+@patch("work_pinecone.time.sleep")
+def test_upsert_records_retries_throttled_batches(mock_sleep, pinecone_client):
+    pinecone_client.dense_index = MagicMock()
+    pinecone_client.dense_index.upsert_records.side_effect = [Throttled(), Throttled(), None]
+
+    assert pinecone_client.upsert_records([{"_id": "1"}]) == 1
+    assert pinecone_client.dense_index.upsert_records.call_count == 3
+    assert mock_sleep.call_count == 2
+
+def test_upsert_records_does_not_retry_client_errors(pinecone_client):
+    error = Exception("bad request")
+    error.status = 400
+    pinecone_client.dense_index = MagicMock()
+    pinecone_client.dense_index.upsert_records.side_effect = error
+
+    with pytest.raises(Exception):
+        pinecone_client.upsert_records([{"_id": "1"}])
+    pinecone_client.dense_index.upsert_records.assert_called_once()
+
+def test_upsert_records_sends_batches_concurrently(pinecone_client):
+    import threading
+    import time
+
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def upsert(namespace, batch):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+
+    pinecone_client.dense_index = MagicMock()
+    pinecone_client.dense_index.upsert_records.side_effect = upsert
+    records = ({"_id": str(i)} for i in range(10 * MAX_BATCH_SIZE))
+
+    assert pinecone_client.upsert_records(records, max_in_flight=3) == 10 * MAX_BATCH_SIZE
+    assert peak[0] == 3
+
+def test_upsert_records_resumes_from_checkpoint(pinecone_client, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    records = [{"_id": str(i), "title": f"q{i}"} for i in range(2 * MAX_BATCH_SIZE)]
+    pinecone_client.dense_index = MagicMock()
+    pinecone_client.dense_index.upsert_records.side_effect = [None, Exception("fatal")]
+
+    with pytest.raises(Exception):
+        pinecone_client.upsert_records(records, max_in_flight=1, checkpoint_path=checkpoint)
+    # one appended line per upserted batch
+    with open(checkpoint, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+
+    # the first batch is skipped, an edited record of it is sent again
+    records[0] = {"_id": "0", "title": "edited"}
+    pinecone_client.dense_index.upsert_records.side_effect = None
+    pinecone_client.dense_index.upsert_records.reset_mock()
+    assert pinecone_client.upsert_records(records, max_in_flight=1, checkpoint_path=checkpoint) == MAX_BATCH_SIZE + 1
+    assert not os.path.exists(checkpoint)
+
+def test_warm_up_describes_index(pinecone_client):
+    pinecone_client.dense_index = MagicMock()
+    pinecone_client.warm_up()
+    pinecone_client.dense_index.describe_index_stats.assert_called_once()
+
+def test_warm_up_logs_errors(pinecone_client):
+    pinecone_client.dense_index = MagicMock()
+    pinecone_client.dense_index.describe_index_stats.side_effect = Exception("timeout")
+    pinecone_client.warm_up()
+    pinecone_client.logger.warning.assert_called_once()
+
+def test_get_pinecone_client_is_shared_across_threads(mock_logger, mock_pinecone):
+    from concurrent.futures import ThreadPoolExecutor
+    import work_pinecone
+
+    work_pinecone.reset_pinecone_clients()
+    with patch("work_pinecone.PineconeClient", wraps=PineconeClient) as client_cls:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            clients = list(pool.map(lambda _: work_pinecone.get_pinecone_client(), range(16)))
+
+    assert all(client is clients[0] for client in clients)
+    client_cls.assert_called_once()
+    work_pinecone.reset_pinecone_clients()
+
+def test_sync_records_upserts_changed_and_deletes_removed(pinecone_client, tmp_path):
+    manifest = str(tmp_path / "manifest.json")
+    pinecone_client.dense_index = MagicMock()
+    records = [{"_id": str(i), "title": f"q{i}", "tags": [], "url": f"u{i}"} for i in range(3)]
+
+    assert pinecone_client.sync_records(records, manifest_path=manifest) == {
+        "upserted": 3, "deleted": 0, "unchanged": 0,
+    }
+
+    pinecone_client.dense_index.reset_mock()
+    records = [records[0], {**records[1], "title": "edited"}, {"_id": "3", "title": "q3", "tags": [], "url": "u3"}]
+    stats = pinecone_client.sync_records(records, manifest_path=manifest)
+
+    assert stats == {"upserted": 2, "deleted": 1, "unchanged": 1}
+    upserted = pinecone_client.dense_index.upsert_records.call_args.args[1]
+    assert sorted(record["_id"] for record in upserted) == ["1", "3"]
+    pinecone_client.dense_index.delete.assert_called_once_with(ids=["2"], namespace=pinecone_client.namespace)
+
+    pinecone_client.dense_index.reset_mock()
+    assert pinecone_client.sync_records(records, manifest_path=manifest) == {
+        "upserted": 0, "deleted": 0, "unchanged": 3,
+    }
+    pinecone_client.dense_index.upsert_records.assert_not_called()
+
+def test_sync_records_refuses_empty_input(pinecone_client, tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text('{"1": "hash"}', encoding="utf-8")
+    pinecone_client.dense_index = MagicMock()
+
+    with pytest.raises(ValueError):
+        pinecone_client.sync_records([], manifest_path=str(manifest))
+    pinecone_client.dense_index.delete.assert_not_called()
+
+def test_load_checkpoint_skips_torn_line(tmp_path):
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    checkpoint.write_text('{"1": "a", "2": "b"}\n{"2": "c"}\n{"3": ', encoding="utf-8")
+
+    assert load_checkpoint(str(checkpoint)) == {"1": "a", "2": "c"}
+    assert load_checkpoint(str(tmp_path / "missing.jsonl")) == {}